@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""Compare the bytes on the wire and the time to fetch and parse large
+responses with and without gzip compression.
+
+The responses are served from testdata by a local HTTP server that honours
+Accept-Encoding, so the numbers include requests' decompression but not the
+network.
+
+    python -m benchmarks.gzip_compression [--repeat 200]
+"""
+from __future__ import print_function
+
+import argparse
+import gzip
+import io
+import os
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+import twitter
+
+TESTDATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'testdata')
+
+FIXTURES = {
+    '/1.1/statuses/user_timeline.json': 'get_user_timeline.json',
+    '/1.1/statuses/home_timeline.json': 'get_home_timeline.json',
+    '/1.1/users/lookup.json': 'users_lookup.json',
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    bytes_sent = 0
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        with open(os.path.join(TESTDATA, FIXTURES[path]), 'rb') as f:
+            body = f.read()
+        self.send_response(200)
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            out = io.BytesIO()
+            with gzip.GzipFile(fileobj=out, mode='wb') as f:
+                f.write(body)
+            body = out.getvalue()
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        Handler.bytes_sent += len(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(api, call, repeat):
+    Handler.bytes_sent = 0
+    start = time.time()
+    for _ in range(repeat):
+        call(api)
+    return Handler.bytes_sent // repeat, (time.time() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    base_url = 'http://127.0.0.1:%d/1.1' % server.server_port
+
+    calls = [
+        ('GetUserTimeline', lambda api: api.GetUserTimeline(screen_name='kesuke')),
+        ('GetHomeTimeline', lambda api: api.GetHomeTimeline()),
+        ('UsersLookup', lambda api: api.UsersLookup(screen_name=['kesuke'])),
+    ]
+    print('%-16s %-5s %10s %10s' % ('call', 'gzip', 'bytes', 'ms/call'))
+    for name, call in calls:
+        for use_gzip in (False, True):
+            api = twitter.Api(consumer_key='test',
+                              consumer_secret='test',
+                              access_token_key='test',
+                              access_token_secret='test',
+                              base_url=base_url,
+                              use_gzip_compression=use_gzip)
+            size, ms = run(api, call, args.repeat)
+            print('%-16s %-5s %10d %10.2f' % (name, use_gzip, size, ms))
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""Compare the time and peak memory of building and combining follower ids
+held in sets and in twitter.IDSet.
+
+    python -m benchmarks.id_set [--ids 1000000]
+"""
+from __future__ import print_function
+
+import argparse
+import operator
+import random
+import time
+import tracemalloc
+
+from twitter import IDSet
+
+
+def pages(ids, size=5000):
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def traced(function, *args):
+    """Call function and return its result, the seconds it took and the
+    peak of the memory it allocated."""
+    tracemalloc.start()
+    start = time.time()
+    result = function(*args)
+    elapsed = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def measure(build):
+    (followers, friends), built, build_peak = traced(build)
+    rows = [('build', built, build_peak)]
+    for name, operation in (('&', operator.and_), ('-', operator.sub), ('|', operator.or_)):
+        _, elapsed, peak = traced(operation, friends, followers)
+        rows.append((name, elapsed, peak))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--ids', type=int, default=1000000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    followers = random.sample(range(10 ** 12, 2 * 10 ** 12), args.ids)
+    friends = followers[:args.ids // 2] + random.sample(range(10 ** 12, 2 * 10 ** 12), args.ids // 2)
+
+    def as_lists():
+        # What GetFollowerIDs returns, turned into sets to compare them.
+        a, b = [], []
+        for page in pages(followers):
+            a.extend(list(page))
+        for page in pages(friends):
+            b.extend(list(page))
+        return set(a), set(b)
+
+    def as_id_sets():
+        return IDSet.FromPages(pages(followers)), IDSet.FromPages(pages(friends))
+
+    print('%-8s %-6s %10s %12s' % ('', '', 's', 'peak MB'))
+    for name, build in (('list+set', as_lists), ('IDSet', as_id_sets)):
+        for step, elapsed, peak in measure(build):
+            print('%-8s %-6s %10.2f %12.1f' % (name, step, elapsed, peak / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""Compare the JSON codecs in twitter.json_codec on the testdata fixtures.
+
+For each codec this reports the time to parse every fixture from the bytes
+of a response body, and to serialize the fixtures that are statuses or users
+with TwitterModel.AsJsonString().
+
+    python -m benchmarks.json_codec [--repeat 20]
+"""
+from __future__ import print_function
+
+import argparse
+import glob
+import os
+import time
+
+import twitter
+from twitter.json_codec import JSONCodec, OrjsonCodec
+
+TESTDATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'testdata')
+
+
+def load_fixtures():
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(TESTDATA, '*.json'))):
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            JSONCodec().loads(data)
+        except ValueError:
+            continue
+        fixtures.append(data)
+    return fixtures
+
+
+def load_models(fixtures):
+    models = []
+    for data in fixtures:
+        obj = JSONCodec().loads(data)
+        for item in obj if isinstance(obj, list) else [obj]:
+            if not isinstance(item, dict):
+                continue
+            if 'text' in item or 'full_text' in item:
+                models.append(twitter.Status.NewFromJsonDict(item))
+            elif 'screen_name' in item:
+                models.append(twitter.User.NewFromJsonDict(item))
+    return models
+
+
+def timed(function, repeat):
+    start = time.time()
+    for _ in range(repeat):
+        function()
+    return (time.time() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    fixtures = load_fixtures()
+    models = load_models(fixtures)
+    print('%d fixtures, %d bytes, %d models' % (
+        len(fixtures), sum(len(data) for data in fixtures), len(models)))
+
+    codecs = [('json', JSONCodec())]
+    try:
+        codecs.append(('orjson', OrjsonCodec()))
+    except ImportError:
+        print('orjson is not installed')
+
+    print('%-8s %12s %12s' % ('codec', 'loads ms', 'dumps ms'))
+    for name, codec in codecs:
+        loads = timed(lambda: [codec.loads(data) for data in fixtures], args.repeat)
+        twitter.models.TwitterModel.json_codec = codec
+        dumps = timed(lambda: [model.AsJsonString() for model in models], args.repeat)
+        print('%-8s %12.2f %12.2f' % (name, loads, dumps))
+    twitter.models.TwitterModel.json_codec = JSONCodec()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""Measure the rate limit bookkeeping overhead of a request: resolving its
+url to a resource for get_limit() and set_limit(), before and after
+memoizing RateLimit.url_to_resource.
+
+    python -m benchmarks.url_to_resource [--number 100000]
+"""
+from __future__ import print_function
+
+import argparse
+import re
+import timeit
+
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse
+
+from twitter.ratelimit import NON_STANDARD_ENDPOINTS, RateLimit
+
+URLS = [
+    'https://api.twitter.com/1.1/statuses/user_timeline.json?screen_name=kesuke&count=200&tweet_mode=compat',
+    'https://api.twitter.com/1.1/users/lookup.json?user_id=1%2C2%2C3&tweet_mode=compat',
+    'https://api.twitter.com/1.1/statuses/show.json?id=397&tweet_mode=compat',
+    'https://api.twitter.com/1.1/geo/id/df51dec6f4ee2b2c.json?tweet_mode=compat',
+]
+
+
+def url_to_resource(url):
+    """RateLimit.url_to_resource before it was memoized."""
+    resource = urlparse(url).path.replace('/1.1', '').replace('.json', '')
+    for non_std_endpoint in NON_STANDARD_ENDPOINTS:
+        if re.match(non_std_endpoint.regex, resource):
+            return non_std_endpoint.resource
+    return resource
+
+
+def before(url):
+    # get_limit() and set_limit() each resolved the url and split it.
+    url_to_resource(url).split('/')[1]
+    url_to_resource(url).split('/')[1]
+
+
+def after(url):
+    RateLimit._resolve(url)
+    RateLimit._resolve(url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--number', type=int, default=100000)
+    args = parser.parse_args()
+
+    print('%-8s %12s' % ('', 'us/request'))
+    for name, function in (('before', before), ('after', after)):
+        seconds = timeit.timeit(lambda: [function(url) for url in URLS], number=args.number)
+        print('%-8s %12.3f' % (name, seconds / (args.number * len(URLS)) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,7 @@
 """
 Downloads all tweets from a given user.
 
-Uses twitter.Api.GetUserTimeline to retreive the last 3,200 tweets from a user.
+Uses twitter.Api.IterUserTimeline to retreive the last 3,200 tweets from a user.
 Twitter doesn't allow retreiving more tweets than this through the API, so we get
 as many as possible.
 
@@ -21,24 +21,9 @@ from t import ACCESS_TOKEN_KEY, ACCESS_TOKEN_SECRET, CONSUMER_KEY, CONSUMER_SECR
 
 
 def get_tweets(api=None, screen_name=None):
-    timeline = api.GetUserTimeline(screen_name=screen_name, count=200)
-    earliest_tweet = min(timeline, key=lambda x: x.id).id
-    print("getting tweets before:", earliest_tweet)
-
-    while True:
-        tweets = api.GetUserTimeline(
-            screen_name=screen_name, max_id=earliest_tweet, count=200
-        )
-        new_earliest = min(tweets, key=lambda x: x.id).id
-
-        if not tweets or new_earliest == earliest_tweet:
-            break
-        else:
-            earliest_tweet = new_earliest
-            print("getting tweets before:", earliest_tweet)
-            timeline += tweets
-
-    return timeline
+    """Yield the tweets of screen_name from the most recent one, a page of
+    200 at a time."""
+    return api.IterUserTimeline(screen_name=screen_name, count=200)
 
 
 if __name__ == "__main__":
@@ -47,9 +32,8 @@ if __name__ == "__main__":
     )
     screen_name = sys.argv[1]
     print(screen_name)
-    timeline = get_tweets(api=api, screen_name=screen_name)
 
     with open('examples/timeline.json', 'w+') as f:
-        for tweet in timeline:
+        for tweet in get_tweets(api=api, screen_name=screen_name):
             f.write(json.dumps(tweet._json))
             f.write('\n')
@@ -1,10 +1,14 @@
 # encoding: utf-8
 from __future__ import unicode_literals, print_function
 
+import gzip
+import io
 import json
 import os
 import re
 import sys
+import threading
+import time
 from tempfile import NamedTemporaryFile
 import unittest
 try:
@@ -12,6 +16,10 @@ try:
 except ImportError:
     from mock import patch
 import warnings
+try:
+    from urllib.parse import parse_qs, urlparse
+except ImportError:
+    from urlparse import parse_qs, urlparse
 
 import twitter
 
@@ -511,6 +519,162 @@ class ApiTest(unittest.TestCase):
         self.assertTrue(type(resp[0]) is twitter.User)
         self.assertEqual(len(resp), 200)
 
+    def _CursorPages(self, *pages, **kwargs):
+        """Respond to each request with the page of its cursor parameter."""
+        headers = kwargs.get('headers', {})
+        data = {}
+        cursor = '-1'
+        for page in pages:
+            with open('testdata/{0}.json'.format(page)) as f:
+                data[cursor] = f.read()
+            cursor = str(json.loads(data[cursor])['next_cursor'])
+
+        def callback(request):
+            return 200, headers, data[re.search(r'cursor=(-?\d+)', request.url).group(1)]
+        responses.add_callback(GET, DEFAULT_URL, callback=callback)
+
+    @responses.activate
+    def testIterFollowers(self):
+        self._CursorPages('get_followers_0', 'get_followers_1')
+
+        followers = self.api.IterFollowers(screen_name='himawari8bot')
+        self.assertEqual(len(responses.calls), 0)
+        self.assertTrue(type(next(followers)) is twitter.User)
+        self.assertEqual(len(responses.calls), 1)
+        for i, _ in enumerate(followers, 2):
+            if i == 200:
+                break
+        self.assertEqual(len(responses.calls), 1)
+
+        resp = list(self.api.IterFollowers(screen_name='himawari8bot'))
+        self.assertEqual(len(resp), 335)
+        self.assertEqual(len(responses.calls), 3)
+
+    def _WaitForCalls(self, count):
+        deadline = time.time() + 2
+        while len(responses.calls) < count and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        return len(responses.calls)
+
+    @responses.activate
+    def testPrefetch(self):
+        self._CursorPages('get_followers_0', 'get_followers_1')
+        self.api.prefetch_pages = 2
+
+        followers = self.api.IterFollowers(screen_name='himawari8bot')
+        next(followers)
+        # The second page is fetched while the first one is processed.
+        self.assertEqual(self._WaitForCalls(2), 2)
+        self.assertEqual(len(list(followers)), 334)
+        followers.close()
+
+        responses.calls.reset()
+        self.assertEqual(len(self.api.GetFollowers(screen_name='himawari8bot')), 335)
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def testPrefetchRateLimit(self):
+        self._CursorPages('get_followers_0', 'get_followers_1', headers={
+            'x-rate-limit-limit': '15',
+            'x-rate-limit-remaining': '0',
+            'x-rate-limit-reset': str(int(time.time()) + 900)})
+        self.api.prefetch_pages = 2
+
+        # No requests are left to fetch the second page ahead.
+        followers = self.api.IterFollowers(screen_name='himawari8bot')
+        next(followers)
+        self.assertEqual(self._WaitForCalls(2), 1)
+        self.assertEqual(len(list(followers)), 334)
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def testIterUserTimeline(self):
+        def callback(request):
+            max_id = re.search(r'max_id=(\d+)', request.url)
+            if max_id is None:
+                ids = list(range(450, 250, -1))
+            else:
+                # Send the Tweet just newer than max_id again, as a boundary
+                # overlap.
+                max_id = int(max_id.group(1))
+                ids = list(range(max_id + 1, max(max_id - 200, 0), -1))
+            return 200, {}, json.dumps([{'id': i, 'text': 'tweet %d' % i} for i in ids])
+        responses.add_callback(GET, DEFAULT_URL, callback=callback)
+
+        statuses = self.api.IterUserTimeline(screen_name='kesuke')
+        self.assertEqual(next(statuses).id, 450)
+        self.assertEqual(len(responses.calls), 1)
+
+        ids = [s.id for s in statuses]
+        self.assertEqual(ids, list(range(449, 0, -1)))
+        self.assertTrue(all(type(s) is twitter.Status for s in self.api.IterUserTimeline(max_id=10)))
+        self.assertTrue('max_id=250' in responses.calls[1].request.url)
+        self.assertEqual(len(responses.calls), 3 + 1)
+
+    @responses.activate
+    def testIterUserTimelineExcludeReplies(self):
+        def callback(request):
+            max_id = re.search(r'max_id=(\d+)', request.url)
+            max_id = int(max_id.group(1)) if max_id else 600
+            statuses = [{'id': i, 'text': 'tweet %d' % i} for i in range(max_id, max(max_id - 200, 0), -1)]
+            # Tweets 201 to 400 are replies.
+            for status in statuses:
+                if 200 < status['id'] <= 400:
+                    status['in_reply_to_status_id'] = 1
+            # Like Twitter, filter after picking the page.
+            if 'exclude_replies=True' in request.url:
+                statuses = [st for st in statuses if 'in_reply_to_status_id' not in st]
+            return 200, {}, json.dumps(statuses)
+        responses.add_callback(GET, DEFAULT_URL, callback=callback)
+
+        ids = [s.id for s in self.api.IterUserTimeline(screen_name='kesuke', exclude_replies=True)]
+        self.assertEqual(ids, list(range(600, 400, -1)) + list(range(200, 0, -1)))
+        self.assertEqual(len(responses.calls), 3)
+        self.assertFalse(any('exclude_replies=True' in c.request.url for c in responses.calls))
+
+    @responses.activate
+    def testIterFollowerIDs(self):
+        self._CursorPages('get_follower_ids_0', 'get_follower_ids_1')
+
+        ids = list(self.api.IterFollowerIDs(screen_name='himawari8bot'))
+        self.assertEqual(len(ids), 7885)
+        self.assertTrue(type(ids[0]) is int)
+        self.assertEqual(len(responses.calls), 2)
+
+        ids = list(self.api.IterFollowerIDs(screen_name='himawari8bot', cursor=1482201362283529597))
+        self.assertEqual(len(ids), 2885)
+
+    @responses.activate
+    def testGetFollowerIDsCompact(self):
+        self._CursorPages('get_follower_ids_0', 'get_follower_ids_1')
+
+        ids = self.api.GetFollowerIDs(screen_name='himawari8bot', compact=True)
+        self.assertTrue(isinstance(ids, twitter.IDSet))
+        self.assertEqual(list(ids), sorted(set(self.api.GetFollowerIDs(screen_name='himawari8bot'))))
+        self.assertRaises(twitter.TwitterError, self.api.GetFollowerIDs,
+                          screen_name='himawari8bot', compact=True, stringify_ids=True)
+
+    @responses.activate
+    def testCrawlFollowerIDs(self):
+        with open('testdata/get_follower_ids_0.json') as f:
+            responses.add(GET, DEFAULT_URL, body=f.read())
+        responses.add(GET, DEFAULT_URL, status=503,
+                      body='{"errors": [{"code": 130, "message": "Over capacity"}]}')
+        store = twitter._MemoryCache()
+
+        self.assertRaises(twitter.TwitterError, self.api.CrawlFollowerIDs,
+                          store, screen_name='himawari8bot')
+        self.assertEqual(len(responses.calls), 2)
+
+        responses.reset()
+        self._CursorPages('get_follower_ids_0', 'get_follower_ids_1')
+        ids = self.api.CrawlFollowerIDs(store, screen_name='himawari8bot')
+        self.assertEqual(len(ids), 7885)
+        self.assertEqual(len(responses.calls), 1)
+        self.assertTrue('cursor=1482201362283529597' in responses.calls[0].request.url)
+        self.assertEqual(store.Stats()['entries'], 0)
+
     @responses.activate
     def testGetFollowerIDsPaged(self):
         with open('testdata/get_follower_ids_0.json') as f:
@@ -563,6 +727,53 @@ class ApiTest(unittest.TestCase):
         self.assertEqual(user.screen_name, 'kesuke')
         self.assertEqual(user.id, 718443)
 
+    @responses.activate
+    def testUsersLookupBatches(self):
+        def lookup(request):
+            query = parse_qs(urlparse(request.url).query)
+            if 'user_id' in query:
+                users = [{'id': int(i)} for i in query['user_id'][0].split(',')]
+            else:
+                users = [{'screen_name': name} for name in query['screen_name'][0].split(',')]
+            return 200, {}, json.dumps(users)
+        responses.add_callback(GET, DEFAULT_URL, callback=lookup)
+
+        user_ids = list(range(250))
+        screen_names = set('user%d' % i for i in range(150))
+        resp = self.api.UsersLookup(user_id=user_ids, screen_name=screen_names)
+        self.assertEqual(len(responses.calls), 5)
+        self.assertEqual([user.id for user in resp[:250]], user_ids)
+        self.assertEqual(set(user.screen_name for user in resp[250:]), screen_names)
+
+        resp = list(self.api.IterUsersLookup(user_id=user_ids, max_workers=3))
+        self.assertEqual(len(responses.calls), 8)
+        self.assertEqual(sorted(user.id for user in resp), user_ids)
+
+        self.assertRaises(twitter.TwitterError, lambda: self.api.UsersLookup())
+
+    @responses.activate
+    def testUsersLookupNoMatches(self):
+        def lookup(request):
+            ids = parse_qs(urlparse(request.url).query)['user_id'][0].split(',')
+            if int(ids[0]) >= 1000:
+                return 404, {}, json.dumps({'errors': [{'code': 17, 'message': 'No user matches for specified terms.'}]})
+            return 200, {}, json.dumps([{'id': int(i)} for i in ids])
+        responses.add_callback(GET, DEFAULT_URL, callback=lookup)
+
+        # The second of three lookups matches none of its users.
+        user_ids = list(range(100)) + list(range(1000, 1100)) + list(range(200, 250))
+        resp = self.api.UsersLookup(user_id=user_ids)
+        self.assertEqual(len(responses.calls), 3)
+        self.assertEqual([user.id for user in resp], list(range(100)) + list(range(200, 250)))
+
+        resp = list(self.api.IterUsersLookup(user_id=user_ids, max_workers=3))
+        self.assertEqual(sorted(user.id for user in resp), list(range(100)) + list(range(200, 250)))
+
+        # Other errors still fail the lookup.
+        responses.replace(GET, DEFAULT_URL, status=404,
+                          body=json.dumps({'errors': [{'code': 50, 'message': 'User not found.'}]}))
+        self.assertRaises(twitter.TwitterError, self.api.UsersLookup, user_id=user_ids)
+
     @responses.activate
     def testGetUser(self):
         with open('testdata/get_user.json') as f:
@@ -574,6 +785,111 @@ class ApiTest(unittest.TestCase):
         self.assertEqual(resp.screen_name, 'kesuke')
         self.assertEqual(resp.id, 718443)
 
+    @responses.activate
+    def testGetUserCoalesced(self):
+        with open('testdata/get_user.json') as f:
+            resp_data = f.read()
+
+        def user(request):
+            time.sleep(0.2)
+            return 200, {}, resp_data
+        responses.add_callback(GET, DEFAULT_URL, callback=user)
+
+        users = []
+        threads = [threading.Thread(target=lambda: users.append(self.api.GetUser(user_id=718443)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([u.id for u in users], [718443] * 4)
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual(self.api.coalesced_requests, 3)
+
+        self.api.GetUser(user_id=718443)
+        self.api.GetUser(user_id=718443, no_cache=True)
+        self.assertEqual(len(responses.calls), 3)
+        self.assertEqual(self.api.coalesced_requests, 3)
+
+    @responses.activate
+    def testGetUserCoalescedCache(self):
+        with open('testdata/get_user.json') as f:
+            responses.add(GET, DEFAULT_URL, body=f.read())
+        cache = twitter._MemoryCache()
+        cache_set = cache.Set
+        in_flight = []
+
+        def record(key, data):
+            in_flight.append(key in self.api._in_flight)
+            cache_set(key, data)
+        cache.Set = record
+        self.api.SetCache(cache)
+
+        # The response is cached before identical requests stop waiting for
+        # it, so none can slip in between and send it again.
+        self.api.GetUser(user_id=718443)
+        self.assertEqual(in_flight, [True])
+        self.api.GetUser(user_id=718443)
+        self.assertEqual(len(responses.calls), 1)
+
+    @staticmethod
+    def _Gzip(data):
+        out = io.BytesIO()
+        with gzip.GzipFile(fileobj=out, mode='wb') as f:
+            f.write(data.encode('utf-8'))
+        return out.getvalue()
+
+    @responses.activate
+    def testGzipCompression(self):
+        with open('testdata/get_user.json') as f:
+            resp_data = f.read()
+        responses.add(GET, DEFAULT_URL, body=self._Gzip(resp_data),
+                      headers={'Content-Encoding': 'gzip'})
+
+        resp = self.api.GetUser(user_id=718443)
+        self.assertEqual(resp.screen_name, 'kesuke')
+        self.assertEqual(responses.calls[0].request.headers['Accept-Encoding'], b'gzip, deflate')
+
+        api = twitter.Api(consumer_key='test',
+                          consumer_secret='test',
+                          access_token_key='test',
+                          access_token_secret='test',
+                          use_gzip_compression=False)
+        responses.replace(GET, DEFAULT_URL, body=resp_data)
+        resp = api.GetUser(user_id=718443)
+        self.assertEqual(resp.screen_name, 'kesuke')
+        self.assertEqual(responses.calls[1].request.headers['Accept-Encoding'], b'identity')
+
+    @responses.activate
+    def testGzipCompressedStream(self):
+        body = '{"text": "1"}\r\n\r\n{"text": "2"}\r\n'
+        responses.add(POST, 'https://stream.twitter.com/1.1/statuses/filter.json',
+                      body=self._Gzip(body), headers={'Content-Encoding': 'gzip'})
+        messages = list(self.api.GetStreamFilter(track=['python']))
+        self.assertEqual(messages, [{'text': '1'}, {'text': '2'}])
+        self.assertEqual(responses.calls[0].request.headers['Accept-Encoding'], b'gzip, deflate')
+
+    @responses.activate
+    def testConnectionPool(self):
+        api = twitter.Api(consumer_key='test',
+                          consumer_secret='test',
+                          access_token_key='test',
+                          access_token_secret='test',
+                          pool_maxsize=20,
+                          keep_alive=False)
+        self.assertEqual(api._session.get_adapter('https://api.twitter.com')._pool_maxsize, 20)
+
+        with open('testdata/get_user.json') as f:
+            responses.add(GET, DEFAULT_URL, body=f.read())
+        api.GetUser(user_id=718443)
+        self.assertEqual(responses.calls[0].request.headers['Connection'], b'close')
+
+        responses.add(POST, 'https://stream.twitter.com/1.1/statuses/filter.json',
+                      body='{"text": "1"}\r\n')
+        with patch('requests.Session') as session:
+            self.assertEqual(list(api.GetStreamFilter(track=['python'])), [{'text': '1'}])
+        self.assertFalse(session.called)
+
     @responses.activate
     def testGetFavorites(self):
         with open('testdata/get_favorites.json') as f:
@@ -1328,6 +1644,42 @@ class ApiTest(unittest.TestCase):
                 twitter.TwitterError,
                 lambda: self.api.GetStatuses(['test'], map=True))
 
+    @responses.activate
+    def testGetStatusesConcurrently(self):
+        lock = threading.Lock()
+        in_flight = []
+        max_in_flight = []
+
+        def lookup(request):
+            with lock:
+                in_flight.append(request)
+                max_in_flight.append(len(in_flight))
+            time.sleep(0.05)
+            query = parse_qs(urlparse(request.url).query)
+            ids = query['id'][0].split(',')
+            with lock:
+                in_flight.remove(request)
+            headers = {'x-rate-limit-limit': '900',
+                       'x-rate-limit-remaining': '2',
+                       'x-rate-limit-reset': '0'}
+            if query['map'] == ['True']:
+                return 200, headers, json.dumps({'id': dict((i, {'id': int(i)}) for i in ids)})
+            return 200, headers, json.dumps([{'id': int(i)} for i in ids])
+        responses.add_callback(GET, DEFAULT_URL, callback=lookup)
+
+        # A window that ran out but has since reset.
+        self.api.rate_limit.set_limit('/statuses/lookup.json', 900, 0, int(time.time()) - 60)
+        status_ids = list(range(1, 1001))
+        resp = self.api.GetStatuses(status_ids, max_workers=4)
+        self.assertEqual([status.id for status in resp], status_ids)
+        self.assertEqual(len(responses.calls), 10)
+        # The window has reset, so the batches are not capped at the stale
+        # remaining counts of 0 and 2.
+        self.assertTrue(2 < max(max_in_flight) <= 4)
+
+        resp = self.api.GetStatuses(status_ids[:150], map=True, max_workers=4)
+        self.assertEqual(sorted(resp), status_ids[:150])
+
     @responses.activate
     def testGetStatusOembed(self):
         with open('testdata/get_status_oembed.json') as f:
@@ -1847,3 +2199,12 @@ class ApiTest(unittest.TestCase):
             skip_status=True)
         assert resp
         assert isinstance(resp, twitter.User)
+
+    @responses.activate
+    def test_request_url_does_not_modify_data(self):
+        responses.add(GET, DEFAULT_URL, body='{}')
+        responses.add(POST, DEFAULT_URL, body='{}')
+        data = {'screen_name': 'test'}
+        self.api._RequestUrl(self.base_url + '/users/show.json', 'GET', data=data)
+        self.api._RequestUrl(self.base_url + '/friendships/create.json', 'POST', data=data)
+        self.assertEqual(data, {'screen_name': 'test'})
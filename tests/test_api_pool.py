@@ -0,0 +1,163 @@
+# encoding: utf-8
+import json
+import re
+import threading
+import time
+import unittest
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+import responses
+from responses import GET, POST
+
+import twitter
+
+DEFAULT_URL = re.compile(r'https?://.*\.twitter.com/1\.1/.*')
+
+
+class ApiPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.credentials = [
+            {'consumer_key': 'key%d' % i,
+             'consumer_secret': 'secret',
+             'access_token_key': 'token%d' % i,
+             'access_token_secret': 'secret'} for i in range(3)]
+        self.pool = twitter.ApiPool(self.credentials)
+        self.reset = str(int(time.time()) + 900)
+        self.remaining = {'key0': 5, 'key1': 50, 'key2': 20}
+        self.used = []
+        with open('testdata/get_user.json') as f:
+            self.user = f.read()
+
+    def _Respond(self, request):
+        key = re.search(r'oauth_consumer_key="(\w+)"',
+                        request.headers['Authorization'].decode('utf-8')).group(1)
+        self.used.append(key)
+        self.remaining[key] -= 1
+        headers = {'x-rate-limit-limit': '900',
+                   'x-rate-limit-remaining': str(max(self.remaining[key], 0)),
+                   'x-rate-limit-reset': self.reset}
+        if self.remaining[key] < 0:
+            return 429, headers, json.dumps({'errors': [{'code': 88, 'message': 'Rate limit exceeded'}]})
+        return 200, headers, self.user
+
+    @responses.activate
+    def testRouting(self):
+        responses.add_callback(GET, DEFAULT_URL, callback=self._Respond)
+        responses.add_callback(POST, DEFAULT_URL, callback=self._Respond)
+
+        # Credentials with unknown limits are tried in turn, until one has
+        # more requests left than the others.
+        for _ in range(5):
+            self.assertEqual(self.pool.GetUser(user_id=718443).screen_name, 'kesuke')
+        self.assertEqual(self.used, ['key0', 'key1', 'key1', 'key1', 'key1'])
+
+        self.used = []
+        self.pool.VerifyCredentials()
+        self.pool.PostUpdate('test')
+        self.assertEqual(self.used, ['key0', 'key0'])
+
+        stats = self.pool.Stats()
+        self.assertEqual([s['requests'] for s in stats], [3, 4, 0])
+        self.assertEqual(stats[1]['consumer_key'], 'key1')
+        self.assertEqual(stats[1]['resources']['users']['/users/show/:id']['remaining'], 46)
+
+    @responses.activate
+    def testFailover(self):
+        responses.add_callback(GET, DEFAULT_URL, callback=self._Respond)
+        self.remaining = {'key0': 0, 'key1': 0, 'key2': 1}
+
+        self.assertEqual(self.pool.GetUser(user_id=718443).screen_name, 'kesuke')
+        self.assertEqual(self.used, ['key0', 'key1', 'key2'])
+        self.assertEqual([s['rate_limited'] for s in self.pool.Stats()], [1, 1, 0])
+
+        self.assertRaises(twitter.TwitterError, self.pool.GetUser, user_id=718443)
+
+    def testRateLimitArgument(self):
+        self.assertRaises(twitter.TwitterError, twitter.ApiPool, [])
+        self.assertRaises(twitter.TwitterError, twitter.ApiPool,
+                          [{'consumer_key': 'key', 'consumer_secret': 'secret'}],
+                          rate_limit=twitter.ratelimit.RateLimit())
+
+    def testSchedulerPerCredentials(self):
+        scheduler = twitter.ratelimit.RateLimitScheduler(burst=3, margin=5)
+        pool = twitter.ApiPool(self.credentials, sleep_on_rate_limit=True,
+                               rate_limit_scheduler=scheduler)
+        schedulers = [api.rate_limit_scheduler for api in pool.apis]
+        self.assertTrue(schedulers[0] is scheduler)
+        self.assertEqual(len(set(id(s) for s in schedulers)), 3)
+        self.assertEqual([(s.burst, s.margin) for s in schedulers], [(3, 5)] * 3)
+
+        # Each credential is paced on its own.
+        limit = twitter.ratelimit.EndpointRateLimit(limit=180, remaining=1, reset=time.time() + 900)
+        url = 'https://api.twitter.com/1.1/search/tweets.json'
+        self.assertEqual([s.Reserve(url, limit) for s in schedulers], [0, 0, 0])
+
+    @responses.activate
+    def testGetStatusesBatches(self):
+        lock = threading.Lock()
+        in_flight = []
+        max_in_flight = []
+
+        def lookup(request):
+            with lock:
+                in_flight.append(request)
+                max_in_flight.append(len(in_flight))
+            time.sleep(0.05)
+            ids = re.search(r'id=([\d%C]+)', request.url).group(1).split('%2C')
+            with lock:
+                in_flight.remove(request)
+            headers = {'x-rate-limit-limit': '900',
+                       'x-rate-limit-remaining': '1',
+                       'x-rate-limit-reset': self.reset}
+            return 200, headers, json.dumps([{'id': int(i)} for i in ids])
+        responses.add_callback(GET, DEFAULT_URL, callback=lookup)
+        for api in self.pool.apis:
+            api.rate_limit.load({'resources': {'statuses': {'/statuses/lookup': {
+                'limit': 900, 'remaining': 1, 'reset': int(self.reset)}}}})
+
+        # One request left for each credentials makes batches of three.
+        self.assertEqual(self.pool._GetRemaining('https://api.twitter.com/1.1/statuses/lookup.json'), 3)
+        self.assertEqual(self.pool._GetRemaining('https://api.twitter.com/1.1/statuses/home_timeline.json'),
+                         self.pool.apis[0].rate_limit.get_limit('/statuses/home_timeline').limit)
+        status_ids = list(range(1, 601))
+        statuses = self.pool.GetStatuses(status_ids, max_workers=4)
+        self.assertEqual([status.id for status in statuses], status_ids)
+        self.assertEqual(len(responses.calls), 6)
+        self.assertTrue(1 < max(max_in_flight) <= 3)
+
+    @responses.activate
+    @patch('time.sleep')
+    def testFailoverRetryPolicy(self, sleep):
+        pool = twitter.ApiPool(self.credentials, retry_policy=twitter.RetryPolicy())
+        responses.add_callback(GET, DEFAULT_URL, callback=self._Respond)
+        self.remaining = {'key0': 0, 'key1': 1, 'key2': 0}
+
+        self.assertEqual(pool.GetUser(user_id=718443).screen_name, 'kesuke')
+        self.assertEqual(self.used, ['key0', 'key1'])
+        self.assertFalse(sleep.called)
+
+    @responses.activate
+    @patch('time.sleep')
+    def testFailoverRaiseOnRateLimit(self, sleep):
+        pool = twitter.ApiPool(self.credentials, raise_on_rate_limit=True)
+        reset = int(self.reset)
+        for api, remaining in zip(pool.apis, (0, 5, 5)):
+            api.rate_limit.load({'resources': {'users': {'/users/show/:id': {
+                'limit': 900, 'remaining': remaining, 'reset': reset}}}})
+        responses.add_callback(GET, DEFAULT_URL, callback=self._Respond)
+        self.remaining = {'key0': 0, 'key1': 0, 'key2': 1}
+
+        # key0 is known to be exhausted and ranked last, key1 answers 429.
+        self.assertEqual(pool.GetUser(user_id=718443).screen_name, 'kesuke')
+        self.assertEqual(self.used, ['key1', 'key2'])
+        self.assertEqual([s['rate_limited'] for s in pool.Stats()], [0, 1, 0])
+
+        # Every credential is now exhausted and raises before sending.
+        self.assertRaises(twitter.RateLimitExceeded, pool.GetUser, user_id=718443)
+        self.assertEqual(self.used, ['key1', 'key2'])
+        self.assertEqual([s['rate_limited'] for s in pool.Stats()], [1, 2, 1])
+        self.assertFalse(sleep.called)
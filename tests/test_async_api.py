@@ -0,0 +1,222 @@
+# encoding: utf-8
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+import twitter
+
+try:
+    import asyncio
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+except (ImportError, SyntaxError):
+    web = None
+
+
+def _fixture(name):
+    with open('testdata/%s' % name) as f:
+        return f.read()
+
+
+@unittest.skipIf(web is None or not hasattr(twitter, 'AsyncApi'),
+                 'AsyncApi requires Python 3 and aiohttp')
+class AsyncApiTest(unittest.TestCase):
+
+    def setUp(self):
+        self.requests = []
+        self.in_flight = self.max_in_flight = 0
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _Run(self, coroutine_function, **kwargs):
+        async def run():
+            app = web.Application()
+            app.router.add_route('*', '/{path:.*}', self._Handle)
+            server = TestServer(app)
+            await server.start_server()
+            api = twitter.AsyncApi(consumer_key='test',
+                                   consumer_secret='test',
+                                   access_token_key='test',
+                                   access_token_secret='test',
+                                   base_url=str(server.make_url('/1.1')),
+                                   stream_url=str(server.make_url('/stream')),
+                                   **kwargs)
+            try:
+                return await coroutine_function(api)
+            finally:
+                await api.Close()
+                await server.close()
+        return self.loop.run_until_complete(run())
+
+    async def _Handle(self, request):
+        self.requests.append(request)
+        headers = {'x-rate-limit-limit': '900',
+                   'x-rate-limit-remaining': '899',
+                   'x-rate-limit-reset': '1500000000'}
+        if request.path == '/1.1/statuses/user_timeline.json':
+            return web.Response(text=_fixture('get_user_timeline.json'), headers=headers)
+        if request.path == '/1.1/users/show.json' and len(self.requests) < 3:
+            return web.Response(status=503, text='<title>Twitter / Over capacity</title>',
+                                headers={'Retry-After': '0'})
+        if request.path == '/1.1/users/show.json':
+            return web.Response(text=_fixture('get_user.json'))
+        if request.path == '/1.1/statuses/lookup.json':
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            ids = request.query['id'].split(',')
+            return web.Response(text=json.dumps([{'id': int(i)} for i in ids]))
+        if request.path == '/1.1/users/lookup.json':
+            ids = request.query['user_id'].split(',')
+            if int(ids[0]) >= 1000:
+                return web.Response(status=404, text=json.dumps(
+                    {'errors': [{'code': 17, 'message': 'No user matches for specified terms.'}]}))
+            return web.Response(text=json.dumps([{'id': int(i)} for i in ids]))
+        if request.path == '/1.1/followers/ids.json':
+            cursor = request.query['cursor']
+            return web.Response(text=_fixture('get_follower_ids_%d.json' % (cursor != '-1')))
+        if request.path == '/1.1/friends/list.json':
+            return web.Response(status=429, headers={'x-rate-limit-limit': '15',
+                                                     'x-rate-limit-remaining': '0',
+                                                     'x-rate-limit-reset': str(int(time.time()) + 600)},
+                                text='{"errors": [{"code": 88, "message": "Rate limit exceeded"}]}')
+        if request.path == '/stream/statuses/filter.json':
+            body = (await request.post())['track']
+            return web.Response(text='{"text": "%s"}\r\n\r\n{"text": "2"}\r\n' % body)
+        return web.Response(status=404, text='{"errors": [{"code": 34, "message": "Not found"}]}')
+
+    def testGetUserTimeline(self):
+        statuses = self._Run(lambda api: api.GetUserTimeline(screen_name='kesuke'))
+        self.assertTrue(statuses)
+        self.assertTrue(isinstance(statuses[0], twitter.Status))
+        self.assertEqual(self.requests[0].query['screen_name'], 'kesuke')
+        self.assertTrue(self.requests[0].headers['Authorization'].startswith('OAuth '))
+
+    def testRateLimitBookkeeping(self):
+        async def timeline(api):
+            await api.GetUserTimeline(screen_name='kesuke')
+            return api.rate_limit.get_limit('/statuses/user_timeline')
+        limit = self._Run(timeline)
+        self.assertEqual(limit.remaining, 899)
+
+    def testBlockingCallsInExecutor(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        def record(threads, func):
+            def call(*args):
+                threads.append(threading.current_thread())
+                return func(*args)
+            return call
+
+        def run(rate_limit, cache):
+            threads = []
+
+            async def timeline(api):
+                api.rate_limit.load({'resources': {'statuses': {'/statuses/user_timeline': {
+                    'limit': 900, 'remaining': 900, 'reset': int(time.time()) + 900}}}})
+                api.rate_limit.reserve = record(threads, api.rate_limit.reserve)
+                api.rate_limit.release = record(threads, api.rate_limit.release)
+                api.api._cache.Set = record(threads, api.api._cache.Set)
+                await api.GetUserTimeline(screen_name='kesuke')
+            self._Run(timeline, sleep_on_rate_limit=True, rate_limit=rate_limit, cache=cache)
+            return threads
+
+        # SQLite is called in the executor, memory directly on the loop.
+        threads = run(twitter.ratelimit.SQLiteRateLimit(os.path.join(directory, 'rate_limit')),
+                      twitter._SQLiteCache(os.path.join(directory, 'cache')))
+        self.assertEqual(len(threads), 3)
+        self.assertFalse(threading.current_thread() in threads)
+
+        threads = run(twitter.ratelimit.RateLimit(), twitter._MemoryCache())
+        self.assertEqual(threads, [threading.current_thread()] * 3)
+
+    def testGetStatusesConcurrently(self):
+        status_ids = list(range(1, 251))
+        statuses = self._Run(lambda api: api.GetStatuses(status_ids))
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual([s.id for s in statuses], status_ids)
+        self.assertEqual(self.max_in_flight, 3)
+
+        # No more requests in flight than the rate limit has left.
+        async def lookup(api):
+            api.rate_limit.load({'resources': {'statuses': {'/statuses/lookup': {
+                'limit': 900, 'remaining': 1, 'reset': int(time.time()) + 900}}}})
+            return await api.GetStatuses(status_ids)
+        self.requests = []
+        self.max_in_flight = 0
+        statuses = self._Run(lookup)
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual([s.id for s in statuses], status_ids)
+        self.assertEqual(self.max_in_flight, 1)
+
+    def testUsersLookupNoMatches(self):
+        user_ids = list(range(100)) + list(range(1000, 1100)) + list(range(200, 250))
+        users = self._Run(lambda api: api.UsersLookup(user_id=user_ids))
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual([u.id for u in users], list(range(100)) + list(range(200, 250)))
+
+    def testGetFollowerIDs(self):
+        ids = self._Run(lambda api: api.GetFollowerIDs(screen_name='himawari8bot'))
+        self.assertEqual(len(self.requests), 2)
+        self.assertTrue(all(isinstance(i, int) for i in ids))
+
+    def testErrors(self):
+        self.assertRaises(twitter.TwitterError,
+                          lambda: self._Run(lambda api: api.GetFriendIDs(screen_name='kesuke')))
+
+    def testRetry(self):
+        self.assertRaises(twitter.TwitterError,
+                          lambda: self._Run(lambda api: api.GetUser(screen_name='kesuke')))
+        self.requests = []
+        policy = twitter.RetryPolicy()
+        user = self._Run(lambda api: api.GetUser(screen_name='kesuke'), retry_policy=policy)
+        self.assertEqual(user.screen_name, 'kesuke')
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual(policy.Stats()['retries'], 2)
+
+    def testRaiseOnRateLimit(self):
+        async def search(api):
+            api.rate_limit.load({'resources': {'statuses': {'/statuses/user_timeline': {
+                'limit': 900, 'remaining': 0, 'reset': int(time.time()) + 1}}}})
+            try:
+                await api.GetUserTimeline(screen_name='kesuke')
+            except twitter.RateLimitExceeded as e:
+                self.assertEqual(e.endpoint, '/statuses/user_timeline')
+                self.assertFalse(e.available.done())
+                e.available.cancel()
+                return e
+        error = self._Run(search, raise_on_rate_limit=True)
+        self.assertTrue(error.retry_after > 0)
+        self.assertEqual(self.requests, [])
+
+    def testRaiseOnRateLimitRetry(self):
+        async def friends(api):
+            api.rate_limit.load({'resources': {'friends': {'/friends/list': {
+                'limit': 15, 'remaining': 5, 'reset': int(time.time()) + 600}}}})
+            try:
+                await api.GetFriendsPaged(screen_name='kesuke')
+            except twitter.RateLimitExceeded as e:
+                self.assertFalse(e.available.done())
+                e.available.cancel()
+                return e
+        start = time.time()
+        error = self._Run(friends, raise_on_rate_limit=True, retry_policy=twitter.RetryPolicy())
+        self.assertEqual(error.endpoint, '/friends/list')
+        self.assertTrue(590 <= error.retry_after <= 600)
+        self.assertEqual(len(self.requests), 1)
+        self.assertTrue(time.time() - start < 5)
+
+    def testGetStreamFilter(self):
+        async def stream(api):
+            return [message async for message in api.GetStreamFilter(track=['python'])]
+        messages = self._Run(stream)
+        self.assertEqual(messages, [{'text': 'python'}, {'text': '2'}])
@@ -1,7 +1,15 @@
+import os
+import shutil
+import tempfile
 import twitter
 import unittest
 import time
 
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
 
 class FileCacheTest(unittest.TestCase):
     def testInit(self):
@@ -41,3 +49,71 @@ class FileCacheTest(unittest.TestCase):
         self.assertTrue(delta <= 1,
                         'Cached time differs from clock time by more than 1 second.')
         cache.Remove("foo")
+
+
+class FileCacheSweepTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = twitter._FileCache(self.directory)
+
+    def tearDown(self):
+        self.cache.Close()
+        shutil.rmtree(self.directory)
+
+    def _SetWithTime(self, key, data, timestamp):
+        self.cache.Set(key, data)
+        os.utime(self.cache._GetPath(key), (timestamp, timestamp))
+
+    def testStats(self):
+        """Test the twitter._FileCache.Stats method"""
+        self.cache.Set("foo", 'Hello World!')
+        self.cache.Set("bar", 'Hello')
+        self.assertEqual(self.cache.Stats(), {'entries': 2, 'bytes': 17})
+
+    def testSweepMaxAge(self):
+        now = time.time()
+        self.cache.max_age = 60
+        self._SetWithTime("foo", 'foo', now - 120)
+        self.cache.Set("bar", 'bar')
+        self.assertEqual(self.cache.Sweep(), 1)
+        self.assertEqual(self.cache.Get("foo"), None)
+        self.assertEqual(self.cache.Get("bar"), 'bar')
+
+    def testSweepMaxBytes(self):
+        now = time.time()
+        self.cache.max_bytes = 6
+        self._SetWithTime("foo", 'foo', now - 30)
+        self._SetWithTime("bar", 'bar', now - 20)
+        self._SetWithTime("baz", 'baz', now - 10)
+        self.assertEqual(self.cache.Sweep(), 1)
+        self.assertEqual(self.cache.Get("foo"), None)
+        self.assertEqual(self.cache.Stats(), {'entries': 2, 'bytes': 6})
+
+    def testBackgroundSweep(self):
+        cache = twitter._FileCache(self.directory, max_age=60, sweep_interval=0.01)
+        self._SetWithTime("foo", 'foo', time.time() - 120)
+        for _ in range(100):
+            if cache.Get("foo") is None:
+                break
+            time.sleep(0.01)
+        cache.Close()
+        self.assertEqual(cache.Get("foo"), None)
+
+    def testBackgroundSweepError(self):
+        calls = []
+
+        def sweep():
+            calls.append(None)
+            if len(calls) == 1:
+                raise OSError('disk error')
+
+        with self.assertLogs('twitter._file_cache', 'ERROR') as logs:
+            with patch.object(twitter._FileCache, 'Sweep', side_effect=sweep):
+                cache = twitter._FileCache(self.directory, sweep_interval=0.01)
+                for _ in range(100):
+                    if len(calls) > 1:
+                        break
+                    time.sleep(0.01)
+                cache.Close()
+        self.assertGreater(len(calls), 1)
+        self.assertIn('disk error', logs.output[0])
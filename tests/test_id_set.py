@@ -0,0 +1,56 @@
+# encoding: utf-8
+import unittest
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+from twitter import IDSet
+from twitter import id_set
+
+
+class IDSetTest(unittest.TestCase):
+
+    def testConstruct(self):
+        ids = IDSet([5, 3, 9, 3, 2 ** 62])
+        self.assertEqual(list(ids), [3, 5, 9, 2 ** 62])
+        self.assertEqual(len(ids), 4)
+        self.assertTrue(9 in ids)
+        self.assertFalse(4 in ids)
+        self.assertFalse(2 ** 63 - 1 in ids)
+        self.assertEqual(ids.ids.typecode, 'q')
+        self.assertEqual(IDSet(ids), ids)
+
+    def testFromPages(self):
+        ids = IDSet.FromPages(iter([[9, 1, 5], [], [4, 5, 2], [7]]))
+        self.assertEqual(list(ids), [1, 2, 4, 5, 7, 9])
+        self.assertEqual(list(IDSet.FromPages([[3, 1, 3]])), [1, 3])
+        self.assertEqual(len(IDSet.FromPages([])), 0)
+
+    def testSetOperations(self):
+        followers = IDSet(range(0, 20, 2))
+        friends = IDSet(range(0, 20, 3))
+        self.assertEqual(list(followers & friends), [0, 6, 12, 18])
+        self.assertEqual(list(friends - followers), [3, 9, 15])
+        self.assertEqual(list(followers | friends), sorted(set(range(0, 20, 2)) | set(range(0, 20, 3))))
+        self.assertEqual(list(followers.Intersection([4, 5, 100])), [4])
+        self.assertEqual(list(followers.Difference([])), list(followers))
+
+        # Lookups of a small set in a large one.
+        large = IDSet(range(100000))
+        self.assertEqual(list(IDSet([-1, 5, 99999, 100000]) & large), [5, 99999])
+        self.assertEqual(list(large & IDSet([7])), [7])
+
+    def testWithoutNumpy(self):
+        with patch('twitter.id_set.numpy', None):
+            self.testFromPages()
+            self.testSetOperations()
+            self.assertRaises(ImportError, IDSet([1]).ToNumpy)
+
+    @unittest.skipIf(id_set.numpy is None, 'requires numpy')
+    def testToNumpy(self):
+        ids = IDSet([3, 1, 2])
+        values = ids.ToNumpy()
+        self.assertEqual(values.tolist(), [1, 2, 3])
+        values[0] = 0
+        self.assertEqual(list(ids), [0, 2, 3])
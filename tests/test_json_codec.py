@@ -0,0 +1,76 @@
+# encoding: utf-8
+from __future__ import unicode_literals
+
+import json
+import re
+import unittest
+
+import responses
+
+import twitter
+from twitter.json_codec import FastCodec, JSONCodec, OrjsonCodec
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONCodecTest(unittest.TestCase):
+
+    def setUp(self):
+        with open('testdata/get_user_timeline.json', 'rb') as f:
+            self.data = f.read()
+
+    def testLoads(self):
+        codec = JSONCodec()
+        self.assertEqual(codec.loads(self.data), json.loads(self.data.decode('utf-8')))
+        self.assertEqual(codec.loads(self.data.decode('utf-8')), codec.loads(self.data))
+
+    def testDumps(self):
+        codec = JSONCodec()
+        self.assertEqual(codec.dumps({'b': 'é', 'a': 1}, sort_keys=True),
+                         '{"a": 1, "b": "\\u00e9"}')
+        self.assertEqual(codec.dumps({'b': 'é'}, ensure_ascii=False), '{"b": "é"}')
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def testOrjsonCodec(self):
+        codec = OrjsonCodec()
+        self.assertEqual(codec.loads(self.data), JSONCodec().loads(self.data))
+        self.assertRaises(ValueError, codec.loads, b'<html></html>')
+
+        obj = {'b': 'é \U0001f600', 'a': [1, None, True]}
+        data = codec.dumps(obj, sort_keys=True)
+        self.assertEqual(data, '{"a":[1,null,true],"b":"\\u00e9 \\ud83d\\ude00"}')
+        self.assertEqual(json.loads(data), obj)
+        self.assertEqual(json.loads(codec.dumps(obj, ensure_ascii=False)), obj)
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def testFastCodec(self):
+        self.assertTrue(isinstance(FastCodec(), OrjsonCodec))
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    @responses.activate
+    def testApiCodec(self):
+        responses.add(responses.GET, re.compile(r'.*'), body=self.data)
+        api = twitter.Api(consumer_key='test',
+                          consumer_secret='test',
+                          access_token_key='test',
+                          access_token_secret='test',
+                          json_codec=OrjsonCodec())
+        statuses = api.GetUserTimeline(screen_name='kesuke')
+        self.assertEqual(statuses[0].id, JSONCodec().loads(self.data)[0]['id'])
+
+        responses.replace(responses.GET, re.compile(r'.*'),
+                          body='<title>Twitter / Over capacity</title>')
+        self.assertRaises(twitter.TwitterError, api.GetUserTimeline, screen_name='kesuke')
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def testModelCodec(self):
+        status = twitter.Status.NewFromJsonDict(JSONCodec().loads(self.data)[0])
+        try:
+            twitter.models.TwitterModel.json_codec = OrjsonCodec()
+            data = status.AsJsonString()
+        finally:
+            twitter.models.TwitterModel.json_codec = JSONCodec()
+        self.assertEqual(json.loads(data), json.loads(status.AsJsonString()))
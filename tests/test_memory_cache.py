@@ -0,0 +1,89 @@
+import re
+import twitter
+import unittest
+import time
+
+import responses
+from responses import GET
+
+
+class MemoryCacheTest(unittest.TestCase):
+    def testGet(self):
+        """Test the twitter._MemoryCache.Get method"""
+        cache = twitter._MemoryCache()
+        cache.Set("foo", 'Hello World!')
+        self.assertEqual('Hello World!', cache.Get("foo"))
+        self.assertEqual(None, cache.Get("bar"))
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+    def testRemove(self):
+        """Test the twitter._MemoryCache.Remove method"""
+        cache = twitter._MemoryCache()
+        cache.Set("foo", 'Hello World!')
+        cache.Remove("foo")
+        self.assertEqual(cache.Get("foo"), None)
+        self.assertEqual(cache.Stats()['bytes'], 0)
+
+    def testGetCachedTime(self):
+        """Test the twitter._MemoryCache.GetCachedTime method"""
+        now = time.time()
+        cache = twitter._MemoryCache()
+        cache.Set("foo", 'Hello World!')
+        self.assertTrue(cache.GetCachedTime("foo") - now <= 1)
+        self.assertEqual(cache.GetCachedTime("bar"), None)
+
+    def testEvictByEntries(self):
+        cache = twitter._MemoryCache(max_entries=2)
+        cache.Set("foo", 'foo')
+        cache.Set("bar", 'bar')
+        cache.Get("foo")
+        cache.Set("baz", 'baz')
+        self.assertEqual(cache.Get("bar"), None)
+        self.assertEqual(cache.Get("foo"), 'foo')
+        self.assertEqual(cache.Get("baz"), 'baz')
+        self.assertEqual(cache.evictions, 1)
+
+    def testEvictByBytes(self):
+        cache = twitter._MemoryCache(max_bytes=10)
+        cache.Set("foo", '12345')
+        cache.Set("bar", u'éé')
+        cache.Set("baz", '123')
+        self.assertEqual(cache.Get("foo"), None)
+        self.assertEqual(cache.Stats()['bytes'], 7)
+        self.assertEqual(cache.evictions, 1)
+
+        cache.Set("big", '12345678901')
+        self.assertEqual(cache.Get("big"), None)
+        self.assertEqual(cache.Stats()['entries'], 2)
+
+    def testApiCache(self):
+        cache = twitter._MemoryCache()
+        api = twitter.Api(cache=cache)
+        self.assertTrue(api._cache is cache)
+
+    @responses.activate
+    def testApiCacheStale(self):
+        with open('testdata/get_user.json') as f:
+            responses.add(GET, re.compile(r'https?://api\.twitter\.com/1\.1/users/show\.json.*'),
+                          body=f.read())
+        cache = twitter._MemoryCache()
+        api = twitter.Api(consumer_key='test',
+                          consumer_secret='test',
+                          access_token_key='test',
+                          access_token_secret='test',
+                          cache=cache)
+        api.SetCacheTimeout(60)
+        api.GetUser(user_id=718443)
+        api.GetUser(user_id=718443)
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # An entry too old to be used is a miss.
+        for key, (data, cached_time, size) in list(cache._entries.items()):
+            cache._entries[key] = (data, cached_time - 120, size)
+        api.GetUser(user_id=718443)
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        api.GetUser(user_id=718443)
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
@@ -1,10 +1,22 @@
 # encoding: utf-8
 
+import copy
+import json
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import threading
 import time
 import re
 import sys
 import unittest
 import warnings
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
 
 import twitter
 import responses
@@ -13,6 +25,14 @@ from responses import GET, POST
 warnings.filterwarnings('ignore', category=DeprecationWarning)
 DEFAULT_URL = re.compile(r'https?://.*\.twitter.com/1\.1/.*')
 
+SEARCH_URL = 'https://api.twitter.com/1.1/search/tweets.json'
+
+
+def _reserve(path):
+    rate_limit = twitter.ratelimit.SQLiteRateLimit(path)
+    return sum(rate_limit.reserve(SEARCH_URL) for _ in range(50))
+
+
 HEADERS = {'x-rate-limit-limit': '63',
            'x-rate-limit-remaining': '63',
            'x-rate-limit-reset': '626672700'}
@@ -260,3 +280,377 @@ class RateLimitMethodsTests(unittest.TestCase):
         resp = api.GetSearch(term='test')
         self.assertTrue(api.rate_limit)
         self.assertEqual(resp, [])
+
+
+class RateLimitResourceTests(unittest.TestCase):
+    """ Tests for resolving urls to rate limit resources """
+
+    def testUrlToResource(self):
+        url_to_resource = twitter.ratelimit.RateLimit.url_to_resource
+        for url, resource in [
+                ('https://api.twitter.com/1.1/statuses/lookup.json?id=317', '/statuses/lookup'),
+                ('https://api.twitter.com/1.1/statuses/lookup.json?id=318', '/statuses/lookup'),
+                ('https://api.twitter.com/1.1/statuses/show.json?id=1', '/statuses/show/:id'),
+                ('https://api.twitter.com/1.1/users/suggestions/music.json', '/users/suggestions/:slug'),
+                ('https://api.twitter.com/1.1/users/suggestions/music/members.json',
+                 '/users/suggestions/:slug/members'),
+                ('https://api.twitter.com/1.1/geo/id/312.json', '/geo/id/:place_id'),
+                ('/search/tweets', '/search/tweets')]:
+            self.assertEqual(url_to_resource(url), resource)
+            self.assertEqual(url_to_resource(url), resource)
+
+
+class RateLimitThreadingTests(unittest.TestCase):
+    """ Tests for sharing a RateLimit object between threads """
+
+    def testConcurrentSetLimit(self):
+        rate_limit = twitter.ratelimit.RateLimit()
+
+        def set_limits(family):
+            for i in range(200):
+                rate_limit.set_limit(
+                    url='https://api.twitter.com/1.1/{0}/endpoint{1}.json'.format(family, i % 10),
+                    limit=15,
+                    remaining=i,
+                    reset=100)
+
+        threads = [threading.Thread(target=set_limits, args=('family%d' % (i % 4),))
+                   for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(rate_limit.resources), 4)
+        for family in rate_limit.resources.values():
+            self.assertEqual(len(family), 10)
+
+    @responses.activate
+    def testInitializeRateLimitKeepsSleepSetting(self):
+        api = twitter.Api(
+            consumer_key='test',
+            consumer_secret='test',
+            access_token_key='test',
+            access_token_secret='test',
+            sleep_on_rate_limit=True)
+        with open('testdata/ratelimit.json') as f:
+            resp_data = f.read()
+        responses.add(GET, DEFAULT_URL, body=resp_data)
+
+        def check():
+            api.CheckRateLimit('https://api.twitter.com/1.1/help/privacy.json')
+
+        threads = [threading.Thread(target=check) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(api.sleep_on_rate_limit)
+        self.assertEqual(len(responses.calls), 1)
+
+
+class RateLimitSchedulerTests(unittest.TestCase):
+    """ Tests for twitter.ratelimit.RateLimitScheduler """
+
+    url = 'https://api.twitter.com/1.1/search/tweets.json'
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = patch('time.time', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def testSpreadsRemainingQuota(self):
+        scheduler = twitter.ratelimit.RateLimitScheduler()
+        limit = twitter.ratelimit.EndpointRateLimit(limit=180, remaining=100, reset=1900)
+        waits = [scheduler.Reserve(self.url, limit) for _ in range(4)]
+        self.assertEqual(waits, [0, 9, 18, 27])
+
+        # Other endpoints are paced separately.
+        self.assertEqual(scheduler.Reserve('https://api.twitter.com/1.1/users/show.json', limit), 0)
+
+        self.now += 36
+        self.assertEqual(scheduler.EstimateWait(self.url, limit), 0)
+
+    def testBurst(self):
+        scheduler = twitter.ratelimit.RateLimitScheduler(burst=3)
+        limit = twitter.ratelimit.EndpointRateLimit(limit=180, remaining=100, reset=1900)
+        waits = [scheduler.Reserve(self.url, limit) for _ in range(4)]
+        self.assertEqual(waits, [0, 0, 0, 9])
+
+    def testLimitReached(self):
+        scheduler = twitter.ratelimit.RateLimitScheduler(margin=5)
+        limit = twitter.ratelimit.EndpointRateLimit(limit=180, remaining=0, reset=1100)
+        self.assertEqual(scheduler.EstimateWait(self.url, limit), 105)
+
+        limit = twitter.ratelimit.EndpointRateLimit(limit=180, remaining=0, reset=900)
+        self.assertEqual(scheduler.Reserve(self.url, limit), 0)
+
+    @patch('time.sleep')
+    def testAcquire(self, sleep):
+        scheduler = twitter.ratelimit.RateLimitScheduler()
+        limit = twitter.ratelimit.EndpointRateLimit(limit=180, remaining=100, reset=1900)
+        self.assertTrue(scheduler.Acquire(self.url, limit))
+        self.assertFalse(scheduler.Acquire(self.url, limit, blocking=False))
+        self.assertFalse(scheduler.Acquire(self.url, limit, timeout=5))
+        self.assertTrue(scheduler.Acquire(self.url, limit))
+        sleep.assert_called_once_with(9)
+
+    @responses.activate
+    @patch('time.sleep')
+    def testApiScheduler(self, sleep):
+        api = twitter.Api(
+            consumer_key='test',
+            consumer_secret='test',
+            access_token_key='test',
+            access_token_secret='test',
+            sleep_on_rate_limit=True,
+            rate_limit_scheduler=twitter.ratelimit.RateLimitScheduler())
+        responses.add(
+            GET, re.compile(r'.*/application/rate_limit_status\.json.*'),
+            body='{"resources": {"search": {"/search/tweets": {"limit": 180, "remaining": 10, "reset": 1100}}}}')
+        responses.add(GET, re.compile(r'.*/search/tweets\.json.*'), body='{}',
+                      adding_headers={'x-rate-limit-limit': '180',
+                                      'x-rate-limit-remaining': '10',
+                                      'x-rate-limit-reset': '1100'})
+
+        api.GetSearch(term='test')
+        api.GetSearch(term='test')
+        sleep.assert_called_once_with(10)
+
+
+class SQLiteRateLimitTests(unittest.TestCase):
+    """ Tests for twitter.ratelimit.SQLiteRateLimit """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'rate_limit.sqlite')
+        self.reset = int(time.time()) + 900
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testSharedReservations(self):
+        rate_limit = twitter.ratelimit.SQLiteRateLimit(self.path)
+        other = twitter.ratelimit.SQLiteRateLimit(self.path)
+        rate_limit.set_limit(SEARCH_URL, 180, 2, self.reset)
+
+        self.assertTrue(rate_limit.reserve(SEARCH_URL))
+        self.assertTrue(other.reserve(SEARCH_URL))
+        self.assertFalse(rate_limit.reserve(SEARCH_URL))
+        self.assertEqual(other.get_limit(SEARCH_URL).remaining, 0)
+
+        other.set_limit(SEARCH_URL, 180, 1, self.reset)
+        other.release(SEARCH_URL)
+        self.assertEqual(rate_limit.get_limit(SEARCH_URL).remaining, 0)
+
+    def testMerge(self):
+        rate_limit = twitter.ratelimit.SQLiteRateLimit(self.path)
+        rate_limit.set_limit(SEARCH_URL, 180, 10, self.reset)
+        rate_limit.set_limit(SEARCH_URL, 180, 12, self.reset)
+        self.assertEqual(rate_limit.get_limit(SEARCH_URL).remaining, 10)
+
+        # Headers from a window that is over, or no headers at all.
+        rate_limit.set_limit(SEARCH_URL, 180, 170, int(time.time()) - 1)
+        rate_limit.set_limit(SEARCH_URL, 0, 0, 0)
+        self.assertEqual(rate_limit.get_limit(SEARCH_URL).remaining, 10)
+
+        rate_limit.reserve(SEARCH_URL)
+        rate_limit.set_limit(SEARCH_URL, 180, 179, self.reset + 900)
+        self.assertEqual(rate_limit.get_limit(SEARCH_URL),
+                         twitter.ratelimit.EndpointRateLimit(180, 179, self.reset + 900))
+
+    def testWindowOver(self):
+        rate_limit = twitter.ratelimit.SQLiteRateLimit(self.path)
+        rate_limit.load({'resources': {'search': {'/search/tweets': {
+            'limit': 2, 'remaining': 0, 'reset': self.reset}}}})
+        self.assertTrue(rate_limit.is_loaded())
+        self.assertFalse(rate_limit.reserve(SEARCH_URL))
+
+        rate_limit._GetConnection().execute('UPDATE rate_limits SET reset = 1')
+        self.assertTrue(rate_limit.reserve(SEARCH_URL))
+        self.assertTrue(rate_limit.reserve(SEARCH_URL))
+        self.assertFalse(rate_limit.reserve(SEARCH_URL))
+
+    def testProcesses(self):
+        rate_limit = twitter.ratelimit.SQLiteRateLimit(self.path)
+        rate_limit.set_limit(SEARCH_URL, 180, 100, self.reset)
+        pool = multiprocessing.Pool(4)
+        try:
+            reserved = pool.map(_reserve, [self.path] * 4)
+        finally:
+            pool.close()
+            pool.join()
+        self.assertEqual(sum(reserved), 100)
+
+    @responses.activate
+    def testApi(self):
+        api = twitter.Api(
+            consumer_key='test',
+            consumer_secret='test',
+            access_token_key='test',
+            access_token_secret='test',
+            sleep_on_rate_limit=True,
+            rate_limit=twitter.ratelimit.SQLiteRateLimit(self.path))
+        responses.add(
+            GET, re.compile(r'.*/application/rate_limit_status\.json.*'),
+            body='{"resources": {"search": {"/search/tweets": {"limit": 180, "remaining": 10, "reset": %d}}}}' % self.reset)
+        responses.add(GET, re.compile(r'.*/search/tweets\.json.*'), body='{}',
+                      adding_headers={'x-rate-limit-limit': '180',
+                                      'x-rate-limit-remaining': '9',
+                                      'x-rate-limit-reset': str(self.reset)})
+
+        api.GetSearch(term='test')
+        other = twitter.ratelimit.SQLiteRateLimit(self.path)
+        self.assertEqual(other.get_limit(SEARCH_URL).remaining, 9)
+
+    def testApiWithoutReservations(self):
+        for kwargs, warned in (({}, True),
+                               ({'sleep_on_rate_limit': True}, False),
+                               ({'raise_on_rate_limit': True}, False)):
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always')
+                twitter.Api(rate_limit=twitter.ratelimit.SQLiteRateLimit(self.path), **kwargs)
+            self.assertEqual(any('SQLiteRateLimit' in str(w.message) for w in caught), warned)
+
+    def testSave(self):
+        rate_limit = twitter.ratelimit.SQLiteRateLimit(self.path)
+        rate_limit.set_limit(SEARCH_URL, 180, 10, self.reset)
+        rate_limit.reserve(SEARCH_URL)
+        path = os.path.join(self.directory, 'rate_limit.json')
+        rate_limit.save(path)
+
+        restored = twitter.ratelimit.RateLimit()
+        self.assertTrue(restored.restore(path))
+        self.assertEqual(restored.get_limit(SEARCH_URL),
+                         twitter.ratelimit.EndpointRateLimit(180, 10, self.reset))
+
+
+class RateLimitSnapshotTests(unittest.TestCase):
+    """ Tests for saving and restoring rate limits """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'rate_limit.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @responses.activate
+    def testSaveRestore(self):
+        reset = int(time.time()) + 900
+        rate_limit = twitter.ratelimit.RateLimit()
+        rate_limit.set_limit(SEARCH_URL, 180, 10, reset)
+        rate_limit.set_limit('https://api.twitter.com/1.1/users/show.json', 900, 3, 1)
+        rate_limit.save(self.path)
+
+        api = twitter.Api(
+            consumer_key='test',
+            consumer_secret='test',
+            access_token_key='test',
+            access_token_secret='test')
+        self.assertTrue(api.rate_limit.restore(self.path))
+        # No request is made to application/rate_limit_status.
+        self.assertEqual(api.CheckRateLimit(SEARCH_URL),
+                         twitter.ratelimit.EndpointRateLimit(180, 10, reset))
+        self.assertEqual(api.CheckRateLimit('https://api.twitter.com/1.1/users/show.json'),
+                         twitter.ratelimit.EndpointRateLimit(900, 900, 1))
+        self.assertEqual(os.listdir(self.directory), ['rate_limit.json'])
+
+    def testRestoreMissing(self):
+        rate_limit = twitter.ratelimit.RateLimit()
+        self.assertFalse(rate_limit.restore(self.path))
+        with open(self.path, 'w') as f:
+            f.write('{')
+        self.assertFalse(rate_limit.restore(self.path))
+        self.assertFalse(rate_limit.is_loaded())
+
+    def testRestoreMalformed(self):
+        rate_limit = twitter.ratelimit.RateLimit()
+        rate_limit.set_limit(SEARCH_URL, 180, 10, 1)
+        for data in ({'resources': []},
+                     {'resources': {'search': {'/search/tweets': {'limit': 180}}}},
+                     {'resources': {'search': {'/search/tweets': {'limit': 180, 'reset': None}}}},
+                     {'resources': {'search': {'/search/tweets': 180}}}):
+            with open(self.path, 'w') as f:
+                json.dump(data, f)
+            self.assertFalse(rate_limit.restore(self.path))
+            self.assertEqual(rate_limit.get_limit(SEARCH_URL),
+                             twitter.ratelimit.EndpointRateLimit(180, 10, 1))
+
+
+class RateLimitExceededTests(unittest.TestCase):
+    """ Tests for Api(raise_on_rate_limit=True) """
+
+    def setUp(self):
+        self.api = twitter.Api(
+            consumer_key='test',
+            consumer_secret='test',
+            access_token_key='test',
+            access_token_secret='test',
+            raise_on_rate_limit=True)
+        self.reset = int(time.time()) + 300
+        patcher = patch('time.sleep', side_effect=self.fail)
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @responses.activate
+    def testRaise(self):
+        self.api.rate_limit.load({'resources': {'search': {'/search/tweets': {
+            'limit': 180, 'remaining': 0, 'reset': self.reset}}}})
+        try:
+            self.api.GetSearch(term='test')
+        except twitter.RateLimitExceeded as e:
+            self.assertEqual(e.endpoint, '/search/tweets')
+            self.assertEqual(e.reset, self.reset)
+            self.assertTrue(300 <= e.retry_after <= 310)
+            self.assertTrue(isinstance(e, twitter.TwitterError))
+        else:
+            self.fail('RateLimitExceeded not raised')
+        self.assertEqual(len(responses.calls), 0)
+
+    def testPickle(self):
+        error = twitter.RateLimitExceeded('/search/tweets', self.reset, 300)
+        for copied in (pickle.loads(pickle.dumps(error)), copy.copy(error), copy.deepcopy(error)):
+            self.assertTrue(isinstance(copied, twitter.RateLimitExceeded))
+            self.assertEqual((copied.endpoint, copied.reset, copied.retry_after),
+                             ('/search/tweets', self.reset, 300))
+            self.assertEqual(copied.message, error.message)
+
+    @responses.activate
+    def testScheduler(self):
+        self.api.rate_limit_scheduler = twitter.ratelimit.RateLimitScheduler()
+        self.api.rate_limit.load({'resources': {'search': {'/search/tweets': {
+            'limit': 180, 'remaining': 10, 'reset': self.reset}}}})
+        responses.add(GET, DEFAULT_URL, body='{}', headers={
+            'x-rate-limit-limit': '180',
+            'x-rate-limit-remaining': '9',
+            'x-rate-limit-reset': str(self.reset)})
+
+        self.api.GetSearch(term='test')
+        self.assertRaises(twitter.RateLimitExceeded, self.api.GetSearch, term='test')
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def testRetryPolicy(self):
+        self.api.retry_policy = twitter.RetryPolicy()
+        self.api.rate_limit.load({'resources': {'search': {'/search/tweets': {
+            'limit': 180, 'remaining': 5, 'reset': self.reset}}}})
+        responses.add(GET, DEFAULT_URL, status=429, headers={
+            'x-rate-limit-limit': '180',
+            'x-rate-limit-remaining': '0',
+            'x-rate-limit-reset': str(self.reset)},
+            body='{"errors": [{"code": 88, "message": "Rate limit exceeded"}]}')
+
+        try:
+            self.api.GetSearch(term='test')
+        except twitter.RateLimitExceeded as e:
+            self.assertEqual(e.endpoint, '/search/tweets')
+            self.assertEqual(e.reset, self.reset)
+            self.assertTrue(290 <= e.retry_after <= 300)
+        else:
+            self.fail('RateLimitExceeded not raised')
+        self.assertEqual(len(responses.calls), 1)
+        self.assertFalse(self.sleep.called)
+        self.assertEqual(self.api.rate_limit.get_limit(SEARCH_URL).remaining, 0)
@@ -0,0 +1,94 @@
+# encoding: utf-8
+import shutil
+import tempfile
+import unittest
+
+import responses
+from responses import GET
+
+import twitter
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.api = twitter.Api(
+            consumer_key='test',
+            consumer_secret='test',
+            access_token_key='test',
+            access_token_secret='test',
+            cache=twitter._FileCache(self.cache_dir))
+        self.base_url = 'https://api.twitter.com/1.1'
+        with open('testdata/get_user.json') as f:
+            self.user_data = f.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    @responses.activate
+    def testCachedGet(self):
+        responses.add(GET, self.base_url + '/users/show.json', body=self.user_data)
+        user = self.api.GetUser(screen_name='kesuke')
+        cached_user = self.api.GetUser(screen_name='kesuke')
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual(user, cached_user)
+
+    @responses.activate
+    def testCacheKeyIgnoresParameterOrder(self):
+        url = self.base_url + '/users/show.json'
+        responses.add(GET, url, body=self.user_data)
+        self.api._RequestUrl(url, 'GET', data={'screen_name': 'kesuke', 'include_entities': True})
+        self.api._RequestUrl(url, 'GET', data={'include_entities': True, 'screen_name': 'kesuke'})
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def testCacheKeyIncludesCredentials(self):
+        responses.add(GET, self.base_url + '/users/show.json', body=self.user_data)
+        self.api.GetUser(screen_name='kesuke')
+        self.api.SetCredentials('test', 'test', 'other', 'other')
+        self.api.GetUser(screen_name='kesuke')
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def testNoCache(self):
+        responses.add(GET, self.base_url + '/users/show.json', body=self.user_data)
+        self.api.GetUser(screen_name='kesuke')
+        self.api.GetUser(screen_name='kesuke', no_cache=True)
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def testErrorsAreNotCached(self):
+        responses.add(GET, self.base_url + '/users/show.json',
+                      body='{"errors": [{"code": 50, "message": "User not found."}]}',
+                      status=404)
+        responses.add(GET, self.base_url + '/users/show.json', body=self.user_data)
+        self.assertRaises(twitter.TwitterError,
+                          lambda: self.api.GetUser(screen_name='kesuke'))
+        self.api.GetUser(screen_name='kesuke')
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def testCacheTimeout(self):
+        responses.add(GET, self.base_url + '/users/show.json', body=self.user_data)
+        self.api.SetCacheTimeout(0)
+        self.api.GetUser(screen_name='kesuke')
+        self.api.GetUser(screen_name='kesuke')
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def testEndpointCacheTimeout(self):
+        responses.add(GET, self.base_url + '/users/show.json', body=self.user_data)
+        self.api.SetCacheTimeout(0)
+        self.api.SetCacheTimeout(300, endpoint='/users/show/:id')
+        self.api.GetUser(screen_name='kesuke')
+        self.api.GetUser(screen_name='kesuke')
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def testNoCacheByDefault(self):
+        api = twitter.Api('test', 'test', 'test', 'test')
+        responses.add(GET, self.base_url + '/users/show.json', body=self.user_data)
+        api.GetUser(screen_name='kesuke')
+        api.GetUser(screen_name='kesuke')
+        self.assertEqual(len(responses.calls), 2)
@@ -0,0 +1,99 @@
+# encoding: utf-8
+import re
+import time
+import unittest
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+import requests
+import responses
+from responses import GET, POST
+
+import twitter
+
+DEFAULT_URL = re.compile(r'https?://.*\.twitter.com/1\.1/.*')
+
+
+class RetryPolicyTest(unittest.TestCase):
+
+    def testRetryStatuses(self):
+        policy = twitter.RetryPolicy(backoff_base=1, backoff_cap=3)
+        self.assertEqual(policy.GetDelay('GET', 1, 200), None)
+        self.assertEqual(policy.GetDelay('GET', 1, 404), None)
+        for attempt in (1, 2, 3):
+            delay = policy.GetDelay('GET', attempt, 503)
+            self.assertTrue(0 <= delay <= min(3, 2 ** (attempt - 1)))
+        self.assertEqual(policy.GetDelay('GET', 4, 503), None)
+        self.assertTrue(policy.GetDelay('GET', 1, error=requests.ConnectionError()) is not None)
+
+    def testIdempotentOnly(self):
+        policy = twitter.RetryPolicy()
+        self.assertEqual(policy.GetDelay('POST', 1, 503), None)
+        policy = twitter.RetryPolicy(methods=('GET', 'POST'))
+        self.assertTrue(policy.GetDelay('POST', 1, 503) is not None)
+
+    def testServerDelay(self):
+        policy = twitter.RetryPolicy(max_delay=120)
+        self.assertEqual(policy.GetDelay('GET', 1, 503, {'retry-after': '7'}), 7)
+        delay = policy.GetDelay('GET', 1, 429, {'x-rate-limit-reset': str(int(time.time()) + 60)})
+        self.assertTrue(58 <= delay <= 60)
+        self.assertEqual(policy.GetDelay('GET', 1, 503, {'retry-after': '600'}), None)
+
+    def testBudget(self):
+        policy = twitter.RetryPolicy(retry_budget=2, budget_ratio=0.5)
+        self.assertTrue(policy.GetDelay('GET', 1, 503) is not None)
+        self.assertTrue(policy.GetDelay('GET', 1, 503) is not None)
+        self.assertEqual(policy.GetDelay('GET', 1, 503), None)
+        self.assertEqual(policy.Stats()['budget_exhausted'], 1)
+
+        policy.Record('url', 'GET', 1, 200)
+        policy.Record('url', 'GET', 1, 200)
+        self.assertTrue(policy.GetDelay('GET', 1, 503) is not None)
+
+
+class ApiRetryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.attempts = []
+        self.policy = twitter.RetryPolicy(on_attempt=self.attempts.append)
+        self.api = twitter.Api(consumer_key='test',
+                               consumer_secret='test',
+                               access_token_key='test',
+                               access_token_secret='test',
+                               retry_policy=self.policy)
+
+    @responses.activate
+    @patch('time.sleep')
+    def testRetryGet(self, sleep):
+        with open('testdata/get_user.json') as f:
+            resp_data = f.read()
+        responses.add(GET, DEFAULT_URL, status=503, body='<title>Twitter / Over capacity</title>',
+                      headers={'Retry-After': '2'})
+        responses.add(GET, DEFAULT_URL, body=requests.ConnectionError())
+        responses.add(GET, DEFAULT_URL, body=resp_data)
+
+        user = self.api.GetUser(user_id=718443)
+        self.assertEqual(user.screen_name, 'kesuke')
+        self.assertEqual(len(responses.calls), 3)
+        self.assertEqual(sleep.call_args_list[0][0][0], 2)
+        self.assertEqual([a['status'] for a in self.attempts], [503, None, 200])
+        self.assertEqual(self.attempts[-1]['delay'], None)
+        self.assertEqual(self.policy.Stats()['retries'], 2)
+
+    @responses.activate
+    @patch('time.sleep')
+    def testGiveUp(self, sleep):
+        responses.add(GET, DEFAULT_URL, status=503, body='<title>Twitter / Over capacity</title>')
+        self.assertRaises(twitter.TwitterError, self.api.GetUser, user_id=718443)
+        self.assertEqual(len(responses.calls), 4)
+        self.assertEqual(self.policy.Stats()['failures'], 1)
+
+    @responses.activate
+    @patch('time.sleep')
+    def testPostNotRetried(self, sleep):
+        responses.add(POST, DEFAULT_URL, status=503, body='<title>Twitter / Over capacity</title>')
+        self.assertRaises(twitter.TwitterError, self.api.PostUpdate, 'test')
+        self.assertEqual(len(responses.calls), 1)
+        self.assertFalse(sleep.called)
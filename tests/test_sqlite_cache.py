@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import twitter
+
+
+class SQLiteCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testGet(self):
+        """Test the twitter._SQLiteCache.Get method"""
+        cache = twitter._SQLiteCache(self.path)
+        cache.Set("foo", 'Hello World!')
+        self.assertEqual('Hello World!', cache.Get("foo"))
+        self.assertEqual(None, cache.Get("bar"))
+
+    def testRemove(self):
+        """Test the twitter._SQLiteCache.Remove method"""
+        cache = twitter._SQLiteCache(self.path)
+        cache.Set("foo", 'Hello World!')
+        cache.Remove("foo")
+        self.assertEqual(cache.Get("foo"), None)
+
+    def testGetCachedTime(self):
+        """Test the twitter._SQLiteCache.GetCachedTime method"""
+        now = time.time()
+        cache = twitter._SQLiteCache(self.path)
+        cache.Set("foo", 'Hello World!')
+        self.assertTrue(cache.GetCachedTime("foo") - now <= 1)
+        self.assertEqual(cache.GetCachedTime("bar"), None)
+
+    def testSharedFile(self):
+        cache = twitter._SQLiteCache(self.path)
+        other = twitter._SQLiteCache(self.path)
+        cache.Set("foo", 'Hello World!')
+        self.assertEqual(other.Get("foo"), 'Hello World!')
+
+    def testBatchedWrites(self):
+        cache = twitter._SQLiteCache(self.path, batch_size=2)
+        other = twitter._SQLiteCache(self.path)
+        cache.Set("foo", 'foo')
+        self.assertEqual(cache.Get("foo"), 'foo')
+        self.assertEqual(other.Get("foo"), None)
+        cache.Set("bar", 'bar')
+        self.assertEqual(other.Get("foo"), 'foo')
+        self.assertEqual(other.Get("bar"), 'bar')
+
+        cache.Set("baz", 'baz')
+        cache.Flush()
+        self.assertEqual(other.Get("baz"), 'baz')
+
+    def testSweep(self):
+        cache = twitter._SQLiteCache(self.path, max_age=60)
+        cache.Set("foo", 'foo')
+        cache.Set("bar", 'bar')
+        cache._Execute('UPDATE cache SET cached_time = ? WHERE key = ?',
+                       (time.time() - 120, 'foo'))
+        self.assertEqual(cache.Sweep(), 1)
+        self.assertEqual(cache.Get("foo"), None)
+        self.assertEqual(cache.Get("bar"), 'bar')
+
+        # The pages freed by a sweep are given back to the file system.
+        for i in range(3000):
+            cache.Set(str(i), 'x' * 100)
+        cache._Execute('UPDATE cache SET cached_time = ? WHERE key != ?',
+                       (time.time() - 120, 'bar'))
+        page_count = cache._Execute('PRAGMA page_count').fetchone()[0]
+        self.assertEqual(cache.Sweep(), 3000)
+        self.assertEqual(cache._Execute('PRAGMA freelist_count').fetchone()[0], 0)
+        self.assertTrue(cache._Execute('PRAGMA page_count').fetchone()[0] < page_count / 2)
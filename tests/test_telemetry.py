@@ -0,0 +1,88 @@
+# encoding: utf-8
+import re
+import time
+import unittest
+
+import requests
+import responses
+from responses import GET
+
+import twitter
+
+DEFAULT_URL = re.compile(r'https?://.*\.twitter.com/1\.1/.*')
+
+
+class TelemetryTest(unittest.TestCase):
+
+    def testRecord(self):
+        telemetry = twitter.Telemetry(buckets=(0.1, 1), history=2)
+        url = 'https://api.twitter.com/1.1/statuses/user_timeline.json?screen_name=kesuke'
+        for remaining in (899, 898, 897):
+            telemetry.Record(url, 'GET', 200, 0.05, 100, {'x-rate-limit-remaining': str(remaining),
+                                                          'x-rate-limit-limit': '900'})
+        telemetry.Record(url, 'GET', 503, 2, 10)
+        telemetry.Record(url, 'GET', elapsed=0.5, error=requests.ConnectionError())
+
+        stats = telemetry.Snapshot()['/statuses/user_timeline']
+        self.assertEqual(stats['family'], 'statuses')
+        self.assertEqual(stats['requests'], 5)
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['statuses'], {200: 3, 503: 1})
+        self.assertEqual(stats['bytes'], 310)
+        self.assertEqual(stats['latency']['buckets'], [(0.1, 3), (1, 4), (float('inf'), 5)])
+        self.assertEqual(stats['latency']['count'], 5)
+        self.assertAlmostEqual(stats['latency']['sum'], 2.65)
+        self.assertEqual([r[1:] for r in stats['rate_limit']], [(898, 900), (897, 900)])
+
+        telemetry.Reset()
+        self.assertEqual(telemetry.Snapshot(), {})
+
+    def testPrometheus(self):
+        telemetry = twitter.Telemetry(buckets=(0.1,))
+        telemetry.Record('https://api.twitter.com/1.1/users/show.json?user_id=1', 'GET',
+                         200, 0.05, 100, {'x-rate-limit-remaining': '899', 'x-rate-limit-limit': '900'})
+        telemetry.Record('https://api.twitter.com/1.1/users/show.json?user_id=1', 'GET',
+                         elapsed=0.2, error=requests.Timeout())
+        text = telemetry.Prometheus()
+        labels = 'endpoint="/users/show/:id",family="users"'
+        for line in ('# TYPE twitter_requests_total counter',
+                     'twitter_requests_total{%s,status="200"} 1' % labels,
+                     'twitter_requests_total{%s,status="error"} 1' % labels,
+                     'twitter_response_bytes_total{%s} 100' % labels,
+                     '# TYPE twitter_request_duration_seconds histogram',
+                     'twitter_request_duration_seconds_bucket{%s,le="0.1"} 1' % labels,
+                     'twitter_request_duration_seconds_bucket{%s,le="+Inf"} 2' % labels,
+                     'twitter_request_duration_seconds_count{%s} 2' % labels,
+                     'twitter_rate_limit_remaining{%s} 899' % labels,
+                     'twitter_rate_limit_limit{%s} 900' % labels):
+            self.assertIn(line, text.splitlines())
+
+
+class ApiTelemetryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.telemetry = twitter.Telemetry()
+        self.api = twitter.Api(consumer_key='test',
+                               consumer_secret='test',
+                               access_token_key='test',
+                               access_token_secret='test',
+                               telemetry=self.telemetry)
+        with open('testdata/get_user.json') as f:
+            self.user = f.read()
+
+    @responses.activate
+    def testApi(self):
+        responses.add(GET, DEFAULT_URL, body=self.user, headers={
+            'x-rate-limit-limit': '900',
+            'x-rate-limit-remaining': '899',
+            'x-rate-limit-reset': str(int(time.time()) + 900)})
+        self.api.GetUser(user_id=718443)
+        responses.replace(GET, DEFAULT_URL, body=requests.ConnectionError())
+        self.assertRaises(requests.ConnectionError, self.api.GetUser, user_id=718443)
+
+        stats = self.telemetry.Snapshot()['/users/show/:id']
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['statuses'], {200: 1})
+        self.assertEqual(stats['bytes'], len(self.user.encode('utf-8')))
+        self.assertEqual(stats['rate_limit'][-1][1:], (899, 900))
@@ -36,8 +36,14 @@ except ImportError:
     from md5 import md5                     # noqa
 
 from ._file_cache import _FileCache         # noqa
+from ._memory_cache import _MemoryCache     # noqa
+from ._sqlite_cache import _SQLiteCache     # noqa
 from .error import TwitterError             # noqa
+from .error import RateLimitExceeded        # noqa
+from .id_set import IDSet                   # noqa
 from .parse_tweet import ParseTweet         # noqa
+from .retry import RetryPolicy              # noqa
+from .telemetry import Telemetry           # noqa
 
 from .models import (                       # noqa
     Category,                               # noqa
@@ -54,3 +60,10 @@ from .models import (                       # noqa
 )
 
 from .api import Api                        # noqa
+from .api_pool import ApiPool               # noqa
+
+try:
+    from .async_api import AsyncApi         # noqa
+except (ImportError, SyntaxError):
+    # asyncio is not available on Python 2
+    pass
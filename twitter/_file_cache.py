@@ -1,20 +1,43 @@
 #!/usr/bin/env python
 import errno
+import logging
 import os
 import tempfile
+import threading
+import time
 
 from hashlib import md5
 
+logger = logging.getLogger(__name__)
+
 
 class _FileCacheError(Exception):
     """Base exception class for FileCache related errors"""
 
 
 class _FileCache(object):
+    """A cache storing one file per entry under root_directory.
+
+    Nothing is deleted unless Remove() or Sweep() is called. Sweep() deletes
+    the entries written more than max_age seconds ago, then the least
+    recently used ones until the cache fits in max_bytes. Passing
+    sweep_interval runs Sweep() from a daemon thread every sweep_interval
+    seconds until Close() is called.
+    """
     DEPTH = 3
 
-    def __init__(self, root_directory=None):
+    def __init__(self, root_directory=None, max_bytes=None, max_age=None, sweep_interval=None):
         self._InitializeRootDirectory(root_directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._sweeper = None
+        self._stop_sweeper = threading.Event()
+        if sweep_interval:
+            self._sweeper = threading.Thread(target=self._SweepPeriodically,
+                                             args=(sweep_interval,),
+                                             name='_FileCache sweeper')
+            self._sweeper.daemon = True
+            self._sweeper.start()
 
     def Get(self, key):
         path = self._GetPath(key)
@@ -28,7 +51,12 @@ class _FileCache(object):
         path = self._GetPath(key)
         directory = os.path.dirname(path)
         if not os.path.exists(directory):
-            os.makedirs(directory)
+            try:
+                os.makedirs(directory)
+            except OSError as e:
+                # another thread or process may have just created it
+                if e.errno != errno.EEXIST:
+                    raise
         if not os.path.isdir(directory):
             raise _FileCacheError('%s exists but is not a directory' % directory)
         temp_fd, temp_path = tempfile.mkstemp()
@@ -57,6 +85,83 @@ class _FileCache(object):
         else:
             return None
 
+    def Stats(self):
+        """Return a dict with the number of entries and bytes on disk."""
+        entries = self._ListEntries()
+        return {
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _, _ in entries),
+        }
+
+    def Sweep(self):
+        """Delete expired entries, then the least recently used ones until
+        the cache is within max_bytes.
+
+        The last use of an entry is the later of its access and modification
+        times, as access times are not updated on file systems mounted with
+        noatime.
+
+        Returns:
+          The number of entries deleted.
+        """
+        entries = self._ListEntries()
+        deleted = 0
+        if self.max_age is not None:
+            expired = time.time() - self.max_age
+            kept = []
+            for entry in entries:
+                if entry[3] < expired:
+                    deleted += self._RemovePath(entry[0])
+                else:
+                    kept.append(entry)
+            entries = kept
+        if self.max_bytes is not None:
+            total = sum(size for _, size, _, _ in entries)
+            for path, size, _, _ in sorted(entries, key=lambda e: e[2]):
+                if total <= self.max_bytes:
+                    break
+                deleted += self._RemovePath(path)
+                total -= size
+        return deleted
+
+    def Close(self):
+        """Stop the background sweeper, if one is running."""
+        self._stop_sweeper.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def _SweepPeriodically(self, interval):
+        while not self._stop_sweeper.wait(interval):
+            try:
+                self.Sweep()
+            except Exception:
+                logger.exception('Sweeping %s failed', self._root_directory)
+
+    def _ListEntries(self):
+        """Return a list of (path, size, last use, mtime) for every entry."""
+        entries = []
+        for directory, _, filenames in os.walk(self._root_directory):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    # removed by another process since the directory was listed
+                    continue
+                entries.append((path, st.st_size, max(st.st_atime, st.st_mtime), st.st_mtime))
+        return entries
+
+    @staticmethod
+    def _RemovePath(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            if e.errno == errno.ENOENT:
+                return 0
+            raise
+        return 1
+
     def _GetUsername(self):
         """Attempt to find the username in a cross-platform fashion."""
         try:
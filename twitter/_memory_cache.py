@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+import threading
+import time
+
+from collections import OrderedDict
+
+
+class _MemoryCache(object):
+    """An in-process cache with the same interface as twitter._FileCache.
+
+    Entries are kept in least recently used order and the oldest ones are
+    evicted once either max_entries or max_bytes would be exceeded. The size
+    of an entry is the length of its data encoded as UTF-8.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def Get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries[key] = entry
+            self.hits += 1
+            return entry[0]
+
+    def Set(self, key, data):
+        size = self._GetSize(data)
+        with self._lock:
+            self._Remove(key)
+            if size > self.max_bytes:
+                return
+            while self._entries and self._IsFull(size):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+            self._entries[key] = (data, time.time(), size)
+            self._bytes += size
+
+    def Remove(self, key):
+        with self._lock:
+            self._Remove(key)
+
+    def GetCachedTime(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return entry[1]
+
+    def Stats(self):
+        """Return a dict with the number of entries and bytes held, and the
+        hit, miss and eviction counters.
+
+        An Api drops the entries too old to be used before looking them up,
+        so the hits are the requests answered from the cache and the misses
+        all the others, stale entries included.
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def _IsFull(self, size):
+        if len(self._entries) >= self.max_entries:
+            return True
+        return self._bytes + size > self.max_bytes
+
+    def _Remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    @staticmethod
+    def _GetSize(data):
+        try:
+            return len(data.encode('utf-8'))
+        except (AttributeError, UnicodeDecodeError):
+            return len(data)
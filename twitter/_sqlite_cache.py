@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+import getpass
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+
+class _SQLiteCache(object):
+    """A cache with the same interface as twitter._FileCache, stored in a
+    single SQLite database.
+
+    The database is opened in WAL mode so that several processes can share
+    it: readers never block the writer, and concurrent writers wait up to
+    ``timeout`` seconds for the lock. Entries older than ``max_age`` seconds
+    are deleted by Sweep(), which also returns the freed pages to the file
+    system. If ``sweep_interval`` is set, Sweep() is run from Set() at most
+    once per interval.
+
+    With a ``batch_size`` greater than 1, Set() buffers entries in memory and
+    writes them in a single transaction once the batch is full, or when
+    Flush() is called. Buffered entries are visible to this instance only.
+    """
+
+    def __init__(self,
+                 path=None,
+                 max_age=None,
+                 batch_size=1,
+                 sweep_interval=None,
+                 timeout=30):
+        self._path = os.path.abspath(path or self._GetTmpCachePath())
+        self.max_age = max_age
+        self.batch_size = batch_size
+        self.sweep_interval = sweep_interval
+        self._timeout = timeout
+        self._pending = {}
+        self._last_sweep = time.time()
+        self._lock = threading.RLock()
+        self._pid = None
+        self._connection = None
+        self._Connect()
+
+    def Get(self, key):
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key][0]
+            row = self._Execute('SELECT data FROM cache WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def Set(self, key, data):
+        with self._lock:
+            self._pending[key] = (data, time.time())
+            if len(self._pending) >= self.batch_size:
+                self.Flush()
+            if self.sweep_interval and time.time() - self._last_sweep >= self.sweep_interval:
+                self.Sweep()
+
+    def Remove(self, key):
+        with self._lock:
+            self._pending.pop(key, None)
+            with self._GetConnection() as connection:
+                connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def GetCachedTime(self, key):
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key][1]
+            row = self._Execute('SELECT cached_time FROM cache WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def Flush(self):
+        """Write all buffered entries to the database."""
+        with self._lock:
+            if not self._pending:
+                return
+            rows = [(key, data, cached_time)
+                    for key, (data, cached_time) in self._pending.items()]
+            with self._GetConnection() as connection:
+                connection.executemany(
+                    'INSERT OR REPLACE INTO cache (key, data, cached_time) VALUES (?, ?, ?)',
+                    rows)
+            self._pending.clear()
+
+    def Sweep(self, max_age=None):
+        """Delete the entries cached more than max_age seconds ago, defaulting
+        to the max_age given to the constructor, and vacuum the free pages.
+
+        Returns:
+          The number of entries deleted.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            self._last_sweep = time.time()
+            if max_age is None:
+                return 0
+            self.Flush()
+            with self._GetConnection() as connection:
+                deleted = connection.execute('DELETE FROM cache WHERE cached_time < ?',
+                                             (time.time() - max_age,)).rowcount
+            # execute() steps the pragma once, which frees a single page;
+            # executescript() runs it to the end.
+            self._GetConnection().executescript('PRAGMA incremental_vacuum')
+        return deleted
+
+    def Close(self):
+        with self._lock:
+            self.Flush()
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _Execute(self, sql, parameters=()):
+        return self._GetConnection().execute(sql, parameters)
+
+    def _GetConnection(self):
+        # A connection must not be shared with a forked child process.
+        if self._connection is None or self._pid != os.getpid():
+            self._Connect()
+        return self._connection
+
+    def _Connect(self):
+        connection = sqlite3.connect(self._path,
+                                     timeout=self._timeout,
+                                     check_same_thread=False)
+        # auto_vacuum only takes effect if set before the table is created.
+        connection.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        connection.execute('PRAGMA journal_mode = WAL')
+        connection.execute('PRAGMA synchronous = NORMAL')
+        with connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS cache '
+                               '(key TEXT PRIMARY KEY, data TEXT NOT NULL, cached_time REAL NOT NULL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS cache_cached_time ON cache (cached_time)')
+        self._connection = connection
+        self._pid = os.getpid()
+
+    @staticmethod
+    def _GetTmpCachePath():
+        try:
+            username = getpass.getuser()
+        except Exception:
+            username = 'nobody'
+        return os.path.join(tempfile.gettempdir(), 'python.cache_%s.sqlite' % username)
@@ -33,13 +33,16 @@ import io
 import warnings
 from uuid import uuid4
 import os
+import threading
+import math
+from collections import deque
 
 try:
     # python 3
-    from urllib.parse import urlparse, urlunparse, urlencode, quote_plus
+    from urllib.parse import urlparse, urlunparse, urlencode, quote_plus, parse_qsl
     from urllib.request import __version__ as urllib_version
 except ImportError:
-    from urlparse import urlparse, urlunparse
+    from urlparse import urlparse, urlunparse, parse_qsl
     from urllib import urlencode, quote_plus
     from urllib import __version__ as urllib_version
 
@@ -56,7 +59,10 @@ from twitter import (
     UserStatus,
 )
 
-from twitter.ratelimit import RateLimit
+from twitter.id_set import IDSet
+from twitter.json_codec import JSONCodec
+from twitter.ratelimit import RateLimit, SQLiteRateLimit
+from twitter.retry import RetryPolicy
 
 from twitter.twitter_utils import (
     calc_expected_status_length,
@@ -67,6 +73,7 @@ from twitter.twitter_utils import (
 
 from twitter.error import (
     TwitterError,
+    RateLimitExceeded,
     PythonTwitterDeprecationWarning330,
 )
 
@@ -78,13 +85,36 @@ CHARACTER_LIMIT = 280
 # A singleton representing a lazily instantiated FileCache.
 DEFAULT_CACHE = object()
 
+# The error code of a users/lookup that matches none of the users given.
+NO_USER_MATCHES = 17
+
 logger = logging.getLogger(__name__)
 
 
+def _HasOnlyErrorCodes(error, codes):
+    """Return True if the TwitterError error wraps a list of Twitter errors
+    whose codes are all in codes."""
+    errors = error.message
+    if not codes or not isinstance(errors, list) or not errors:
+        return False
+    return all(isinstance(e, dict) and e.get('code') in codes for e in errors)
+
+
+class _InFlightRequest(object):
+    """A GET request whose response is shared by every thread that asked for
+    the same url while it was running."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
 class Api(object):
     """A python interface into the Twitter API
 
-    By default, the Api caches results for 1 minute.
+    If a cache is given, the Api caches the results of GET requests for
+    1 minute by default.
 
     Example usage:
 
@@ -139,6 +169,13 @@ class Api(object):
         >>> api.CreateFriendship(user)
         >>> api.LookupFriendship(user)
         >>> api.VerifyCredentials()
+
+      An Api instance may be shared by several threads: arguments passed to
+      its methods are never modified, the rate limit state is updated under
+      a lock and all requests go through a single requests.Session, whose
+      connection pool is reused by every thread. Identical GET requests made
+      by several threads at the same time are sent only once and share the
+      response; Api.coalesced_requests counts the requests saved this way.
     """
 
     DEFAULT_CACHE_TIMEOUT = 60  # cache for 1 minute
@@ -152,19 +189,29 @@ class Api(object):
                  application_only_auth=False,
                  input_encoding=None,
                  request_headers=None,
-                 cache=DEFAULT_CACHE,
+                 cache=None,
                  base_url=None,
                  stream_url=None,
                  upload_url=None,
                  chunk_size=1024 * 1024,
-                 use_gzip_compression=False,
+                 use_gzip_compression=True,
                  debugHTTP=False,
                  timeout=None,
                  sleep_on_rate_limit=False,
                  tweet_mode='compat',
                  proxies=None,
                  verify_ssl=None,
-                 cert_ssl=None):
+                 cert_ssl=None,
+                 json_codec=None,
+                 retry_policy=None,
+                 pool_connections=10,
+                 pool_maxsize=10,
+                 keep_alive=True,
+                 rate_limit_scheduler=None,
+                 rate_limit=None,
+                 raise_on_rate_limit=False,
+                 telemetry=None,
+                 prefetch_pages=0):
         """Instantiate a new twitter.Api object.
 
         Args:
@@ -186,8 +233,9 @@ class Api(object):
           request_header (dict, optional):
             A dictionary of additional HTTP request headers.
           cache (object, optional):
-            The cache instance to use. Defaults to DEFAULT_CACHE.
-            Use None to disable caching.
+            The cache instance used to store the responses of GET requests.
+            Pass DEFAULT_CACHE to use a twitter._FileCache in the system
+            temporary directory. Defaults to None, which disables caching.
           base_url (str, optional):
             The base URL to use to contact the Twitter API.
             Defaults to https://api.twitter.com.
@@ -201,8 +249,9 @@ class Api(object):
             Defaults to 1MB. Anything under 16KB and you run the risk of erroring out
             on 15MB files.
           use_gzip_compression (bool, optional):
-            Set to True to tell enable gzip compression for any call
-            made to Twitter.  Defaults to False.
+            Set to True to ask Twitter for gzip or deflate compressed
+            responses, including on streaming connections, and False to
+            ask for uncompressed ones.  Defaults to True.
           debugHTTP (bool, optional):
             Set to True to enable debug output from urllib2 when performing
             any HTTP requests.  Defaults to False.
@@ -225,6 +274,50 @@ class Api(object):
           cert_ssl (optional):
             If String, path to ssl client cert file (.pem).
             If Tuple, ('cert', 'key') pair.
+          json_codec (optional):
+            The codec used to parse responses, see twitter.json_codec.
+            Defaults to a JSONCodec using the standard library.
+          retry_policy (twitter.RetryPolicy, optional):
+            When and how to retry failed requests. If None, each request
+            is attempted once.  Defaults to None.
+          pool_connections (int, optional):
+            The number of hosts to keep a pool of connections for.
+            Defaults to 10.
+          pool_maxsize (int, optional):
+            The maximum number of connections kept open to each host. Set it
+            to at least the number of threads sharing this instance, or the
+            max_workers of concurrent lookups.  Defaults to 10.
+          keep_alive (bool, optional):
+            Set to False to close every connection after its response
+            instead of reusing it.  Defaults to True.
+          rate_limit_scheduler (twitter.ratelimit.RateLimitScheduler, optional):
+            If given, and sleep_on_rate_limit is True, requests to each
+            endpoint are spread evenly over its rate limit window instead of
+            sleeping once the limit is reached.  Defaults to None.
+          rate_limit (twitter.ratelimit.RateLimit, optional):
+            Where to keep the rate limits. Pass a
+            twitter.ratelimit.SQLiteRateLimit to share them with other
+            processes using the same credentials; requests are only
+            reserved in it, and so kept within the limits, with
+            sleep_on_rate_limit or raise_on_rate_limit.  Defaults to a new
+            RateLimit.
+          raise_on_rate_limit (bool, optional):
+            Set to True to check the rate limits as with
+            sleep_on_rate_limit, but raise a twitter.RateLimitExceeded
+            carrying the suggested wait instead of ever sleeping. A 429
+            response is raised the same way rather than retried by the
+            retry_policy.  Defaults to False.
+          telemetry (twitter.Telemetry, optional):
+            If given, counts the requests sent, their status codes, latency
+            and response sizes and the rate limits, by endpoint.
+            Defaults to None.
+          prefetch_pages (int, optional):
+            The number of pages that the methods walking through cursor
+            paged results, such as GetFollowers, GetFollowerIDs or the Iter*
+            methods, fetch ahead in a background thread while the previous
+            ones are processed. Never more than the requests left in the
+            rate limit window are fetched ahead.  Defaults to 0, which
+            fetches each page when it is needed.
         """
 
         # check to see if the library is running on a Google App Engine instance
@@ -239,8 +332,13 @@ class Api(object):
 
         self.SetCache(cache)
         self._cache_timeout = Api.DEFAULT_CACHE_TIMEOUT
+        self._cache_timeouts = {}
         self._input_encoding = input_encoding
         self._use_gzip = use_gzip_compression
+        self.json_codec = json_codec or JSONCodec()
+        self.retry_policy = retry_policy
+        self.telemetry = telemetry
+        self.prefetch_pages = prefetch_pages
         self._debugHTTP = debugHTTP
         self._shortlink_size = 19
         if timeout and timeout < 30:
@@ -252,8 +350,22 @@ class Api(object):
         self._InitializeUserAgent()
         self._InitializeDefaultParameters()
 
-        self.rate_limit = RateLimit()
+        self.rate_limit = rate_limit if rate_limit is not None else RateLimit()
+        self._rate_limit_lock = threading.Lock()
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+        self.coalesced_requests = 0
+        # Set by ApiPool, which sends rate limited requests again with other
+        # credentials instead of retrying them.
+        self._pooled = False
         self.sleep_on_rate_limit = sleep_on_rate_limit
+        self.rate_limit_scheduler = rate_limit_scheduler
+        self.raise_on_rate_limit = raise_on_rate_limit
+        if isinstance(self.rate_limit, SQLiteRateLimit) and not (sleep_on_rate_limit or raise_on_rate_limit):
+            warnings.warn(
+                "A SQLiteRateLimit only keeps the processes sharing it within "
+                "the rate limits with sleep_on_rate_limit or "
+                "raise_on_rate_limit; without them it only records the limits.")
         self.tweet_mode = tweet_mode
         self.proxies = proxies
         self.verify_ssl = verify_ssl
@@ -292,7 +404,7 @@ class Api(object):
             requests_log.setLevel(logging.DEBUG)
             requests_log.propagate = True
 
-        self._session = requests.Session()
+        self._InitializeSession(pool_connections, pool_maxsize, keep_alive)
 
     @staticmethod
     def GetAppOnlyAuthToken(consumer_key, consumer_secret):
@@ -365,7 +477,7 @@ class Api(object):
         if self._config is None:
             url = '%s/help/configuration.json' % self.base_url
             resp = self._RequestUrl(url, 'GET')
-            data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+            data = self._ParseAndCheckTwitter(resp.content)
             self._config = data
         return self._config
 
@@ -527,7 +639,7 @@ class Api(object):
         else:
             resp = self._RequestUrl(url, 'GET', data=parameters)
 
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
         if return_json:
             return data
         else:
@@ -579,7 +691,7 @@ class Api(object):
         # Make and send requests
         url = '%s/users/search.json' % self.base_url
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
         return [User.NewFromJsonDict(x) for x in data]
 
     def GetTrendsCurrent(self, exclude=None):
@@ -595,7 +707,7 @@ class Api(object):
         """
         return self.GetTrendsWoeid(woeid=1, exclude=exclude)
 
-    def GetTrendsWoeid(self, woeid, exclude=None):
+    def GetTrendsWoeid(self, woeid, exclude=None, no_cache=False):
         """Return the top 10 trending topics for a specific WOEID, if trending
         information is available for it.
 
@@ -605,6 +717,8 @@ class Api(object):
           exclude:
             Appends the exclude parameter as a request parameter.
             Currently only exclude=hashtags is supported. [Optional]
+          no_cache:
+            If True, bypass the response cache for this call. [Optional]
 
         Returns:
           A list with 10 entries. Each entry contains a trend.
@@ -615,8 +729,8 @@ class Api(object):
         if exclude:
             parameters['exclude'] = exclude
 
-        resp = self._RequestUrl(url, verb='GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        resp = self._RequestUrl(url, verb='GET', data=parameters, no_cache=no_cache)
+        data = self._ParseAndCheckTwitter(resp.content)
         trends = []
         timestamp = data[0]['as_of']
 
@@ -632,7 +746,7 @@ class Api(object):
         """
         url = '%s/users/suggestions.json' % (self.base_url)
         resp = self._RequestUrl(url, verb='GET')
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         categories = []
 
@@ -651,7 +765,7 @@ class Api(object):
         url = '%s/users/suggestions/%s.json' % (self.base_url, category.slug)
 
         resp = self._RequestUrl(url, verb='GET')
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         users = []
         for user in data['users']:
@@ -736,10 +850,41 @@ class Api(object):
         if not include_entities:
             parameters['include_entities'] = 'false'
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return [Status.NewFromJsonDict(x) for x in data]
 
+    def IterHomeTimeline(self,
+                         count=200,
+                         since_id=None,
+                         max_id=None,
+                         trim_user=False,
+                         exclude_replies=False,
+                         contributor_details=False,
+                         include_entities=True):
+        """Iterate over the home timeline from the most recent Tweet back to
+        the oldest one Twitter returns (about 800) or to since_id, fetching
+        it a page at a time.
+
+        Takes the same arguments as GetHomeTimeline, count being the number
+        of statuses per request. Each request asks for the Tweets older than
+        the oldest one received so far, and Tweets received twice are
+        dropped. With exclude_replies, the replies are removed here rather
+        than by Twitter, see IterUserTimeline.
+
+        Yields:
+          A twitter.Status instance for each Tweet.
+        """
+        return self._IterTimeline(self.GetHomeTimeline,
+                                  '%s/statuses/home_timeline.json' % self.base_url,
+                                  max_id,
+                                  self._GetTimelineFilter(True, exclude_replies),
+                                  count=count,
+                                  since_id=since_id,
+                                  trim_user=trim_user,
+                                  contributor_details=contributor_details,
+                                  include_entities=include_entities)
+
     def GetUserTimeline(self,
                         user_id=None,
                         screen_name=None,
@@ -809,16 +954,54 @@ class Api(object):
         parameters['exclude_replies'] = enf_type('exclude_replies', bool, exclude_replies)
 
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return [Status.NewFromJsonDict(x) for x in data]
 
+    def IterUserTimeline(self,
+                         user_id=None,
+                         screen_name=None,
+                         since_id=None,
+                         max_id=None,
+                         count=200,
+                         include_rts=True,
+                         trim_user=False,
+                         exclude_replies=False):
+        """Iterate over the timeline of a user from their most recent Tweet
+        back to the oldest one Twitter returns (about 3,200) or to since_id,
+        fetching it a page at a time.
+
+        Takes the same arguments as GetUserTimeline, count being the number
+        of statuses per request. Each request asks for the Tweets older than
+        the oldest one received so far, and Tweets received twice are
+        dropped.
+
+        Twitter removes retweets and replies after picking the count Tweets
+        of a page, so with include_rts False or exclude_replies True it can
+        send back empty pages before the end of the timeline. The pages are
+        therefore requested unfiltered and the retweets and replies removed
+        here, at the cost of fetching them.
+
+        Yields:
+          A twitter.Status instance for each Tweet.
+        """
+        return self._IterTimeline(self.GetUserTimeline,
+                                  '%s/statuses/user_timeline.json' % self.base_url,
+                                  max_id,
+                                  self._GetTimelineFilter(include_rts, exclude_replies),
+                                  user_id=user_id,
+                                  screen_name=screen_name,
+                                  since_id=since_id,
+                                  count=count,
+                                  trim_user=trim_user)
+
     def GetStatus(self,
                   status_id,
                   trim_user=False,
                   include_my_retweet=True,
                   include_entities=True,
-                  include_ext_alt_text=True):
+                  include_ext_alt_text=True,
+                  no_cache=False):
         """Returns a single status message, specified by the status_id parameter.
 
         Args:
@@ -838,6 +1021,8 @@ class Api(object):
             This node offers a variety of metadata about the tweet in a
             discreet structure, including: user_mentions, urls, and
             hashtags. [Optional]
+          no_cache:
+            If True, bypass the response cache for this call. [Optional]
         Returns:
           A twitter.Status instance representing that status message
         """
@@ -851,8 +1036,8 @@ class Api(object):
             'include_ext_alt_text': enf_type('include_ext_alt_text', bool, include_ext_alt_text)
         }
 
-        resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        resp = self._RequestUrl(url, 'GET', data=parameters, no_cache=no_cache)
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return Status.NewFromJsonDict(data)
 
@@ -860,7 +1045,8 @@ class Api(object):
                     status_ids,
                     trim_user=False,
                     include_entities=True,
-                    map=False):
+                    map=False,
+                    max_workers=None):
         """Returns a list of status messages, specified by the status_ids parameter.
 
         Args:
@@ -880,6 +1066,10 @@ class Api(object):
             status data (or None if tweet does not exist or is inaccessible)
             as value. Otherwise returns an unordered list of successfully
             retrieved Tweets. [Optional]
+          max_workers:
+            The statuses are looked up 100 at a time. If greater than 1, up
+            to max_workers lookups are made in parallel, never more than the
+            remaining rate limit for the endpoint allows. [Optional]
         Returns:
           A dictionary or unordered list (depending on the parameter 'map') of
           twitter Status instances representing the status messages.
@@ -892,24 +1082,21 @@ class Api(object):
             result = {}
         else:
             result = []
-        offset = 0
-        parameters = {
-            'trim_user': enf_type('trim_user', bool, trim_user),
-            'include_entities': enf_type('include_entities', bool, include_entities),
-            'map': map
-        }
-        while offset < len(status_ids):
-            parameters['id'] = ','.join([str(enf_type('status_id', int, status_id)) for status_id in status_ids[offset:offset + 100]])
-
-            resp = self._RequestUrl(url, 'GET', data=parameters)
-            data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        parameters = []
+        for offset in range(0, len(status_ids), 100):
+            parameters.append({
+                'trim_user': enf_type('trim_user', bool, trim_user),
+                'include_entities': enf_type('include_entities', bool, include_entities),
+                'map': map,
+                'id': ','.join([str(enf_type('status_id', int, status_id)) for status_id in status_ids[offset:offset + 100]])
+            })
+
+        for data in self._RequestUrls(url, parameters, max_workers):
             if map:
                 result.update({int(key): (Status.NewFromJsonDict(value) if value else None) for key, value in data['id'].items()})
             else:
                 result += [Status.NewFromJsonDict(dataitem) for dataitem in data]
 
-            offset += 100
-
         return result
 
     def GetStatusOembed(self,
@@ -990,7 +1177,7 @@ class Api(object):
             parameters['lang'] = lang
 
         resp = self._RequestUrl(request_url, 'GET', data=parameters, enforce_auth=False)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return data
 
@@ -1018,7 +1205,7 @@ class Api(object):
         }
 
         resp = self._RequestUrl(url, 'POST', data=post_data)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return Status.NewFromJsonDict(data)
 
@@ -1174,7 +1361,7 @@ class Api(object):
             parameters['long'] = str(longitude)
 
         resp = self._RequestUrl(url, 'POST', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return Status.NewFromJsonDict(data)
 
@@ -1216,7 +1403,7 @@ class Api(object):
             parameters['media_category'] = media_category
 
         resp = self._RequestUrl(url, 'POST', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         try:
             return data['media_id']
@@ -1293,7 +1480,7 @@ class Api(object):
           parameters['media_category'] = 'tweet_gif'
 
         resp = self._RequestUrl(url, 'POST', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         try:
             media_id = data['media_id']
@@ -1366,7 +1553,7 @@ class Api(object):
             # raises a JSONDecodeError, so we should only do error checking
             # if the response is not blank.
             if resp.content.decode('utf-8'):
-                return self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+                return self._ParseAndCheckTwitter(resp.content)
 
             segment_id += 1
 
@@ -1395,7 +1582,7 @@ class Api(object):
         }
 
         resp = self._RequestUrl(url, 'POST', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return data
 
@@ -1478,7 +1665,7 @@ class Api(object):
         resp = self._RequestUrl(url, 'POST', json=parameters)
         # Response body should be blank, so only do error checking if the response is not blank.
         if resp.content.decode('utf-8'):
-            self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+            self._ParseAndCheckTwitter(resp.content)
 
         return True
 
@@ -1510,7 +1697,7 @@ class Api(object):
         resp = self._RequestUrl(url, 'POST', json=parameters)
         # Response body should be blank, so only do error checking if the response is not blank.
         if resp.content.decode('utf-8'):
-            self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+            self._ParseAndCheckTwitter(resp.content)
 
         return True
 
@@ -1621,7 +1808,7 @@ class Api(object):
         if trim_user:
             data['trim_user'] = 'true'
         resp = self._RequestUrl(url, 'POST', data=data)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return Status.NewFromJsonDict(data)
 
@@ -1718,7 +1905,7 @@ class Api(object):
             parameters['count'] = enf_type('count', int, count)
 
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return [Status.NewFromJsonDict(s) for s in data]
 
@@ -1758,7 +1945,7 @@ class Api(object):
                 except ValueError:
                     raise TwitterError({'message': "cursor must be an integer"})
             resp = self._RequestUrl(url, 'GET', data=parameters)
-            data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+            data = self._ParseAndCheckTwitter(resp.content)
             result += [x for x in data['ids']]
             if 'next_cursor' in data:
                 if data['next_cursor'] == 0 or data['next_cursor'] == data['previous_cursor']:
@@ -1818,10 +2005,144 @@ class Api(object):
         }
 
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return [Status.NewFromJsonDict(s) for s in data]
 
+    def _IterCursor(self, get_page, url, cursor=-1, **kwargs):
+        """Yield the items of get_page, a cursor driven method of the url
+        endpoint returning next_cursor, previous_cursor and a page of items,
+        one page at a time, starting at cursor."""
+        pages = self._IterCursorPages(get_page, cursor, **kwargs)
+        if self.prefetch_pages:
+            pages = self._Prefetch(pages, url)
+        for items in pages:
+            for item in items:
+                yield item
+
+    @staticmethod
+    def _IterCursorPages(get_page, cursor, **kwargs):
+        while True:
+            next_cursor, previous_cursor, items = get_page(cursor=cursor, **kwargs)
+            yield items
+            if next_cursor == 0 or next_cursor == previous_cursor:
+                return
+            cursor = next_cursor
+
+    def _IterTimeline(self, get_page, url, max_id, keep, **kwargs):
+        """Yield the statuses of get_page, a method of the url timeline
+        endpoint taking a max_id, one page at a time from max_id back. If
+        keep is given, only the statuses for which it returns True are
+        yielded."""
+        pages = self._IterTimelinePages(get_page, max_id, keep, **kwargs)
+        if self.prefetch_pages:
+            pages = self._Prefetch(pages, url)
+        for statuses in pages:
+            for status in statuses:
+                yield status
+
+    @staticmethod
+    def _IterTimelinePages(get_page, max_id, keep, **kwargs):
+        if max_id is not None:
+            max_id = enf_type('max_id', int, max_id)
+        while True:
+            page = get_page(max_id=max_id, **kwargs)
+            # Timelines are sorted from the newest Tweet, anything newer than
+            # max_id has been yielded with a previous page already.
+            page = [s for s in page if max_id is None or s.id <= max_id]
+            if not page:
+                return
+            statuses = page if keep is None else [s for s in page if keep(s)]
+            if statuses:
+                yield statuses
+            max_id = min(s.id for s in page) - 1
+            if max_id < 1:
+                return
+
+    @staticmethod
+    def _GetTimelineFilter(include_rts, exclude_replies):
+        """Return the keep function of _IterTimeline removing the retweets
+        and replies that were not asked for, or None to keep everything."""
+        if include_rts and not exclude_replies:
+            return None
+
+        def keep(status):
+            if not include_rts and status.retweeted_status is not None:
+                return False
+            return not (exclude_replies and status.in_reply_to_status_id is not None)
+        return keep
+
+    def _Prefetch(self, pages, url):
+        """Yield the pages of the pages iterator, fetching the next ones in a
+        background thread while the caller processes the current one.
+
+        Up to prefetch_pages pages are fetched ahead of the caller, and no
+        more than the requests left in the rate limit window of url, so that
+        the requests of a caller stopping early are not spent on pages it
+        does not read: once they are used up, a page is only fetched when the
+        caller asks for it. Stopping the iteration stops the thread after
+        the request in progress, if any.
+        """
+        buffered = deque()
+        condition = threading.Condition()
+        state = {'done': False, 'stopped': False, 'waiting': False, 'error': None}
+
+        def ahead():
+            limit = self.rate_limit.get_limit(url)
+            if limit.reset > time.time():
+                return min(self.prefetch_pages, limit.remaining)
+            return self.prefetch_pages
+
+        def wanted():
+            return (state['waiting'] and not buffered) or len(buffered) < ahead()
+
+        def fetch():
+            try:
+                while True:
+                    with condition:
+                        while not state['stopped'] and not wanted():
+                            condition.wait()
+                        if state['stopped']:
+                            return
+                    page = next(pages, None)
+                    with condition:
+                        if page is None:
+                            return
+                        buffered.append(page)
+                        condition.notify_all()
+            except Exception as e:
+                with condition:
+                    state['error'] = e
+            finally:
+                with condition:
+                    state['done'] = True
+                    condition.notify_all()
+                pages.close()
+
+        thread = threading.Thread(target=fetch, name='python-twitter prefetch')
+        thread.daemon = True
+        thread.start()
+        try:
+            while True:
+                with condition:
+                    state['waiting'] = True
+                    condition.notify_all()
+                    while not buffered and not state['done']:
+                        condition.wait()
+                    state['waiting'] = False
+                    if buffered:
+                        page = buffered.popleft()
+                        condition.notify_all()
+                    elif state['error'] is not None:
+                        raise state['error']
+                    else:
+                        return
+                yield page
+        finally:
+            with condition:
+                state['stopped'] = True
+                condition.notify_all()
+
     def _GetBlocksMutesPaged(self,
                              endpoint,
                              action,
@@ -1872,7 +2193,7 @@ class Api(object):
         }
 
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         if action == 'ids':
             result += data.get('ids')
@@ -1898,21 +2219,32 @@ class Api(object):
         Returns:
           A list of twitter.User instances, one for each blocked user.
         """
-        result = []
-        cursor = -1
+        return list(self.IterBlocks(skip_status=skip_status,
+                                    include_entities=include_entities))
 
-        while True:
-            next_cursor, previous_cursor, users = self.GetBlocksPaged(
-                cursor=cursor,
-                skip_status=skip_status,
-                include_entities=include_entities)
-            result += users
-            if next_cursor == 0 or next_cursor == previous_cursor:
-                break
-            else:
-                cursor = next_cursor
+    def IterBlocks(self,
+                   cursor=-1,
+                   skip_status=False,
+                   include_entities=False):
+        """ Iterate over the users (as twitter.User instances) blocked by
+        the currently authenticated user, fetching them a page at a time.
 
-        return result
+        Args:
+          cursor (int, optional):
+            The page to start at. Defaults to -1, the first page.
+          skip_status (bool, optional):
+            If True the statuses will not be returned in the user items.
+          include_entities (bool, optional):
+            When True, the user entities will be included.
+
+        Yields:
+          A twitter.User instance for each blocked user.
+        """
+        return self._IterCursor(self.GetBlocksPaged,
+                                '%s/blocks/list.json' % self.base_url,
+                                cursor=cursor,
+                                skip_status=skip_status,
+                                include_entities=include_entities)
 
     def GetBlocksPaged(self,
                        cursor=-1,
@@ -1952,20 +2284,27 @@ class Api(object):
         Returns:
           A list of user IDs for all blocked users.
         """
-        result = []
-        cursor = -1
+        return list(self.IterBlocksIDs(stringify_ids=stringify_ids))
 
-        while True:
-            next_cursor, previous_cursor, user_ids = self.GetBlocksIDsPaged(
-                cursor=cursor,
-                stringify_ids=stringify_ids)
-            result += user_ids
-            if next_cursor == 0 or next_cursor == previous_cursor:
-                break
-            else:
-                cursor = next_cursor
+    def IterBlocksIDs(self,
+                      cursor=-1,
+                      stringify_ids=False):
+        """ Iterate over the IDs of the users blocked by the currently
+        authenticated user, fetching them a page at a time.
 
-        return result
+        Args:
+          cursor (int, optional):
+            The page to start at. Defaults to -1, the first page.
+          stringify_ids (bool, optional):
+            If True user IDs will be returned as strings rather than integers.
+
+        Yields:
+          The ID of each blocked user.
+        """
+        return self._IterCursor(self.GetBlocksIDsPaged,
+                                '%s/blocks/ids.json' % self.base_url,
+                                cursor=cursor,
+                                stringify_ids=stringify_ids)
 
     def GetBlocksIDsPaged(self,
                           cursor=-1,
@@ -2003,21 +2342,32 @@ class Api(object):
         Returns:
           A list of twitter.User instances, one for each muted user.
         """
-        result = []
-        cursor = -1
+        return list(self.IterMutes(skip_status=skip_status,
+                                   include_entities=include_entities))
 
-        while True:
-            next_cursor, previous_cursor, users = self.GetMutesPaged(
-                cursor=cursor,
-                skip_status=skip_status,
-                include_entities=include_entities)
-            result += users
-            if next_cursor == 0 or next_cursor == previous_cursor:
-                break
-            else:
-                cursor = next_cursor
+    def IterMutes(self,
+                  cursor=-1,
+                  skip_status=False,
+                  include_entities=False):
+        """ Iterate over the users (as twitter.User instances) muted by
+        the currently authenticated user, fetching them a page at a time.
 
-        return result
+        Args:
+          cursor (int, optional):
+            The page to start at. Defaults to -1, the first page.
+          skip_status (bool, optional):
+            If True the statuses will not be returned in the user items.
+          include_entities (bool, optional):
+            When True, the user entities will be included.
+
+        Yields:
+          A twitter.User instance for each muted user.
+        """
+        return self._IterCursor(self.GetMutesPaged,
+                                '%s/mutes/users/list.json' % self.base_url,
+                                cursor=cursor,
+                                skip_status=skip_status,
+                                include_entities=include_entities)
 
     def GetMutesPaged(self,
                       cursor=-1,
@@ -2058,20 +2408,27 @@ class Api(object):
         Returns:
           A list of user IDs for all muted users.
         """
-        result = []
-        cursor = -1
+        return list(self.IterMutesIDs(stringify_ids=stringify_ids))
 
-        while True:
-            next_cursor, previous_cursor, user_ids = self.GetMutesIDsPaged(
-                cursor=cursor,
-                stringify_ids=stringify_ids)
-            result += user_ids
-            if next_cursor == 0 or next_cursor == previous_cursor:
-                break
-            else:
-                cursor = next_cursor
+    def IterMutesIDs(self,
+                     cursor=-1,
+                     stringify_ids=False):
+        """ Iterate over the IDs of the users muted by the currently
+        authenticated user, fetching them a page at a time.
 
-        return result
+        Args:
+          cursor (int, optional):
+            The page to start at. Defaults to -1, the first page.
+          stringify_ids (bool, optional):
+            If True user IDs will be returned as strings rather than integers.
+
+        Yields:
+          The ID of each muted user.
+        """
+        return self._IterCursor(self.GetMutesIDsPaged,
+                                '%s/mutes/users/ids.json' % self.base_url,
+                                cursor=cursor,
+                                stringify_ids=stringify_ids)
 
     def GetMutesIDsPaged(self,
                          cursor=-1,
@@ -2148,7 +2505,7 @@ class Api(object):
             post_data['skip_status'] = enf_type('skip_status', bool, skip_status)
 
         resp = self._RequestUrl(url, 'POST', data=post_data)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return User.NewFromJsonDict(data)
 
@@ -2183,7 +2540,7 @@ class Api(object):
             post_data['perform_block'] = enf_type('perform_block', bool, perform_block)
 
         resp = self._RequestUrl(url, 'POST', data=post_data)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return User.NewFromJsonDict(data)
 
@@ -2327,7 +2684,7 @@ class Api(object):
         parameters['cursor'] = cursor
 
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         if 'ids' in data:
             result.extend([x for x in data['ids']])
@@ -2426,12 +2783,28 @@ class Api(object):
                               cursor=None,
                               count=None,
                               stringify_ids=False,
-                              total_count=None):
+                              total_count=None,
+                              compact=False):
         """ Common method for GetFriendIDs and GetFollowerIDs """
+        if compact and stringify_ids:
+            raise TwitterError({'message': "compact and stringify_ids cannot be used together"})
+
+        pages = self._GetFriendFollowerIDsPages(url, user_id, screen_name, stringify_ids, total_count)
+        if self.prefetch_pages:
+            pages = self._Prefetch(pages, url)
+        if compact:
+            return IDSet.FromPages(pages)
+
+        result = []
+        for data in pages:
+            result.extend(data)
+        return result
 
+    def _GetFriendFollowerIDsPages(self, url, user_id, screen_name, stringify_ids, total_count):
+        """ Yield the pages of ids fetched by _GetFriendFollowerIDs """
         count = 5000
         cursor = -1
-        result = []
+        fetched = 0
 
         if total_count:
             total_count = enf_type('total_count', int, total_count)
@@ -2440,7 +2813,7 @@ class Api(object):
             count = total_count
 
         while True:
-            if total_count is not None and len(result) + count > total_count:
+            if total_count is not None and fetched + count > total_count:
                 break
 
             next_cursor, previous_cursor, data = self._GetIDsPaged(
@@ -2451,22 +2824,22 @@ class Api(object):
                 stringify_ids=stringify_ids,
                 count=count)
 
-            result.extend([x for x in data])
+            fetched += len(data)
+            yield data
 
             if next_cursor == 0 or next_cursor == previous_cursor:
                 break
             else:
                 cursor = next_cursor
 
-        return result
-
     def GetFollowerIDs(self,
                        user_id=None,
                        screen_name=None,
                        cursor=None,
                        stringify_ids=False,
                        count=None,
-                       total_count=None):
+                       total_count=None,
+                       compact=False):
         """Returns a list of twitter user id's for every person
         that is following the specified user.
 
@@ -2490,9 +2863,14 @@ class Api(object):
             followers and you don't want to get rate limited. The data returned
             might contain more UIDs if total_count is not a multiple of count
             (5000 by default). [Optional]
+          compact:
+            If True, return the ids as a twitter.IDSet, a sorted set stored
+            in an array of 64 bit integers, which takes about a quarter of
+            the memory of a list for large accounts. Cannot be used with
+            stringify_ids. [Optional]
 
         Returns:
-          A list of integers, one for each user id.
+          A list of integers, one for each user id, or a twitter.IDSet.
         """
         url = '%s/followers/ids.json' % self.base_url
         return self._GetFriendFollowerIDs(url=url,
@@ -2501,7 +2879,45 @@ class Api(object):
                                           cursor=cursor,
                                           stringify_ids=stringify_ids,
                                           count=count,
-                                          total_count=total_count)
+                                          total_count=total_count,
+                                          compact=compact)
+
+    def IterFollowerIDs(self,
+                        user_id=None,
+                        screen_name=None,
+                        cursor=-1,
+                        stringify_ids=False,
+                        count=5000):
+        """Iterate over the user ids of every follower of a user, fetching
+        them a page at a time, so that the followers of large accounts do not
+        have to be held in memory at once.
+
+        Args:
+          user_id:
+            The twitter id of the user whose followers you are fetching.
+            If not specified, defaults to the authenticated user. [Optional]
+          screen_name:
+            The twitter name of the user whose followers you are fetching.
+            If not specified, defaults to the authenticated user. [Optional]
+          cursor:
+            The page to start at. Defaults to -1, the first page. [Optional]
+          stringify_ids:
+            if True then twitter will return the ids as strings instead of
+            integers. [Optional]
+          count:
+            The number of user id's to retrieve per API request.
+            Defaults to 5000. [Optional]
+
+        Yields:
+          The user id of each follower.
+        """
+        return self._IterCursor(self.GetFollowerIDsPaged,
+                                '%s/followers/ids.json' % self.base_url,
+                                user_id=user_id,
+                                screen_name=screen_name,
+                                cursor=cursor,
+                                stringify_ids=stringify_ids,
+                                count=count)
 
     def GetFriendIDs(self,
                      user_id=None,
@@ -2509,7 +2925,8 @@ class Api(object):
                      cursor=None,
                      count=None,
                      stringify_ids=False,
-                     total_count=None):
+                     total_count=None,
+                     compact=False):
         """ Fetch a sequence of user ids, one for each friend.
         Returns a list of all the given user's friends' IDs. If no user_id or
         screen_name is given, the friends will be those of the authenticated
@@ -2534,9 +2951,12 @@ class Api(object):
             The total amount of UIDs to retrieve. Good if the account has many followers
             and you don't want to get rate limited. The data returned might contain more
             UIDs if total_count is not a multiple of count (5000 by default). [Optional]
+          compact:
+            If True, return the ids as a twitter.IDSet, see GetFollowerIDs.
+            [Optional]
 
         Returns:
-          A list of integers, one for each user id.
+          A list of integers, one for each user id, or a twitter.IDSet.
         """
         url = '%s/friends/ids.json' % self.base_url
         return self._GetFriendFollowerIDs(url,
@@ -2545,7 +2965,150 @@ class Api(object):
                                           cursor,
                                           count,
                                           stringify_ids,
-                                          total_count)
+                                          total_count,
+                                          compact)
+
+    def IterFriendIDs(self,
+                      user_id=None,
+                      screen_name=None,
+                      cursor=-1,
+                      stringify_ids=False,
+                      count=5000):
+        """Iterate over the user ids of every friend of a user, fetching
+        them a page at a time, so that the friends of large accounts do not
+        have to be held in memory at once.
+
+        Args:
+          user_id:
+            The twitter id of the user whose friends you are fetching.
+            If not specified, defaults to the authenticated user. [Optional]
+          screen_name:
+            The twitter name of the user whose friends you are fetching.
+            If not specified, defaults to the authenticated user. [Optional]
+          cursor:
+            The page to start at. Defaults to -1, the first page. [Optional]
+          stringify_ids:
+            if True then twitter will return the ids as strings instead of
+            integers. [Optional]
+          count:
+            The number of user id's to retrieve per API request.
+            Defaults to 5000. [Optional]
+
+        Yields:
+          The user id of each friend.
+        """
+        return self._IterCursor(self.GetFriendIDsPaged,
+                                '%s/friends/ids.json' % self.base_url,
+                                user_id=user_id,
+                                screen_name=screen_name,
+                                cursor=cursor,
+                                stringify_ids=stringify_ids,
+                                count=count)
+
+    def CrawlFollowerIDs(self,
+                         store,
+                         user_id=None,
+                         screen_name=None,
+                         key=None,
+                         stringify_ids=False,
+                         count=5000):
+        """Fetch the user ids of every follower of a user, saving the cursor
+        and the ids fetched so far to store after each page.
+
+        If the crawl is interrupted, for instance by a crash or a
+        twitter.RateLimitExceeded, calling it again with the same store and
+        key resumes it from the last page saved instead of from the start.
+        The checkpoint is removed from store once the crawl is complete.
+
+        Args:
+          store:
+            Where to save the checkpoint: any object with the Get, Set and
+            Remove methods of twitter._FileCache, such as a _FileCache or a
+            _SQLiteCache, created without a max_age.
+          user_id:
+            The twitter id of the user whose followers you are fetching.
+            If not specified, defaults to the authenticated user. [Optional]
+          screen_name:
+            The twitter name of the user whose followers you are fetching.
+            If not specified, defaults to the authenticated user. [Optional]
+          key:
+            The key of the checkpoint in store. Defaults to one derived from
+            the endpoint, the user and stringify_ids. [Optional]
+          stringify_ids:
+            if True then twitter will return the ids as strings instead of
+            integers. [Optional]
+          count:
+            The number of user id's to retrieve per API request.
+            Defaults to 5000. [Optional]
+
+        Returns:
+          A list of the user ids of the followers.
+        """
+        return self._CrawlIDs(self.GetFollowerIDsPaged, 'followers', store,
+                              user_id, screen_name, key, stringify_ids, count)
+
+    def CrawlFriendIDs(self,
+                       store,
+                       user_id=None,
+                       screen_name=None,
+                       key=None,
+                       stringify_ids=False,
+                       count=5000):
+        """Fetch the user ids of every friend of a user, saving the cursor
+        and the ids fetched so far to store after each page, so that an
+        interrupted crawl can be resumed.
+
+        Takes the same arguments as CrawlFollowerIDs.
+
+        Returns:
+          A list of the user ids of the friends.
+        """
+        return self._CrawlIDs(self.GetFriendIDsPaged, 'friends', store,
+                              user_id, screen_name, key, stringify_ids, count)
+
+    def _CrawlIDs(self, get_page, name, store, user_id, screen_name, key, stringify_ids, count):
+        """Common method for CrawlFollowerIDs and CrawlFriendIDs.
+
+        The checkpoint is made of one entry per page, under key:<page number>,
+        and of the cursor of the next page and the number of pages saved,
+        under key. A page is saved before the checkpoint moves past it, so
+        the pages are written once each whatever the size of the crawl.
+        """
+        if key is None:
+            key = 'crawl:%s/ids:%s:%s' % (name,
+                                          user_id or screen_name or self._access_token_key,
+                                          stringify_ids)
+        checkpoint = store.Get(key)
+        if checkpoint:
+            state = json.loads(checkpoint)
+            logger.debug('Resuming %s after %d pages', key, state['pages'])
+        else:
+            state = {'cursor': -1, 'pages': 0}
+
+        result = []
+        for page in range(state['pages']):
+            ids = store.Get('%s:%d' % (key, page))
+            if ids is None:
+                raise TwitterError({'message': "Page %d of checkpoint %s is missing" % (page, key)})
+            result.extend(json.loads(ids))
+
+        while state['cursor'] != 0:
+            next_cursor, previous_cursor, ids = get_page(user_id=user_id,
+                                                         screen_name=screen_name,
+                                                         cursor=state['cursor'],
+                                                         stringify_ids=stringify_ids,
+                                                         count=count)
+            result.extend(ids)
+            if next_cursor == previous_cursor:
+                next_cursor = 0
+            store.Set('%s:%d' % (key, state['pages']), json.dumps(ids))
+            state = {'cursor': next_cursor, 'pages': state['pages'] + 1}
+            store.Set(key, json.dumps(state))
+
+        for page in range(state['pages']):
+            store.Remove('%s:%d' % (key, page))
+        store.Remove(key)
+        return result
 
     def _GetFriendsFollowersPaged(self,
                                   url=None,
@@ -2610,7 +3173,7 @@ class Api(object):
         parameters['cursor'] = cursor
 
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         if 'users' in data:
             users = [User.NewFromJsonDict(user) for user in data['users']]
@@ -2759,8 +3322,6 @@ class Api(object):
                 PythonTwitterDeprecationWarning330)
 
         count = 200
-        cursor = -1
-        result = []
 
         if total_count:
             try:
@@ -2771,8 +3332,24 @@ class Api(object):
             if total_count <= 200:
                 count = total_count
 
+        pages = self._GetFriendsFollowersPages(url, user_id, screen_name, count, total_count,
+                                               skip_status, include_user_entities)
+        if self.prefetch_pages:
+            pages = self._Prefetch(pages, url)
+
+        result = []
+        for data in pages:
+            result.extend(data)
+        return result
+
+    def _GetFriendsFollowersPages(self, url, user_id, screen_name, count, total_count,
+                                  skip_status, include_user_entities):
+        """ Yield the pages of users fetched by _GetFriendsFollowers """
+        cursor = -1
+        fetched = 0
+
         while True:
-            if total_count is not None and len(result) + count > total_count:
+            if total_count is not None and fetched + count > total_count:
                 break
 
             next_cursor, previous_cursor, data = self._GetFriendsFollowersPaged(
@@ -2787,13 +3364,12 @@ class Api(object):
             if next_cursor:
                 cursor = next_cursor
 
-            result.extend(data)
+            fetched += len(data)
+            yield data
 
             if next_cursor == 0 or next_cursor == previous_cursor:
                 break
 
-        return result
-
     def GetFollowers(self,
                      user_id=None,
                      screen_name=None,
@@ -2841,6 +3417,47 @@ class Api(object):
                                          skip_status,
                                          include_user_entities)
 
+    def IterFollowers(self,
+                      user_id=None,
+                      screen_name=None,
+                      cursor=-1,
+                      count=200,
+                      skip_status=False,
+                      include_user_entities=True):
+        """Iterate over the twitter.User instances, one for each follower,
+        fetching them a page at a time, so that the followers of large accounts
+        do not have to be held in memory at once.
+
+        Args:
+          user_id:
+            The twitter id of the user whose followers you are fetching.
+            If not specified, defaults to the authenticated user. [Optional]
+          screen_name:
+            The twitter name of the user whose followers you are fetching.
+            If not specified, defaults to the authenticated user. [Optional]
+          cursor:
+            The page to start at. Defaults to -1, the first page. [Optional]
+          count:
+            The number of users to return per page, up to a maximum of 200.
+            Defaults to 200. [Optional]
+          skip_status:
+            If True the statuses will not be returned in the user items.
+            [Optional]
+          include_user_entities:
+            When True, the user entities will be included. [Optional]
+
+        Yields:
+          A twitter.User instance for each follower.
+        """
+        return self._IterCursor(self.GetFollowersPaged,
+                                '%s/followers/list.json' % self.base_url,
+                                user_id=user_id,
+                                screen_name=screen_name,
+                                cursor=cursor,
+                                count=count,
+                                skip_status=skip_status,
+                                include_user_entities=include_user_entities)
+
     def GetFriends(self,
                    user_id=None,
                    screen_name=None,
@@ -2889,19 +3506,64 @@ class Api(object):
                                          skip_status,
                                          include_user_entities)
 
+    def IterFriends(self,
+                    user_id=None,
+                    screen_name=None,
+                    cursor=-1,
+                    count=200,
+                    skip_status=False,
+                    include_user_entities=True):
+        """Iterate over the twitter.User instances, one for each friend,
+        fetching them a page at a time, so that the friends of large accounts
+        do not have to be held in memory at once.
+
+        Args:
+          user_id:
+            The twitter id of the user whose friends you are fetching.
+            If not specified, defaults to the authenticated user. [Optional]
+          screen_name:
+            The twitter name of the user whose friends you are fetching.
+            If not specified, defaults to the authenticated user. [Optional]
+          cursor:
+            The page to start at. Defaults to -1, the first page. [Optional]
+          count:
+            The number of users to return per page, up to a maximum of 200.
+            Defaults to 200. [Optional]
+          skip_status:
+            If True the statuses will not be returned in the user items.
+            [Optional]
+          include_user_entities:
+            When True, the user entities will be included. [Optional]
+
+        Yields:
+          A twitter.User instance for each friend.
+        """
+        return self._IterCursor(self.GetFriendsPaged,
+                                '%s/friends/list.json' % self.base_url,
+                                user_id=user_id,
+                                screen_name=screen_name,
+                                cursor=cursor,
+                                count=count,
+                                skip_status=skip_status,
+                                include_user_entities=include_user_entities)
+
     def UsersLookup(self,
                     user_id=None,
                     screen_name=None,
                     users=None,
                     include_entities=True,
-                    return_json=False):
+                    return_json=False,
+                    no_cache=False,
+                    max_workers=None):
         """Fetch extended information for the specified users.
 
         Users may be specified either as lists of either user_ids,
         screen_names, or twitter.User objects. The list of users that
         are queried is the union of all specified parameters.
 
-        No more than 100 users may be given per request.
+        Any number of users may be given: they are looked up 100 at a time,
+        and a lookup that matches none of its users adds nothing instead of
+        failing the others.
 
         Args:
           user_id (int, list, optional):
@@ -2915,43 +3577,89 @@ class Api(object):
             excluded when set to False.
           return_json (bool, optional):
             If True JSON data will be returned, instead of twitter.User
+          no_cache (bool, optional):
+            If True, bypass the response cache for this call.
+          max_workers (int, optional):
+            If greater than 1, up to max_workers lookups of 100 users are
+            made in parallel, within the remaining rate limit.
 
         Returns:
           A list of twitter.User objects for the requested users
         """
+        url = '%s/users/lookup.json' % self.base_url
+        parameters = self._UsersLookupParameters(user_id, screen_name, users, include_entities)
+
+        result = []
+        for data in self._RequestUrls(url, parameters, max_workers, no_cache=no_cache,
+                                      empty_codes=(NO_USER_MATCHES,)):
+            if return_json:
+                result += data
+            else:
+                result += [User.NewFromJsonDict(u) for u in data]
+        return result
+
+    def IterUsersLookup(self,
+                        user_id=None,
+                        screen_name=None,
+                        users=None,
+                        include_entities=True,
+                        return_json=False,
+                        no_cache=False,
+                        max_workers=None):
+        """Generator version of UsersLookup.
+
+        Takes the same arguments as UsersLookup. The users are looked up 100
+        at a time and yielded as soon as the lookup they are part of
+        completes, which with max_workers greater than 1 is not necessarily
+        in the order they were given.
+
+        Yields:
+          A twitter.User object, or a dict if return_json is True, for each
+          user found.
+        """
+        url = '%s/users/lookup.json' % self.base_url
+        parameters = self._UsersLookupParameters(user_id, screen_name, users, include_entities)
+
+        for data in self._RequestUrls(url, parameters, max_workers, ordered=False, no_cache=no_cache,
+                                      empty_codes=(NO_USER_MATCHES,)):
+            for u in data:
+                yield u if return_json else User.NewFromJsonDict(u)
+
+    @staticmethod
+    def _UsersLookupParameters(user_id, screen_name, users, include_entities):
+        """Split the users given to UsersLookup into the parameters of
+        requests for no more than 100 users each."""
         if not any([user_id, screen_name, users]):
             raise TwitterError("Specify at least one of user_id, screen_name, or users.")
 
-        url = '%s/users/lookup.json' % self.base_url
-        parameters = {
-            'include_entities': include_entities
-        }
         uids = list()
         if user_id:
             uids.extend(user_id)
         if users:
             uids.extend([u.id for u in users])
-        if len(uids):
-            parameters['user_id'] = ','.join([str(u) for u in uids])
+        screen_names = []
         if screen_name:
-            parameters['screen_name'] = parse_arg_list(screen_name, 'screen_name')
-
-        if len(uids) > 100:
-            raise TwitterError("No more than 100 users may be requested per request.")
-
-        resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
-
-        if return_json:
-            return data
-        else:
-            return [User.NewFromJsonDict(u) for u in data]
+            screen_names = parse_arg_list(screen_name, 'screen_name').split(',')
+
+        parameters = []
+        for offset in range(0, len(uids), 100):
+            parameters.append({
+                'include_entities': include_entities,
+                'user_id': ','.join([str(u) for u in uids[offset:offset + 100]])
+            })
+        for offset in range(0, len(screen_names), 100):
+            parameters.append({
+                'include_entities': include_entities,
+                'screen_name': ','.join(screen_names[offset:offset + 100])
+            })
+        return parameters
 
     def GetUser(self,
                 user_id=None,
                 screen_name=None,
                 include_entities=True,
-                return_json=False):
+                return_json=False,
+                no_cache=False):
         """Returns a single user.
 
         Args:
@@ -2964,6 +3672,8 @@ class Api(object):
             The entities node will be omitted when set to False.
           return_json (bool, optional):
             If True JSON data will be returned, instead of twitter.User
+          no_cache (bool, optional):
+            If True, bypass the response cache for this call.
 
         Returns:
           A twitter.User instance representing that user
@@ -2979,8 +3689,8 @@ class Api(object):
         else:
             raise TwitterError("Specify at least one of user_id or screen_name.")
 
-        resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        resp = self._RequestUrl(url, 'GET', data=parameters, no_cache=no_cache)
+        data = self._ParseAndCheckTwitter(resp.content)
 
         if return_json:
             return data
@@ -3048,7 +3758,7 @@ class Api(object):
             parameters['page'] = enf_type('page', int, page)
 
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         if return_json:
             return data
@@ -3104,7 +3814,7 @@ class Api(object):
             parameters['page'] = enf_type('page', int, page)
 
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         if return_json:
             return data
@@ -3175,7 +3885,7 @@ class Api(object):
         }
 
         resp = self._RequestUrl(url, 'POST', json=event)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         if return_json:
             return data
@@ -3213,7 +3923,7 @@ class Api(object):
         }
 
         resp = self._RequestUrl(url, 'POST', data=data)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         if return_json:
             return data
@@ -3264,7 +3974,7 @@ class Api(object):
         data.update(**kwargs)
 
         resp = self._RequestUrl(url, 'POST', data=data)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return User.NewFromJsonDict(data)
 
@@ -3321,7 +4031,7 @@ class Api(object):
             raise TwitterError("Specify at least one of user_id or screen_name.")
 
         resp = self._RequestUrl(url, 'POST', data=data)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return User.NewFromJsonDict(data)
 
@@ -3361,7 +4071,7 @@ class Api(object):
             raise TwitterError({'message': "Specify at least one of target_user_id or target_screen_name."})
 
         resp = self._RequestUrl(url, 'GET', data=data)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return data
 
@@ -3425,7 +4135,7 @@ class Api(object):
             raise TwitterError("Specify at least one of user_id or screen_name.")
 
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         if return_json:
             return data
@@ -3461,7 +4171,7 @@ class Api(object):
                 except ValueError:
                     raise TwitterError({'message': "cursor must be an integer"})
             resp = self._RequestUrl(url, 'GET', data=parameters)
-            data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+            data = self._ParseAndCheckTwitter(resp.content)
             result += [x for x in data['ids']]
             if 'next_cursor' in data:
                 if data['next_cursor'] == 0 or data['next_cursor'] == data['previous_cursor']:
@@ -3505,7 +4215,7 @@ class Api(object):
                 except ValueError:
                     raise TwitterError({'message': "cursor must be an integer"})
             resp = self._RequestUrl(url, 'GET', data=parameters)
-            data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+            data = self._ParseAndCheckTwitter(resp.content)
             result += [x for x in data['ids']]
             if 'next_cursor' in data:
                 if data['next_cursor'] == 0 or data['next_cursor'] == data['previous_cursor']:
@@ -3550,7 +4260,7 @@ class Api(object):
         data['include_entities'] = enf_type('include_entities', bool, include_entities)
 
         resp = self._RequestUrl(url, 'POST', data=data)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return Status.NewFromJsonDict(data)
 
@@ -3585,7 +4295,7 @@ class Api(object):
         data['include_entities'] = enf_type('include_entities', bool, include_entities)
 
         resp = self._RequestUrl(url, 'POST', data=data)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return Status.NewFromJsonDict(data)
 
@@ -3645,7 +4355,7 @@ class Api(object):
         parameters['include_entities'] = enf_type('include_entities', bool, include_entities)
 
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         if return_json:
             return data
@@ -3708,13 +4418,41 @@ class Api(object):
             parameters['count'] = enf_type('count', int, count)
 
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         if return_json:
             return data
         else:
             return [Status.NewFromJsonDict(x) for x in data]
 
+    def IterMentions(self,
+                     count=200,
+                     since_id=None,
+                     max_id=None,
+                     trim_user=False,
+                     contributor_details=False,
+                     include_entities=True):
+        """Iterate over the mentions of the authenticating user from the most
+        recent back to the oldest one Twitter returns (about 800) or to
+        since_id, fetching them a page at a time.
+
+        Takes the same arguments as GetMentions, count being the number of
+        statuses per request. Each request asks for the Tweets older than the
+        oldest one received so far, and Tweets received twice are dropped.
+
+        Yields:
+          A twitter.Status instance for each mention of the user.
+        """
+        return self._IterTimeline(self.GetMentions,
+                                  '%s/statuses/mentions_timeline.json' % self.base_url,
+                                  max_id,
+                                  None,
+                                  count=count,
+                                  since_id=since_id,
+                                  trim_user=trim_user,
+                                  contributor_details=contributor_details,
+                                  include_entities=include_entities)
+
     @staticmethod
     def _IDList(list_id, slug, owner_id, owner_screen_name):
         parameters = {}
@@ -3759,7 +4497,7 @@ class Api(object):
             parameters['description'] = description
 
         resp = self._RequestUrl(url, 'POST', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return List.NewFromJsonDict(data)
 
@@ -3798,7 +4536,7 @@ class Api(object):
                                        owner_screen_name=owner_screen_name))
 
         resp = self._RequestUrl(url, 'POST', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return List.NewFromJsonDict(data)
 
@@ -3835,7 +4573,7 @@ class Api(object):
                                        owner_screen_name=owner_screen_name))
 
         resp = self._RequestUrl(url, 'POST', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return User.NewFromJsonDict(data)
 
@@ -3873,7 +4611,7 @@ class Api(object):
                                        owner_screen_name=owner_screen_name))
 
         resp = self._RequestUrl(url, 'POST', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return List.NewFromJsonDict(data)
 
@@ -3940,7 +4678,7 @@ class Api(object):
             parameters['include_entities'] = True
 
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         if return_json:
             return data
@@ -3992,7 +4730,7 @@ class Api(object):
             parameters['screen_name'] = screen_name
 
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         if return_json:
             return data
@@ -4054,7 +4792,7 @@ class Api(object):
             parameters['screen_name'] = screen_name
 
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         if return_json:
             return data
@@ -4099,7 +4837,7 @@ class Api(object):
             parameters['reverse'] = enf_type('reverse', bool, reverse)
 
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         if return_json:
             return data
@@ -4179,7 +4917,7 @@ class Api(object):
             parameters['include_entities'] = enf_type('include_entities', bool, include_entities)
 
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         if return_json:
             return data
@@ -4243,7 +4981,7 @@ class Api(object):
         parameters['include_entities'] = enf_type('include_entities', bool, include_entities)
 
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
         next_cursor = data.get('next_cursor', 0)
         previous_cursor = data.get('previous_cursor', 0)
         users = [User.NewFromJsonDict(user) for user in data.get('users', [])]
@@ -4285,25 +5023,63 @@ class Api(object):
           list: A sequence of twitter.user.User instances, one for each
           member of the twitter.list.List.
         """
-        cursor = -1
-        result = []
-        while True:
-            next_cursor, previous_cursor, users = self.GetListMembersPaged(
-                list_id=list_id,
-                slug=slug,
-                owner_id=owner_id,
-                owner_screen_name=owner_screen_name,
-                cursor=cursor,
-                skip_status=skip_status,
-                include_entities=include_entities)
-            result += users
+        return list(self.IterListMembers(list_id=list_id,
+                                         slug=slug,
+                                         owner_id=owner_id,
+                                         owner_screen_name=owner_screen_name,
+                                         skip_status=skip_status,
+                                         include_entities=include_entities))
 
-            if next_cursor == 0:
-                break
-            else:
-                cursor = next_cursor
+    def IterListMembers(self,
+                        list_id=None,
+                        slug=None,
+                        owner_id=None,
+                        owner_screen_name=None,
+                        cursor=-1,
+                        count=100,
+                        skip_status=False,
+                        include_entities=False):
+        """Iterate over the twitter.User instances, one for each member of
+        the given list_id or slug, fetching them a page at a time.
 
-        return result
+        Args:
+          list_id (int, optional):
+            Specifies the ID of the list to retrieve.
+          slug (str, optional):
+            The slug name for the list to retrieve. If you specify None for the
+            list_id, then you have to provide either a owner_screen_name or
+            owner_id.
+          owner_id (int, optional):
+            Specifies the ID of the user for whom to return the
+            list timeline. Helpful for disambiguating when a valid user ID
+            is also a valid screen name.
+          owner_screen_name (str, optional):
+            Specifies the screen name of the user for whom to return the
+            user_timeline. Helpful for disambiguating when a valid screen
+            name is also a user ID.
+          cursor (int, optional):
+            The page to start at. Defaults to -1, the first page.
+          count (int, optional):
+            The number of users to return per page. Defaults to 100.
+          skip_status (bool, optional):
+            If True the statuses will not be returned in the user items. Defaults to False.
+          include_entities (bool, optional):
+            If False, the timeline will not contain additional metadata.
+            Defaults to False.
+
+        Yields:
+          A twitter.user.User instance for each member of the list.
+        """
+        return self._IterCursor(self.GetListMembersPaged,
+                                '%s/lists/members.json' % self.base_url,
+                                list_id=list_id,
+                                slug=slug,
+                                owner_id=owner_id,
+                                owner_screen_name=owner_screen_name,
+                                cursor=cursor,
+                                count=count,
+                                skip_status=skip_status,
+                                include_entities=include_entities)
 
     def CreateListsMember(self,
                           list_id=None,
@@ -4366,7 +5142,7 @@ class Api(object):
             url = '%s/lists/members/create.json' % self.base_url
 
         resp = self._RequestUrl(url, 'POST', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return List.NewFromJsonDict(data)
 
@@ -4430,7 +5206,7 @@ class Api(object):
             url = '%s/lists/members/destroy.json' % self.base_url
 
         resp = self._RequestUrl(url, 'POST', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return List.NewFromJsonDict(data)
 
@@ -4475,7 +5251,7 @@ class Api(object):
         parameters['cursor'] = enf_type('cursor', int, cursor)
 
         resp = self._RequestUrl(url, 'GET', data=parameters)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         next_cursor = data.get('next_cursor', 0)
         previous_cursor = data.get('previous_cursor', 0)
@@ -4511,22 +5287,39 @@ class Api(object):
         Returns:
           A sequence of twitter.List instances, one for each list
         """
-        result = []
-        cursor = -1
+        return list(self.IterLists(user_id=user_id,
+                                   screen_name=screen_name,
+                                   count=count))
+
+    def IterLists(self,
+                  user_id=None,
+                  screen_name=None,
+                  cursor=-1,
+                  count=20):
+        """Iterate over the lists of a user, fetching them a page at a time.
+        If no user_id or screen_name is passed, the lists are those of the
+        authenticated user.
 
-        while True:
-            next_cursor, prev_cursor, lists = self.GetListsPaged(
-                user_id=user_id,
-                screen_name=screen_name,
-                cursor=cursor,
-                count=count)
-            result += lists
-            if next_cursor == 0 or next_cursor == prev_cursor:
-                break
-            else:
-                cursor = next_cursor
+        Args:
+          user_id (int, optional):
+            The ID of the user for whom to return results for.
+          screen_name (str, optional):
+            The screen name of the user for whom to return results
+            for.
+          cursor (int, optional):
+            The page to start at. Defaults to -1, the first page.
+          count (int, optional):
+            The amount of results to return per page. Defaults to 20.
 
-        return result
+        Yields:
+          A twitter.List instance for each list.
+        """
+        return self._IterCursor(self.GetListsPaged,
+                                '%s/lists/ownerships.json' % self.base_url,
+                                user_id=user_id,
+                                screen_name=screen_name,
+                                cursor=cursor,
+                                count=count)
 
     def UpdateProfile(self,
                       name=None,
@@ -4572,7 +5365,7 @@ class Api(object):
         }
 
         resp = self._RequestUrl(url, 'POST', data=data)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return User.NewFromJsonDict(data)
 
@@ -4688,7 +5481,7 @@ class Api(object):
         resp = self._RequestStream(url, 'GET', data=parameters)
         for line in resp.iter_lines():
             if line:
-                data = self._ParseAndCheckTwitter(line.decode('utf-8'))
+                data = self._ParseAndCheckTwitter(line)
                 yield data
 
     def GetStreamFilter(self,
@@ -4746,7 +5539,7 @@ class Api(object):
         resp = self._RequestStream(url, 'POST', data=data)
         for line in resp.iter_lines():
             if line:
-                data = self._ParseAndCheckTwitter(line.decode('utf-8'))
+                data = self._ParseAndCheckTwitter(line)
                 yield data
 
     def GetUserStream(self,
@@ -4817,15 +5610,15 @@ class Api(object):
         # https://dev.twitter.com/streaming/overview/connecting
         for line in resp.iter_lines():
             if line:
-                data = self._ParseAndCheckTwitter(line.decode('utf-8'))
+                data = self._ParseAndCheckTwitter(line)
                 yield data
             elif include_keepalive:
                 yield None
 
-    def GetPlace(self, id):
+    def GetPlace(self, id, no_cache=False):
         url = '{}/geo/id/{}.json'.format(self.base_url, id)
-        resp = self._RequestUrl(url, 'GET')
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        resp = self._RequestUrl(url, 'GET', no_cache=no_cache)
+        data = self._ParseAndCheckTwitter(resp.content)
         return Place.NewFromJsonDict(data)
 
     def VerifyCredentials(self, include_entities=None, skip_status=None, include_email=None):
@@ -4857,7 +5650,7 @@ class Api(object):
         }
 
         resp = self._RequestUrl(url, 'GET', data)
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        data = self._ParseAndCheckTwitter(resp.content)
 
         return User.NewFromJsonDict(data)
 
@@ -4892,7 +5685,8 @@ class Api(object):
 
         Args:
           cache:
-            An instance that supports the same API as the twitter._FileCache
+            An instance that supports the same API as the twitter._FileCache,
+            such as twitter._MemoryCache or twitter._SQLiteCache.
         """
         if cache == DEFAULT_CACHE:
             self._cache = _FileCache()
@@ -4908,14 +5702,22 @@ class Api(object):
         """
         self._urllib = urllib
 
-    def SetCacheTimeout(self, cache_timeout):
+    def SetCacheTimeout(self, cache_timeout, endpoint=None):
         """Override the default cache timeout.
 
         Args:
           cache_timeout:
-            Time, in seconds, that responses should be reused.
+            Time, in seconds, that responses should be reused. Set to 0
+            to disable caching.
+          endpoint (str, optional):
+            The resource family to override the timeout for, as returned by
+            RateLimit.url_to_resource(), e.g. '/users/show/:id'. If not
+            given, the default timeout for all endpoints is changed.
         """
-        self._cache_timeout = cache_timeout
+        if endpoint is None:
+            self._cache_timeout = cache_timeout
+        else:
+            self._cache_timeouts[endpoint] = cache_timeout
 
     def SetUserAgent(self, user_agent):
         """Override the default user agent.
@@ -4968,17 +5770,12 @@ class Api(object):
             None.
 
         """
-        _sleep = self.sleep_on_rate_limit
-        if self.sleep_on_rate_limit:
-            self.sleep_on_rate_limit = False
-
         url = '%s/application/rate_limit_status.json' % self.base_url
 
-        resp = self._RequestUrl(url, 'GET')  # No-Cache
-        data = self._ParseAndCheckTwitter(resp.content.decode('utf-8'))
+        resp = self._RequestUrl(url, 'GET', no_cache=True, sleep_on_rate_limit=False)
+        data = self._ParseAndCheckTwitter(resp.content)
 
-        self.sleep_on_rate_limit = _sleep
-        self.rate_limit = RateLimit(**data)
+        self.rate_limit.load(data)
 
     def CheckRateLimit(self, url):
         """ Checks a URL to see the rate limit status for that endpoint.
@@ -4991,8 +5788,10 @@ class Api(object):
             namedtuple: EndpointRateLimit namedtuple.
 
         """
-        if not self.rate_limit.__dict__.get('resources', None):
-            self.InitializeRateLimit()
+        if not self.rate_limit.is_loaded():
+            with self._rate_limit_lock:
+                if not self.rate_limit.is_loaded():
+                    self.InitializeRateLimit()
 
         if url:
             limit = self.rate_limit.get_limit(url)
@@ -5023,6 +5822,20 @@ class Api(object):
         # Return the rebuilt URL
         return urlunparse((scheme, netloc, path, params, query, fragment))
 
+    def _InitializeSession(self, pool_connections, pool_maxsize, keep_alive):
+        # REST, upload and streaming requests all go through this session
+        # so that connections, and their TLS handshakes, are reused.
+        self._pool_maxsize = pool_maxsize
+        self._keep_alive = keep_alive
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_connections,
+                                                pool_maxsize=pool_maxsize)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._session.headers['Accept-Encoding'] = self._GetAcceptEncoding()
+        if not keep_alive:
+            self._session.headers['Connection'] = 'close'
+
     def _InitializeRequestHeaders(self, request_headers):
         if request_headers:
             self._request_headers = request_headers
@@ -5037,14 +5850,10 @@ class Api(object):
     def _InitializeDefaultParameters(self):
         self._default_params = {}
 
-    @staticmethod
-    def _DecompressGzippedResponse(response):
-        raw_data = response.read()
-        if response.headers.get('content-encoding', None) == 'gzip':
-            url_data = gzip.GzipFile(fileobj=io.StringIO(raw_data)).read()
-        else:
-            url_data = raw_data
-        return url_data
+    def _GetAcceptEncoding(self):
+        if self._use_gzip:
+            return 'gzip, deflate'
+        return 'identity'
 
     @staticmethod
     def _EncodeParameters(parameters):
@@ -5073,15 +5882,17 @@ class Api(object):
             return urlencode(params)
 
     def _ParseAndCheckTwitter(self, json_data):
-        """Try and parse the JSON returned from Twitter and return
-        an empty dictionary if there is any error.
+        """Try and parse the JSON returned from Twitter, as bytes or text,
+        and return an empty dictionary if there is any error.
 
         This is a purely defensive check because during some Twitter
         network outages it will return an HTML failwhale page.
         """
         try:
-            data = json.loads(json_data)
+            data = self.json_codec.loads(json_data)
         except ValueError:
+            if isinstance(json_data, bytes):
+                json_data = json_data.decode('utf-8', 'replace')
             if "<title>Twitter / Over capacity</title>" in json_data:
                 raise TwitterError({'message': "Capacity Error"})
             if "<title>Twitter / Error</title>" in json_data:
@@ -5090,7 +5901,7 @@ class Api(object):
                 raise TwitterError({'message': "Exceeded connection limit for user"})
             if "Error 401 Unauthorized" in json_data:
                 raise TwitterError({'message': "Unauthorized"})
-            raise TwitterError({'message': 'Unknown error': '{0}'.format(json_data)})
+            raise TwitterError({'Unknown error': '{0}'.format(json_data)})
         self._CheckForTwitterError(data)
         return data
 
@@ -5115,20 +5926,58 @@ class Api(object):
 
     def _RequestChunkedUpload(self, url, headers, data):
         try:
-            return requests.post(
-                url,
-                headers=headers,
-                data=data,
-                auth=self.__auth,
-                timeout=self._timeout,
-                proxies=self.proxies,
-                verify=self.verify_ssl,
-                cert=self.cert_ssl
-            )
+            return self._Send('POST', url, headers=headers, data=data)
         except requests.RequestException as e:
             raise TwitterError(str(e))
 
-    def _RequestUrl(self, url, verb, data=None, json=None, enforce_auth=True):
+    def _GetCacheTimeout(self, url):
+        """Return the number of seconds a response from url may be reused
+        for, or 0 if it should not be cached at all."""
+        if self._cache is None:
+            return 0
+        return self._cache_timeouts.get(RateLimit.url_to_resource(url),
+                                        self._cache_timeout)
+
+    def _GetCacheKey(self, url):
+        """Build the cache key for a GET request to url.
+
+        The query string is sorted so that the order in which parameters were
+        given does not matter and the key is scoped to the authenticated
+        identity, since most responses differ between users.
+        """
+        (scheme, netloc, path, params, query, fragment) = urlparse(url)
+        query = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+        url = urlunparse((scheme, netloc, path, params, query, fragment))
+        return '%s:%s:%s' % (self._consumer_key, self._access_token_key, url)
+
+    def _GetCachedResponse(self, key, url, cache_timeout):
+        """Return a response rebuilt from the cache, or None if there is no
+        entry for key or it is older than cache_timeout seconds."""
+        # Check the age first and drop an entry too old to be used, so that
+        # caches counting their hits and misses, like _MemoryCache, count
+        # the lookup as a miss.
+        last_cached = self._cache.GetCachedTime(key)
+        if last_cached and time.time() >= last_cached + cache_timeout:
+            self._cache.Remove(key)
+        content = self._cache.Get(key)
+        if content is None:
+            return None
+
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.url = url
+        resp.encoding = 'utf-8'
+        resp._content = content.encode('utf-8')
+        return resp
+
+    def _RequestUrl(self,
+                    url,
+                    verb,
+                    data=None,
+                    json=None,
+                    enforce_auth=True,
+                    no_cache=False,
+                    sleep_on_rate_limit=None):
         """Request a url.
 
         Args:
@@ -5138,50 +5987,189 @@ class Api(object):
                 Either POST or GET.
             data:
                 A dict of (str, unicode) key/value pairs.
+            no_cache:
+                If True, a GET request always goes to Twitter, ignoring and
+                not updating the cache.
+            sleep_on_rate_limit:
+                Overrides Api.sleep_on_rate_limit for this request.
 
         Returns:
             A JSON object.
         """
-        if enforce_auth:
-            if not self.__auth:
-                raise TwitterError("The twitter.Api instance must be authenticated.")
+        if enforce_auth and not self.__auth:
+            raise TwitterError("The twitter.Api instance must be authenticated.")
 
-            if url and self.sleep_on_rate_limit:
-                limit = self.CheckRateLimit(url)
+        if sleep_on_rate_limit is None:
+            sleep_on_rate_limit = self.sleep_on_rate_limit or self.raise_on_rate_limit
 
-                if limit.remaining == 0:
-                    try:
-                        stime = max(int(limit.reset - time.time()) + 10, 0)
-                        logger.debug('Rate limited requesting [%s], sleeping for [%s]', url, stime)
-                        time.sleep(stime)
-                    except ValueError:
-                        pass
+        # Copy the caller's parameters instead of adding tweet_mode to them,
+        # the same dict may be in use by another thread.
+        data = dict(data or {})
+        data['tweet_mode'] = self.tweet_mode
 
-        if not data:
-            data = {}
+        cache_key = None
+        if verb == 'GET':
+            url = self._BuildUrl(url, extra_params=data)
+            cache_timeout = 0 if no_cache else self._GetCacheTimeout(url)
+            if cache_timeout:
+                cache_key = self._GetCacheKey(url)
+                resp = self._GetCachedResponse(cache_key, url, cache_timeout)
+                if resp is not None:
+                    return resp
+
+        reserved = False
+        if enforce_auth and url and sleep_on_rate_limit and self.raise_on_rate_limit:
+            self._ReserveOrRaise(url, self.CheckRateLimit(url))
+            reserved = True
+        elif enforce_auth and url and sleep_on_rate_limit:
+            limit = self.CheckRateLimit(url)
+
+            if self.rate_limit_scheduler is not None:
+                self.rate_limit_scheduler.Acquire(url, limit)
+            elif limit.remaining == 0:
+                try:
+                    stime = max(int(limit.reset - time.time()) + 10, 0)
+                    logger.debug('Rate limited requesting [%s], sleeping for [%s]', url, stime)
+                    time.sleep(stime)
+                except ValueError:
+                    pass
 
-        data['tweet_mode'] = self.tweet_mode
+            # With a rate limit shared between processes, others may have
+            # used up the remaining requests in the meantime.
+            while not self.rate_limit.reserve(url):
+                stime = self._GetReservationWait(url)
+                logger.debug('Rate limited requesting [%s], sleeping for [%s]', url, stime)
+                time.sleep(stime)
+            reserved = True
 
-        if verb == 'POST':
-            if data:
-                if 'media_ids' in data:
-                    url = self._BuildUrl(url, extra_params={'media_ids': data['media_ids']})
-                    resp = self._session.post(url, data=data, auth=self.__auth, timeout=self._timeout, proxies=self.proxies, verify=self.verify_ssl, cert=self.cert_ssl)
-                elif 'media' in data:
-                    resp = self._session.post(url, files=data, auth=self.__auth, timeout=self._timeout, proxies=self.proxies, verify=self.verify_ssl, cert=self.cert_ssl)
+        try:
+            if verb == 'POST':
+                if data:
+                    if 'media_ids' in data:
+                        url = self._BuildUrl(url, extra_params={'media_ids': data['media_ids']})
+                        resp = self._Send('POST', url, data=data)
+                    elif 'media' in data:
+                        resp = self._Send('POST', url, files=data)
+                    else:
+                        resp = self._Send('POST', url, data=data)
+                elif json:
+                    resp = self._Send('POST', url, json=json)
                 else:
-                    resp = self._session.post(url, data=data, auth=self.__auth, timeout=self._timeout, proxies=self.proxies, verify=self.verify_ssl, cert=self.cert_ssl)
-            elif json:
-                resp = self._session.post(url, json=json, auth=self.__auth, timeout=self._timeout, proxies=self.proxies, verify=self.verify_ssl, cert=self.cert_ssl)
-            else:
-                resp = 0  # POST request, but without data or json
+                    resp = 0  # POST request, but without data or json
 
-        elif verb == 'GET':
-            url = self._BuildUrl(url, extra_params=data)
-            resp = self._session.get(url, auth=self.__auth, timeout=self._timeout, proxies=self.proxies, verify=self.verify_ssl, cert=self.cert_ssl)
+            elif verb == 'GET':
+                # The thread that sent the request has cached it and updated
+                # the rate limit before sharing it.
+                resp, _ = self._GetSingleFlight(url, no_cache, cache_key)
+                return resp
 
+            else:
+                resp = 0  # if not a POST or GET request
+
+            self._RecordResponse(url, resp)
+            return resp
+        finally:
+            if reserved:
+                self.rate_limit.release(url)
+
+    def _ReserveOrRaise(self, url, limit):
+        """Reserve a request to url if it can be sent right away, else raise
+        a RateLimitExceeded with the time to wait."""
+        retry_after = 0
+        if self.rate_limit_scheduler is not None:
+            if not self.rate_limit_scheduler.Acquire(url, limit, blocking=False):
+                retry_after = self.rate_limit_scheduler.EstimateWait(url, limit)
+        elif limit.remaining == 0:
+            retry_after = max(int(limit.reset - time.time()) + 10, 0)
+        if not retry_after and not self.rate_limit.reserve(url):
+            retry_after = self._GetReservationWait(url)
+        if retry_after:
+            raise RateLimitExceeded(RateLimit.url_to_resource(url), limit.reset, retry_after)
+
+    def _GetRemaining(self, url):
+        """Return the number of requests to url that can be sent before the
+        rate limit is reached: the full limit once the window has reset, as
+        the remaining count is then stale."""
+        limit = self.rate_limit.get_limit(url)
+        if limit.reset <= time.time():
+            return limit.limit
+        return limit.remaining
+
+    def _GetReservationWait(self, url):
+        """Return how long to wait before trying again to reserve a request
+        to url: until the reset if the window is used up, else briefly, for
+        the requests in flight to finish."""
+        limit = self.rate_limit.get_limit(url)
+        if limit.remaining == 0 and limit.reset > time.time():
+            return max(limit.reset - time.time(), 0) + 10
+        return 1
+
+    def _Send(self, verb, url, **kwargs):
+        """Send a request through the session, retrying it as allowed by
+        the retry policy."""
+        attempt = 0
+        while True:
+            attempt += 1
+            start = time.time()
+            resp = error = None
+            try:
+                resp = self._session.request(verb, url, auth=self.__auth, timeout=self._timeout, proxies=self.proxies, verify=self.verify_ssl, cert=self.cert_ssl, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            if self.telemetry is not None:
+                self._RecordTelemetry(verb, url, resp, error, time.time() - start)
+            if resp is not None and resp.status_code == 429 and self.raise_on_rate_limit:
+                # Retrying would mean sleeping until the window resets.
+                if self.retry_policy is not None:
+                    self.retry_policy.Record(url, verb, attempt, 429, elapsed=time.time() - start)
+                raise self._GetRateLimitExceeded(url, resp.headers)
+            if resp is not None and resp.status_code == 429 and self._pooled:
+                if self.retry_policy is not None:
+                    self.retry_policy.Record(url, verb, attempt, 429, elapsed=time.time() - start)
+                return resp
+            if self.retry_policy is None:
+                if error is not None:
+                    raise error
+                return resp
+
+            status = resp.status_code if resp is not None else None
+            headers = resp.headers if resp is not None else None
+            delay = self.retry_policy.GetDelay(verb, attempt, status, headers, error)
+            self.retry_policy.Record(url, verb, attempt, status, error, time.time() - start, delay)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return resp
+            time.sleep(delay)
+
+    def _GetRateLimitExceeded(self, url, headers):
+        """Record the rate limit sent with a 429 response to url and return
+        the RateLimitExceeded to raise in its place."""
+        try:
+            reset = int(headers.get('x-rate-limit-reset'))
+        except (TypeError, ValueError):
+            reset = 0
+        if reset:
+            self.rate_limit.set_limit(url,
+                                      headers.get('x-rate-limit-limit', 0),
+                                      headers.get('x-rate-limit-remaining', 0),
+                                      reset)
+        delay = RetryPolicy._GetServerDelay(429, headers)
+        retry_after = 60 if delay is None else max(int(math.ceil(delay)), 1)
+        return RateLimitExceeded(RateLimit.url_to_resource(url), reset, retry_after)
+
+    def _RecordTelemetry(self, verb, url, resp, error, elapsed):
+        if resp is None:
+            self.telemetry.Record(url, verb, elapsed=elapsed, error=error)
         else:
-            resp = 0  # if not a POST or GET request
+            self.telemetry.Record(url, verb, resp.status_code, elapsed,
+                                  len(resp.content), resp.headers)
+
+    def _RecordResponse(self, url, resp, cache_key=None):
+        """Cache the response to a request to url under cache_key, if given,
+        and update the rate limit from its headers."""
+        if cache_key and resp.status_code == 200:
+            self._cache.Set(cache_key, resp.content.decode('utf-8'))
 
         if url and self.rate_limit and resp:
             limit = resp.headers.get('x-rate-limit-limit', 0)
@@ -5190,7 +6178,90 @@ class Api(object):
 
             self.rate_limit.set_limit(url, limit, remaining, reset)
 
-        return resp
+    def _GetSingleFlight(self, url, no_cache=False, cache_key=None):
+        """GET url, or wait for an identical request already in flight in
+        another thread and share its response.
+
+        Requests are identical if they have the same cache key, that is the
+        same url, parameters and credentials. With no_cache the request is
+        always sent. The response is cached under cache_key, if given, and
+        recorded in the rate limit before the waiting threads get it, so that
+        a request arriving in between finds it in the cache.
+
+        Returns:
+            A tuple of the response and whether it was shared.
+        """
+        if no_cache:
+            resp = self._Send('GET', url)
+            self._RecordResponse(url, resp)
+            return resp, False
+
+        key = self._GetCacheKey(url)
+        with self._in_flight_lock:
+            request = self._in_flight.get(key)
+            leader = request is None
+            if leader:
+                request = self._in_flight[key] = _InFlightRequest()
+            else:
+                self.coalesced_requests += 1
+
+        if not leader:
+            request.done.wait()
+            if request.error is not None:
+                raise request.error
+            return request.response, True
+
+        try:
+            request.response = self._Send('GET', url)
+            self._RecordResponse(url, request.response, cache_key)
+        except Exception as e:
+            request.error = e
+            raise
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+            request.done.set()
+        return request.response, False
+
+    def _RequestUrls(self, url, parameters, max_workers=None, ordered=True, no_cache=False,
+                     empty_codes=()):
+        """GET url once for each dict of parameters and yield the parsed
+        responses in the same order, or as they arrive if ordered is False.
+
+        With max_workers greater than 1 the requests are made from a pool of
+        threads. Each round of requests is limited to the remaining rate
+        limit for the endpoint, or to its full limit once the window has
+        reset, so that a large batch does not fail half way through with rate
+        limit errors. A response with only errors whose codes are in
+        empty_codes is yielded as an empty list instead of raising.
+        """
+        def fetch(data):
+            resp = self._RequestUrl(url, 'GET', data=data, no_cache=no_cache)
+            try:
+                return self._ParseAndCheckTwitter(resp.content)
+            except TwitterError as e:
+                if _HasOnlyErrorCodes(e, empty_codes):
+                    return []
+                raise
+
+        if not max_workers or max_workers <= 1 or len(parameters) <= 1:
+            for data in parameters:
+                yield fetch(data)
+            return
+
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            offset = 0
+            while offset < len(parameters):
+                remaining = self._GetRemaining(url)
+                batch = parameters[offset:offset + max(1, min(max_workers, remaining))]
+                futures = [executor.submit(fetch, data) for data in batch]
+                if not ordered:
+                    futures = as_completed(futures)
+                for future in futures:
+                    yield future.result()
+                offset += len(batch)
 
     def _RequestStream(self, url, verb, data=None, session=None):
         """Request a stream of data.
@@ -5206,11 +6277,14 @@ class Api(object):
            Returns:
              A twitter stream.
         """
-        session = session or requests.Session()
+        session = session or self._session
+        # requests decompresses the stream as it is read by iter_lines().
+        headers = {'Accept-Encoding': self._GetAcceptEncoding()}
 
         if verb == 'POST':
             try:
                 return session.post(url, data=data, stream=True,
+                                    headers=headers,
                                     auth=self.__auth,
                                     timeout=self._timeout,
                                     proxies=self.proxies,
@@ -5221,7 +6295,8 @@ class Api(object):
         if verb == 'GET':
             url = self._BuildUrl(url, extra_params=data)
             try:
-                return session.get(url, stream=True, auth=self.__auth,
+                return session.get(url, stream=True, headers=headers,
+                                   auth=self.__auth,
                                    timeout=self._timeout, proxies=self.proxies,
                                    verify=self.verify_ssl, cert=self.cert_ssl)
             except requests.RequestException as e:
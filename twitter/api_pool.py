@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+
+#
+#
+# Copyright 2007-2016, 2018 The Python-Twitter Developers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A twitter.Api that spreads its reads over several credentials."""
+
+import threading
+
+from twitter.api import Api
+from twitter.error import RateLimitExceeded, TwitterError
+from twitter.ratelimit import RateLimit
+
+# Resources whose response depends on the authenticated user, requests to
+# them always use the first credentials.
+IDENTITY_RESOURCES = (
+    '/account/',
+    '/application/',
+    '/blocks/',
+    '/direct_messages',
+    '/favorites/list',
+    '/friendships/incoming',
+    '/friendships/lookup',
+    '/friendships/no_retweets',
+    '/friendships/outgoing',
+    '/friendships/show',
+    '/lists/list',
+    '/lists/memberships',
+    '/lists/ownerships',
+    '/lists/subscriptions',
+    '/mutes/',
+    '/saved_searches/',
+    '/statuses/home_timeline',
+    '/statuses/mentions_timeline',
+    '/statuses/retweets_of_me',
+)
+
+
+class ApiPool(Api):
+    """A twitter.Api holding several sets of credentials, each with its own
+    rate limits.
+
+    Every GET request is sent with the credentials that have the most
+    requests left for its endpoint, and sent again with the next ones if
+    Twitter answers 429. The pool itself is authenticated with the first
+    credentials, which are used for everything that acts as a user: POST
+    requests, streams, uploads and the reads listed in IDENTITY_RESOURCES.
+    A 429 is not retried by the retry_policy, the request moves to the next
+    credentials instead; with raise_on_rate_limit, the RateLimitExceeded
+    with the shortest wait is raised once every credential has been tried.
+    Calls that default to the authenticated user when no user is given, such
+    as GetFollowers(), may be answered for any of the credentials; pass the
+    user explicitly or make them on pool.apis[0]::
+
+        >>> pool = twitter.ApiPool([
+        ...     {'consumer_key': ..., 'consumer_secret': ...,
+        ...      'access_token_key': ..., 'access_token_secret': ...},
+        ...     {'consumer_key': ..., 'consumer_secret': ...,
+        ...      'application_only_auth': True},
+        ... ], sleep_on_rate_limit=True)
+        >>> pool.GetUser(screen_name='twitter')
+        >>> pool.Stats()
+    """
+
+    def __init__(self, credentials, **kwargs):
+        """Instantiate a new twitter.ApiPool object.
+
+        Args:
+          credentials (list):
+            One dict of consumer_key, consumer_secret, access_token_key,
+            access_token_secret and application_only_auth arguments per set
+            of credentials.
+          **kwargs:
+            Other twitter.Api arguments, used for every set of credentials.
+            Each one has its own rate limits, so rate_limit may not be given,
+            and is paced on its own: the rate_limit_scheduler, if any, is
+            used by the first credentials and the others get a new one with
+            the same burst and margin.
+        """
+        if not credentials:
+            raise TwitterError({'message': "ApiPool requires at least one set of credentials"})
+        if kwargs.get('rate_limit') is not None:
+            raise TwitterError({'message': "Each set of credentials of an ApiPool has its own rate limit"})
+
+        scheduler = kwargs.get('rate_limit_scheduler')
+
+        def member(c):
+            if scheduler is not None:
+                # A scheduler paces a single set of credentials.
+                c = dict(c, rate_limit_scheduler=type(scheduler)(
+                    burst=scheduler.burst, margin=scheduler.margin))
+            return Api(**dict(kwargs, **c))
+
+        super(ApiPool, self).__init__(**dict(kwargs, **credentials[0]))
+        self.apis = [self] + [member(c) for c in credentials[1:]]
+        for api in self.apis:
+            api._pooled = True
+        self._usage = [{'requests': 0, 'rate_limited': 0} for _ in self.apis]
+        self._next = 0
+        self._pool_lock = threading.Lock()
+
+    def Stats(self):
+        """Return a list with, for each set of credentials, its keys, the
+        number of requests it made and of those rejected with a 429, and its
+        rate limits by resource family."""
+        with self._pool_lock:
+            usage = [dict(u) for u in self._usage]
+        for api, stats in zip(self.apis, usage):
+            stats['consumer_key'] = api._consumer_key
+            stats['access_token_key'] = api._access_token_key
+            stats['resources'] = api.rate_limit._GetResources()
+        return usage
+
+    def _RequestUrl(self, url, verb, data=None, json=None, enforce_auth=True,
+                    no_cache=False, sleep_on_rate_limit=None):
+        if verb != 'GET' or self._IsIdentityResource(url):
+            candidates = [0]
+        else:
+            candidates = self._RankCredentials(url)
+
+        resp = error = None
+        for i in candidates:
+            api = self.apis[i]
+            request = super(ApiPool, self)._RequestUrl if api is self else api._RequestUrl
+            try:
+                resp = request(url, verb, data=data, json=json, enforce_auth=enforce_auth,
+                               no_cache=no_cache, sleep_on_rate_limit=sleep_on_rate_limit)
+            except RateLimitExceeded as e:
+                with self._pool_lock:
+                    self._usage[i]['rate_limited'] += 1
+                if error is None or e.retry_after < error.retry_after:
+                    error = e
+                continue
+            with self._pool_lock:
+                self._usage[i]['requests'] += 1
+                if resp is not None and getattr(resp, 'status_code', None) == 429:
+                    self._usage[i]['rate_limited'] += 1
+                    continue
+            return resp
+        if error is not None:
+            raise error
+        return resp
+
+    def _RankCredentials(self, url):
+        """Return the indexes of the credentials ordered by the number of
+        requests they have left for url, the ones with a window that is over
+        first. Ties are broken in turn so that unused credentials share the
+        load."""
+        with self._pool_lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.apis)
+
+        order = [(start + i) % len(self.apis) for i in range(len(self.apis))]
+        return sorted(order, key=lambda i: Api._GetRemaining(self.apis[i], url), reverse=True)
+
+    def _GetRemaining(self, url):
+        """Return the number of requests to url the credentials that may
+        send it can make together, so that GetStatuses() and UsersLookup()
+        size their concurrent batches from the whole pool."""
+        if self._IsIdentityResource(url):
+            return Api._GetRemaining(self, url)
+        return sum(Api._GetRemaining(api, url) for api in self.apis)
+
+    @staticmethod
+    def _IsIdentityResource(url):
+        resource = RateLimit.url_to_resource(url)
+        return any(resource.startswith(prefix) for prefix in IDENTITY_RESOURCES)
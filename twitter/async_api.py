@@ -0,0 +1,960 @@
+#!/usr/bin/env python
+
+#
+#
+# Copyright 2007-2016, 2018 The Python-Twitter Developers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""An asyncio interface to the Twitter API.
+
+This module requires Python 3.6 or later and the aiohttp package.
+"""
+
+import asyncio
+import logging
+import time
+
+from oauthlib.oauth1 import Client as OAuth1Client
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    from urllib.parse import urlencode
+except ImportError:
+    from urllib import urlencode
+
+from twitter import (
+    Status,
+    User,
+)
+from twitter.api import NO_USER_MATCHES, Api, _HasOnlyErrorCodes
+from twitter.error import RateLimitExceeded, TwitterError
+from twitter._memory_cache import _MemoryCache
+from twitter.id_set import _IDSetBuilder
+from twitter.ratelimit import RateLimit
+from twitter.twitter_utils import enf_type
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncApi(object):
+    """An asyncio interface to the main read endpoints of the Twitter API.
+
+    An AsyncApi wraps a twitter.Api, which holds the credentials, cache and
+    rate limits and parses the responses; the requests themselves are made
+    with aiohttp, so a single event loop can have thousands of them in
+    flight. Every method is a coroutine mirroring the twitter.Api method of
+    the same name, except for the streaming methods, which are asynchronous
+    generators.
+
+    Example usage:
+
+        >>> import asyncio
+        >>> import twitter
+        >>> async def main():
+        ...     async with twitter.AsyncApi(consumer_key='consumer key',
+        ...                                 consumer_secret='consumer secret',
+        ...                                 access_token_key='access token',
+        ...                                 access_token_secret='access token secret') as api:
+        ...         timelines = await asyncio.gather(
+        ...             *[api.GetUserTimeline(screen_name=s) for s in screen_names])
+        >>> asyncio.run(main())
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Instantiate a new twitter.AsyncApi object.
+
+        Takes the same arguments as twitter.Api, plus:
+
+        Args:
+          api (twitter.Api, optional):
+            An existing Api instance to share credentials, cache and rate
+            limits with. If given, no other argument may be passed.
+          connection_limit (int, optional):
+            The maximum number of simultaneous connections. Defaults to 100.
+        """
+        if aiohttp is None:
+            raise TwitterError({'message': "AsyncApi requires the aiohttp package"})
+
+        self._connection_limit = kwargs.pop('connection_limit', 100)
+        api = kwargs.pop('api', None)
+        if api is None:
+            api = Api(*args, **kwargs)
+        elif args or kwargs:
+            raise TwitterError({'message': "Pass either an Api instance or Api arguments, not both"})
+        self.api = api
+        self._session = None
+        self._rate_limit_lock = None
+
+    @property
+    def rate_limit(self):
+        return self.api.rate_limit
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.Close()
+
+    async def Close(self):
+        """Close the connections held by this instance."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def InitializeRateLimit(self):
+        """Fetch the rate limit status for the currently authenticated user
+        or application, see twitter.Api.InitializeRateLimit.
+        """
+        url = '%s/application/rate_limit_status.json' % self.api.base_url
+        data = await self._RequestUrl(url, 'GET', no_cache=True, sleep_on_rate_limit=False)
+        await self._RunBlocking(self.rate_limit, self.rate_limit.load, data)
+
+    async def CheckRateLimit(self, url):
+        """Return the rate limit status of the endpoint for url as an
+        EndpointRateLimit namedtuple, see twitter.Api.CheckRateLimit.
+        """
+        if not self.rate_limit.is_loaded():
+            if self._rate_limit_lock is None:
+                self._rate_limit_lock = asyncio.Lock()
+            async with self._rate_limit_lock:
+                if not self.rate_limit.is_loaded():
+                    await self.InitializeRateLimit()
+        return await self._RunBlocking(self.rate_limit, self.rate_limit.get_limit, url)
+
+    async def GetHomeTimeline(self,
+                              count=None,
+                              since_id=None,
+                              max_id=None,
+                              trim_user=False,
+                              exclude_replies=False,
+                              contributor_details=False,
+                              include_entities=True):
+        """Fetch the most recent Tweets and retweets posted by the
+        authenticating user and the users they follow.
+
+        See twitter.Api.GetHomeTimeline for the arguments.
+
+        Returns:
+          A sequence of twitter.Status instances, one for each message
+        """
+        url = '%s/statuses/home_timeline.json' % self.api.base_url
+        parameters = {}
+        if count is not None:
+            count = enf_type('count', int, count)
+            if count > 200:
+                raise TwitterError({'message': "'count' may not be greater than 200"})
+            parameters['count'] = count
+        if since_id:
+            parameters['since_id'] = enf_type('since_id', int, since_id)
+        if max_id:
+            parameters['max_id'] = enf_type('max_id', int, max_id)
+        if trim_user:
+            parameters['trim_user'] = 1
+        if exclude_replies:
+            parameters['exclude_replies'] = 1
+        if contributor_details:
+            parameters['contributor_details'] = 1
+        if not include_entities:
+            parameters['include_entities'] = 'false'
+
+        data = await self._RequestUrl(url, 'GET', data=parameters)
+        return [Status.NewFromJsonDict(x) for x in data]
+
+    async def GetUserTimeline(self,
+                              user_id=None,
+                              screen_name=None,
+                              since_id=None,
+                              max_id=None,
+                              count=None,
+                              include_rts=True,
+                              trim_user=False,
+                              exclude_replies=False):
+        """Fetch the sequence of public Status messages for a single user.
+
+        See twitter.Api.GetUserTimeline for the arguments.
+
+        Returns:
+          A sequence of Status instances, one for each message up to count
+        """
+        url = '%s/statuses/user_timeline.json' % self.api.base_url
+        parameters = {}
+        if user_id:
+            parameters['user_id'] = enf_type('user_id', int, user_id)
+        elif screen_name:
+            parameters['screen_name'] = screen_name
+        if since_id:
+            parameters['since_id'] = enf_type('since_id', int, since_id)
+        if max_id:
+            parameters['max_id'] = enf_type('max_id', int, max_id)
+        if count:
+            parameters['count'] = enf_type('count', int, count)
+        parameters['include_rts'] = enf_type('include_rts', bool, include_rts)
+        parameters['trim_user'] = enf_type('trim_user', bool, trim_user)
+        parameters['exclude_replies'] = enf_type('exclude_replies', bool, exclude_replies)
+
+        data = await self._RequestUrl(url, 'GET', data=parameters)
+        return [Status.NewFromJsonDict(x) for x in data]
+
+    async def GetMentions(self,
+                          count=None,
+                          since_id=None,
+                          max_id=None,
+                          trim_user=False,
+                          contributor_details=False,
+                          include_entities=True):
+        """Return the most recent mentions for the authenticating user.
+
+        See twitter.Api.GetMentions for the arguments.
+
+        Returns:
+          A sequence of twitter.Status instances, one for each mention of the user.
+        """
+        url = '%s/statuses/mentions_timeline.json' % self.api.base_url
+        parameters = {
+            'contributor_details': bool(contributor_details),
+            'include_entities': bool(include_entities),
+            'max_id': max_id,
+            'since_id': since_id,
+            'trim_user': bool(trim_user),
+        }
+        if count:
+            parameters['count'] = enf_type('count', int, count)
+
+        data = await self._RequestUrl(url, 'GET', data=parameters)
+        return [Status.NewFromJsonDict(x) for x in data]
+
+    async def GetStatus(self,
+                        status_id,
+                        trim_user=False,
+                        include_my_retweet=True,
+                        include_entities=True,
+                        include_ext_alt_text=True,
+                        no_cache=False):
+        """Return a single status message.
+
+        See twitter.Api.GetStatus for the arguments.
+
+        Returns:
+          A twitter.Status instance representing that status message
+        """
+        url = '%s/statuses/show.json' % self.api.base_url
+        parameters = {
+            'id': enf_type('status_id', int, status_id),
+            'trim_user': enf_type('trim_user', bool, trim_user),
+            'include_my_retweet': enf_type('include_my_retweet', bool, include_my_retweet),
+            'include_entities': enf_type('include_entities', bool, include_entities),
+            'include_ext_alt_text': enf_type('include_ext_alt_text', bool, include_ext_alt_text)
+        }
+
+        data = await self._RequestUrl(url, 'GET', data=parameters, no_cache=no_cache)
+        return Status.NewFromJsonDict(data)
+
+    async def GetStatuses(self,
+                          status_ids,
+                          trim_user=False,
+                          include_entities=True,
+                          map=False):
+        """Return a list of status messages. The statuses are fetched 100 at
+        a time, with as many requests in flight at once as the rate limit
+        allows.
+
+        See twitter.Api.GetStatuses for the arguments.
+
+        Returns:
+          A dictionary or unordered list (depending on the parameter 'map') of
+          twitter Status instances representing the status messages.
+        """
+        url = '%s/statuses/lookup.json' % self.api.base_url
+        map = enf_type('map', bool, map)
+        status_ids = [enf_type('status_id', int, status_id) for status_id in status_ids]
+
+        parameters = []
+        for offset in range(0, len(status_ids), 100):
+            parameters.append({
+                'trim_user': enf_type('trim_user', bool, trim_user),
+                'include_entities': enf_type('include_entities', bool, include_entities),
+                'map': map,
+                'id': ','.join([str(status_id) for status_id in status_ids[offset:offset + 100]]),
+            })
+        pages = await self._RequestUrls(url, parameters)
+
+        if map:
+            result = {}
+            for data in pages:
+                result.update({int(key): (Status.NewFromJsonDict(value) if value else None)
+                               for key, value in data['id'].items()})
+        else:
+            result = []
+            for data in pages:
+                result += [Status.NewFromJsonDict(dataitem) for dataitem in data]
+        return result
+
+    async def GetSearch(self,
+                        term=None,
+                        raw_query=None,
+                        geocode=None,
+                        since_id=None,
+                        max_id=None,
+                        until=None,
+                        since=None,
+                        count=15,
+                        lang=None,
+                        locale=None,
+                        result_type="mixed",
+                        include_entities=None,
+                        return_json=False):
+        """Return twitter search results for a given term.
+
+        See twitter.Api.GetSearch for the arguments.
+
+        Returns:
+          list: A sequence of twitter.Status instances, one for each message
+          containing the term, within the bounds of the geocoded area, or
+          given by the raw_query.
+        """
+        url = '%s/search/tweets.json' % self.api.base_url
+        parameters = {}
+        if since_id:
+            parameters['since_id'] = enf_type('since_id', int, since_id)
+        if max_id:
+            parameters['max_id'] = enf_type('max_id', int, max_id)
+        if until:
+            parameters['until'] = enf_type('until', str, until)
+        if since:
+            parameters['since'] = enf_type('since', str, since)
+        if lang:
+            parameters['lang'] = enf_type('lang', str, lang)
+        if locale:
+            parameters['locale'] = enf_type('locale', str, locale)
+
+        if term is None and geocode is None and raw_query is None:
+            return []
+
+        if term is not None:
+            parameters['q'] = term
+        if geocode is not None:
+            if isinstance(geocode, list) or isinstance(geocode, tuple):
+                parameters['geocode'] = ','.join([str(geo) for geo in geocode])
+            else:
+                parameters['geocode'] = enf_type('geocode', str, geocode)
+        if include_entities:
+            parameters['include_entities'] = enf_type('include_entities', bool, include_entities)
+        parameters['count'] = enf_type('count', int, count)
+        if result_type in ["mixed", "popular", "recent"]:
+            parameters['result_type'] = result_type
+
+        if raw_query is not None:
+            url = "{url}?{raw_query}".format(url=url, raw_query=raw_query)
+
+        data = await self._RequestUrl(url, 'GET', data=parameters)
+        if return_json:
+            return data
+        return [Status.NewFromJsonDict(x) for x in data.get('statuses', '')]
+
+    async def GetUser(self,
+                      user_id=None,
+                      screen_name=None,
+                      include_entities=True,
+                      return_json=False,
+                      no_cache=False):
+        """Return a single user.
+
+        See twitter.Api.GetUser for the arguments.
+
+        Returns:
+          A twitter.User instance representing that user
+        """
+        url = '%s/users/show.json' % self.api.base_url
+        parameters = {
+            'include_entities': include_entities
+        }
+        if user_id:
+            parameters['user_id'] = user_id
+        elif screen_name:
+            parameters['screen_name'] = screen_name
+        else:
+            raise TwitterError("Specify at least one of user_id or screen_name.")
+
+        data = await self._RequestUrl(url, 'GET', data=parameters, no_cache=no_cache)
+        if return_json:
+            return data
+        return User.NewFromJsonDict(data)
+
+    async def UsersLookup(self,
+                          user_id=None,
+                          screen_name=None,
+                          users=None,
+                          include_entities=True,
+                          return_json=False,
+                          no_cache=False):
+        """Fetch extended information for the specified users. The users
+        are looked up 100 at a time, with as many requests in flight at once
+        as the rate limit allows.
+
+        See twitter.Api.UsersLookup for the arguments.
+
+        Returns:
+          A list of twitter.User objects for the requested users
+        """
+        url = '%s/users/lookup.json' % self.api.base_url
+        parameters = self.api._UsersLookupParameters(user_id, screen_name, users, include_entities)
+        pages = await self._RequestUrls(url, parameters, no_cache=no_cache,
+                                        empty_codes=(NO_USER_MATCHES,))
+
+        result = []
+        for data in pages:
+            if return_json:
+                result += data
+            else:
+                result += [User.NewFromJsonDict(u) for u in data]
+        return result
+
+    async def GetFollowerIDsPaged(self,
+                                  user_id=None,
+                                  screen_name=None,
+                                  cursor=-1,
+                                  stringify_ids=False,
+                                  count=5000):
+        """Fetch one page of follower IDs.
+
+        See twitter.Api.GetFollowerIDsPaged for the arguments.
+
+        Returns:
+          next_cursor, previous_cursor, data sequence of user ids,
+          one for each follower
+        """
+        url = '%s/followers/ids.json' % self.api.base_url
+        return await self._GetIDsPaged(url, user_id, screen_name, cursor, stringify_ids, count)
+
+    async def GetFriendIDsPaged(self,
+                                user_id=None,
+                                screen_name=None,
+                                cursor=-1,
+                                stringify_ids=False,
+                                count=5000):
+        """Fetch one page of friend IDs.
+
+        See twitter.Api.GetFriendIDsPaged for the arguments.
+
+        Returns:
+          next_cursor, previous_cursor, data sequence of user ids,
+          one for each friend
+        """
+        url = '%s/friends/ids.json' % self.api.base_url
+        return await self._GetIDsPaged(url, user_id, screen_name, cursor, stringify_ids, count)
+
+    async def GetFollowerIDs(self,
+                             user_id=None,
+                             screen_name=None,
+                             stringify_ids=False,
+                             total_count=None,
+                             compact=False):
+        """Return the IDs of every user following the specified user.
+
+        See twitter.Api.GetFollowerIDs for the arguments.
+
+        Returns:
+          A list of integers, one for each user id, or a twitter.IDSet.
+        """
+        url = '%s/followers/ids.json' % self.api.base_url
+        return await self._GetFriendFollowerIDs(url, user_id, screen_name, stringify_ids, total_count,
+                                                compact)
+
+    async def GetFriendIDs(self,
+                           user_id=None,
+                           screen_name=None,
+                           stringify_ids=False,
+                           total_count=None,
+                           compact=False):
+        """Return the IDs of every user followed by the specified user.
+
+        See twitter.Api.GetFriendIDs for the arguments.
+
+        Returns:
+          A list of integers, one for each user id, or a twitter.IDSet.
+        """
+        url = '%s/friends/ids.json' % self.api.base_url
+        return await self._GetFriendFollowerIDs(url, user_id, screen_name, stringify_ids, total_count,
+                                                compact)
+
+    async def GetFollowersPaged(self,
+                                user_id=None,
+                                screen_name=None,
+                                cursor=-1,
+                                count=200,
+                                skip_status=False,
+                                include_user_entities=True):
+        """Fetch one page of followers.
+
+        See twitter.Api.GetFollowersPaged for the arguments.
+
+        Returns:
+          next_cursor, previous_cursor, data sequence of twitter.User
+          instances, one for each follower
+        """
+        url = '%s/followers/list.json' % self.api.base_url
+        return await self._GetFriendsFollowersPaged(url, user_id, screen_name, cursor, count,
+                                                    skip_status, include_user_entities)
+
+    async def GetFriendsPaged(self,
+                              user_id=None,
+                              screen_name=None,
+                              cursor=-1,
+                              count=200,
+                              skip_status=False,
+                              include_user_entities=True):
+        """Fetch one page of friends.
+
+        See twitter.Api.GetFriendsPaged for the arguments.
+
+        Returns:
+          next_cursor, previous_cursor, data sequence of twitter.User
+          instances, one for each friend
+        """
+        url = '%s/friends/list.json' % self.api.base_url
+        return await self._GetFriendsFollowersPaged(url, user_id, screen_name, cursor, count,
+                                                    skip_status, include_user_entities)
+
+    async def GetFollowers(self,
+                           user_id=None,
+                           screen_name=None,
+                           total_count=None,
+                           skip_status=False,
+                           include_user_entities=True):
+        """Fetch every follower of the specified user.
+
+        See twitter.Api.GetFollowers for the arguments.
+
+        Returns:
+          A sequence of twitter.User instances, one for each follower
+        """
+        url = '%s/followers/list.json' % self.api.base_url
+        return await self._GetFriendsFollowers(url, user_id, screen_name, total_count,
+                                               skip_status, include_user_entities)
+
+    async def GetFriends(self,
+                         user_id=None,
+                         screen_name=None,
+                         total_count=None,
+                         skip_status=False,
+                         include_user_entities=True):
+        """Fetch every user followed by the specified user.
+
+        See twitter.Api.GetFriends for the arguments.
+
+        Returns:
+          A sequence of twitter.User instances, one for each friend
+        """
+        url = '%s/friends/list.json' % self.api.base_url
+        return await self._GetFriendsFollowers(url, user_id, screen_name, total_count,
+                                               skip_status, include_user_entities)
+
+    async def GetStreamSample(self, delimited=False, stall_warnings=True):
+        """Yield a small sample of public statuses.
+
+        See twitter.Api.GetStreamSample for the arguments.
+        """
+        url = '%s/statuses/sample.json' % self.api.stream_url
+        parameters = {
+            'delimited': bool(delimited),
+            'stall_warnings': bool(stall_warnings)
+        }
+        async for data in self._RequestStream(url, 'GET', data=parameters):
+            yield data
+
+    async def GetStreamFilter(self,
+                              follow=None,
+                              track=None,
+                              locations=None,
+                              languages=None,
+                              delimited=None,
+                              stall_warnings=None,
+                              filter_level=None):
+        """Yield a filtered view of public statuses.
+
+        See twitter.Api.GetStreamFilter for the arguments.
+        """
+        if all((follow is None, track is None, locations is None)):
+            raise ValueError({'message': "No filter parameters specified."})
+        url = '%s/statuses/filter.json' % self.api.stream_url
+        data = {}
+        if follow is not None:
+            data['follow'] = ','.join(follow)
+        if track is not None:
+            data['track'] = ','.join(track)
+        if locations is not None:
+            data['locations'] = ','.join(locations)
+        if delimited is not None:
+            data['delimited'] = str(delimited)
+        if stall_warnings is not None:
+            data['stall_warnings'] = str(stall_warnings)
+        if languages is not None:
+            data['language'] = ','.join(languages)
+        if filter_level is not None:
+            data['filter_level'] = filter_level
+
+        async for message in self._RequestStream(url, 'POST', data=data):
+            yield message
+
+    async def _GetIDsPaged(self, url, user_id, screen_name, cursor, stringify_ids, count):
+        parameters = {}
+        if user_id is not None:
+            parameters['user_id'] = user_id
+        if screen_name is not None:
+            parameters['screen_name'] = screen_name
+        if count is not None:
+            parameters['count'] = count
+        parameters['stringify_ids'] = stringify_ids
+        parameters['cursor'] = cursor
+
+        data = await self._RequestUrl(url, 'GET', data=parameters)
+        return data.get('next_cursor', 0), data.get('previous_cursor', 0), data.get('ids', [])
+
+    async def _GetFriendFollowerIDs(self, url, user_id, screen_name, stringify_ids, total_count,
+                                    compact=False):
+        if compact and stringify_ids:
+            raise TwitterError({'message': "compact and stringify_ids cannot be used together"})
+        count = 5000
+        cursor = -1
+        fetched = 0
+        result = _IDSetBuilder() if compact else []
+
+        if total_count:
+            total_count = enf_type('total_count', int, total_count)
+            count = min(count, total_count)
+
+        while True:
+            if total_count is not None and fetched + count > total_count:
+                break
+            next_cursor, previous_cursor, data = await self._GetIDsPaged(
+                url, user_id, screen_name, cursor, stringify_ids, count)
+            fetched += len(data)
+            if compact:
+                result.AddPage(data)
+            else:
+                result.extend(data)
+            if next_cursor == 0 or next_cursor == previous_cursor:
+                break
+            cursor = next_cursor
+
+        return result.Build() if compact else result
+
+    async def _GetFriendsFollowersPaged(self,
+                                        url,
+                                        user_id,
+                                        screen_name,
+                                        cursor,
+                                        count,
+                                        skip_status,
+                                        include_user_entities):
+        parameters = {}
+        if user_id is not None:
+            parameters['user_id'] = user_id
+        if screen_name is not None:
+            parameters['screen_name'] = screen_name
+        parameters['count'] = enf_type('count', int, count)
+        parameters['skip_status'] = skip_status
+        parameters['include_user_entities'] = include_user_entities
+        parameters['cursor'] = cursor
+
+        data = await self._RequestUrl(url, 'GET', data=parameters)
+        users = [User.NewFromJsonDict(user) for user in data.get('users', [])]
+        return data.get('next_cursor', 0), data.get('previous_cursor', 0), users
+
+    async def _GetFriendsFollowers(self,
+                                   url,
+                                   user_id,
+                                   screen_name,
+                                   total_count,
+                                   skip_status,
+                                   include_user_entities):
+        count = 200
+        cursor = -1
+        result = []
+
+        if total_count:
+            total_count = enf_type('total_count', int, total_count)
+            count = min(count, total_count)
+
+        while True:
+            if total_count is not None and len(result) + count > total_count:
+                break
+            next_cursor, previous_cursor, data = await self._GetFriendsFollowersPaged(
+                url, user_id, screen_name, cursor, count, skip_status, include_user_entities)
+            result.extend(data)
+            if next_cursor == 0 or next_cursor == previous_cursor:
+                break
+            cursor = next_cursor
+
+        return result
+
+    def _GetSession(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self._connection_limit,
+                                             force_close=not self.api._keep_alive,
+                                             ssl=self._GetSSLSetting())
+            headers = dict(self.api._request_headers)
+            headers['Accept-Encoding'] = self.api._GetAcceptEncoding()
+            # aiohttp decompresses gzip and deflate bodies, streams included.
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  headers=headers)
+        return self._session
+
+    def _GetSSLSetting(self):
+        # aiohttp uses None for the default certificate verification.
+        if self.api.verify_ssl is False:
+            return False
+        return None
+
+    def _GetTimeout(self, stream=False):
+        if self.api._timeout is None:
+            return aiohttp.ClientTimeout(total=None if stream else 5 * 60)
+        if stream:
+            return aiohttp.ClientTimeout(total=None, sock_read=self.api._timeout)
+        return aiohttp.ClientTimeout(total=self.api._timeout)
+
+    def _SignRequest(self, url, verb, body=None):
+        """Return the url and headers to use for a request, signed with the
+        credentials of the wrapped Api instance."""
+        headers = {}
+        if body is not None:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+
+        bearer_token = getattr(self.api, '_bearer_token', None)
+        if bearer_token:
+            headers['Authorization'] = 'Bearer %s' % bearer_token['access_token']
+            return url, headers
+
+        auth_list = [self.api._consumer_key, self.api._consumer_secret,
+                     self.api._access_token_key, self.api._access_token_secret]
+        if not all(auth_list):
+            raise TwitterError("The twitter.AsyncApi instance must be authenticated.")
+        client = OAuth1Client(self.api._consumer_key,
+                              client_secret=self.api._consumer_secret,
+                              resource_owner_key=self.api._access_token_key,
+                              resource_owner_secret=self.api._access_token_secret)
+        url, headers, _ = client.sign(url, http_method=verb, body=body, headers=headers)
+        return url, headers
+
+    def _EncodeBody(self, data):
+        data = dict((k, v) for k, v in data.items() if v is not None)
+        return urlencode(data)
+
+    async def _RequestUrl(self, url, verb, data=None, no_cache=False, sleep_on_rate_limit=None):
+        """Request a url and return the parsed JSON response.
+
+        Args:
+            url:
+                The web location we want to retrieve.
+            verb:
+                Either POST or GET.
+            data:
+                A dict of (str, unicode) key/value pairs.
+            no_cache:
+                If True, a GET request always goes to Twitter, ignoring and
+                not updating the cache of the wrapped Api.
+            sleep_on_rate_limit:
+                Overrides Api.sleep_on_rate_limit for this request.
+
+        Returns:
+            A JSON object.
+        """
+        if sleep_on_rate_limit is None:
+            sleep_on_rate_limit = self.api.sleep_on_rate_limit or self.api.raise_on_rate_limit
+
+        data = dict(data or {})
+        data['tweet_mode'] = self.api.tweet_mode
+
+        body = None
+        cache_key = None
+        if verb == 'GET':
+            url = self.api._BuildUrl(url, extra_params=data)
+            cache_timeout = 0 if no_cache else self.api._GetCacheTimeout(url)
+            if cache_timeout:
+                cache_key = self.api._GetCacheKey(url)
+                resp = await self._RunBlocking(self.api._cache, self.api._GetCachedResponse,
+                                               cache_key, url, cache_timeout)
+                if resp is not None:
+                    return self.api._ParseAndCheckTwitter(resp.content)
+        else:
+            body = self._EncodeBody(data)
+
+        if sleep_on_rate_limit and self.api.raise_on_rate_limit:
+            limit = await self.CheckRateLimit(url)
+            try:
+                await self._RunBlocking(self.rate_limit, self.api._ReserveOrRaise, url, limit)
+            except RateLimitExceeded as e:
+                e.available = self._GetAvailable(e.retry_after)
+                raise
+        elif sleep_on_rate_limit:
+            limit = await self.CheckRateLimit(url)
+            if self.api.rate_limit_scheduler is not None:
+                await asyncio.sleep(self.api.rate_limit_scheduler.Reserve(url, limit))
+            elif limit.remaining == 0:
+                stime = max(int(limit.reset - time.time()) + 10, 0)
+                logger.debug('Rate limited requesting [%s], sleeping for [%s]', url, stime)
+                await asyncio.sleep(stime)
+            while not await self._RunBlocking(self.rate_limit, self.rate_limit.reserve, url):
+                stime = await self._RunBlocking(self.rate_limit, self.api._GetReservationWait, url)
+                logger.debug('Rate limited requesting [%s], sleeping for [%s]', url, stime)
+                await asyncio.sleep(stime)
+
+        try:
+            resp, content = await self._Send(url, verb, body)
+
+            if self.rate_limit is not None:
+                await self._RunBlocking(self.rate_limit, self.rate_limit.set_limit, url,
+                                        resp.headers.get('x-rate-limit-limit', 0),
+                                        resp.headers.get('x-rate-limit-remaining', 0),
+                                        resp.headers.get('x-rate-limit-reset', 0))
+        finally:
+            if sleep_on_rate_limit:
+                await self._RunBlocking(self.rate_limit, self.rate_limit.release, url)
+
+        if cache_key and resp.status == 200:
+            await self._RunBlocking(self.api._cache, self.api._cache.Set, cache_key, content.decode('utf-8'))
+        return self.api._ParseAndCheckTwitter(content)
+
+    async def _RequestUrls(self, url, parameters, no_cache=False, empty_codes=()):
+        """GET url once for each dict of parameters and return the parsed
+        responses in the same order, see twitter.Api._RequestUrls.
+
+        The requests are sent in rounds, each limited to the remaining rate
+        limit for the endpoint, so that a large batch does not fail half way
+        through with rate limit errors.
+        """
+        async def fetch(data):
+            try:
+                return await self._RequestUrl(url, 'GET', data=data, no_cache=no_cache)
+            except TwitterError as e:
+                if _HasOnlyErrorCodes(e, empty_codes):
+                    return []
+                raise
+
+        pages = []
+        offset = 0
+        while offset < len(parameters):
+            remaining = await self._RunBlocking(self.rate_limit, self.api._GetRemaining, url)
+            batch = parameters[offset:offset + max(1, remaining)]
+            pages += await asyncio.gather(*[fetch(data) for data in batch])
+            offset += len(batch)
+        return pages
+
+    @staticmethod
+    async def _RunBlocking(store, func, *args):
+        """Call func, which uses store, the cache or the rate limit of the
+        wrapped Api. A RateLimit or _MemoryCache is kept in memory and called
+        directly; other stores, which may read files or wait for a SQLite
+        transaction, are called in the default executor of the loop so that
+        they do not block the other requests."""
+        if type(store) is RateLimit or isinstance(store, _MemoryCache):
+            return func(*args)
+        return await asyncio.get_event_loop().run_in_executor(None, func, *args)
+
+    @staticmethod
+    def _GetAvailable(delay):
+        """Return a future that is done after delay seconds, so that callers
+        handling a RateLimitExceeded can await it or add a callback."""
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+
+        def set_result():
+            if not future.done():
+                future.set_result(None)
+        loop.call_later(delay, set_result)
+        return future
+
+    async def _Send(self, url, verb, body):
+        """Send a request, retrying it as allowed by the retry policy of
+        the wrapped Api, and return the response with its body."""
+        policy = self.api.retry_policy
+        attempt = 0
+        while True:
+            attempt += 1
+            start = time.time()
+            # Each attempt needs a fresh OAuth nonce and timestamp.
+            signed_url, headers = self._SignRequest(url, verb, body)
+            resp = content = error = None
+            try:
+                async with self._GetSession().request(verb,
+                                                      signed_url,
+                                                      data=body,
+                                                      headers=headers,
+                                                      timeout=self._GetTimeout(),
+                                                      proxy=self._GetProxy(url)) as resp:
+                    content = await resp.read()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = e
+            except aiohttp.ClientError as e:
+                raise TwitterError(str(e))
+            if self.api.telemetry is not None:
+                if error is None:
+                    self.api.telemetry.Record(url, verb, resp.status, time.time() - start,
+                                              len(content), resp.headers)
+                else:
+                    self.api.telemetry.Record(url, verb, elapsed=time.time() - start, error=error)
+            if error is None and resp.status == 429 and self.api.raise_on_rate_limit:
+                if policy is not None:
+                    policy.Record(url, verb, attempt, 429, elapsed=time.time() - start)
+                e = self.api._GetRateLimitExceeded(url, resp.headers)
+                e.available = self._GetAvailable(e.retry_after)
+                raise e
+            if policy is None:
+                if error is not None:
+                    raise TwitterError(str(error))
+                return resp, content
+
+            status = resp.status if error is None else None
+            headers = resp.headers if error is None else None
+            delay = policy.GetDelay(verb, attempt, status, headers, error)
+            policy.Record(url, verb, attempt, status, error, time.time() - start, delay)
+            if delay is None:
+                if error is not None:
+                    raise TwitterError(str(error))
+                return resp, content
+            await asyncio.sleep(delay)
+
+    async def _RequestStream(self, url, verb, data=None):
+        """Request a stream of data and yield each message as a JSON object."""
+        data = dict(data or {})
+        body = None
+        if verb == 'GET':
+            url = self.api._BuildUrl(url, extra_params=data)
+        else:
+            body = self._EncodeBody(data)
+
+        signed_url, headers = self._SignRequest(url, verb, body)
+        try:
+            async with self._GetSession().request(verb,
+                                                  signed_url,
+                                                  data=body,
+                                                  headers=headers,
+                                                  timeout=self._GetTimeout(stream=True),
+                                                  proxy=self._GetProxy(url)) as resp:
+                async for line in resp.content:
+                    line = line.strip()
+                    if line:
+                        yield self.api._ParseAndCheckTwitter(line)
+        except aiohttp.ClientError as e:
+            raise TwitterError(str(e))
+
+    def _GetProxy(self, url):
+        if not self.api.proxies:
+            return None
+        scheme = url.split(':', 1)[0]
+        return self.api.proxies.get(scheme)
@@ -10,6 +10,34 @@ class TwitterError(Exception):
         return self.args[0]
 
 
+class RateLimitExceeded(TwitterError):
+    """Raised instead of sleeping when a request would exceed the rate limit
+    of its endpoint, or is answered with a 429, and the Api was created with
+    raise_on_rate_limit.
+
+    Attributes:
+      endpoint: the rate limit resource of the request, e.g. '/search/tweets'.
+      reset: the epoch time at which the endpoint's window resets.
+      retry_after: the suggested number of seconds to wait before retrying.
+      available: with twitter.AsyncApi, a future that is done once
+        retry_after seconds have passed, else None.
+    """
+
+    def __init__(self, endpoint, reset, retry_after):
+        super(RateLimitExceeded, self).__init__(
+            {'message': 'Rate limit exceeded for %s, retry after %ds' % (endpoint, retry_after)})
+        self.endpoint = endpoint
+        self.reset = reset
+        self.retry_after = retry_after
+        self.available = None
+
+    def __reduce__(self):
+        # args holds the message rather than the arguments of __init__, which
+        # pickle and copy would otherwise call it with. The available future
+        # is bound to its event loop and is not kept.
+        return (self.__class__, (self.endpoint, self.reset, self.retry_after))
+
+
 class PythonTwitterDeprecationWarning(DeprecationWarning):
     """Base class for python-twitter deprecation warnings"""
     pass
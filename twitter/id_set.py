@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+"""A compact sorted set of user ids, for the followers and friends of large
+accounts.
+
+An IDSet keeps its ids in an array('q'), 8 bytes each instead of the 36 of
+an int in a list, and implements the set operations by merging the sorted
+arrays, with numpy when it is installed::
+
+    >>> followers = api.GetFollowerIDs(screen_name='twitter', compact=True)
+    >>> friends = api.GetFriendIDs(screen_name='twitter', compact=True)
+    >>> mutuals = followers & friends
+    >>> len(friends - followers)
+"""
+import heapq
+from array import array
+from bisect import bisect_left
+from itertools import groupby
+from operator import itemgetter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# The number of ids _Contains and _Compress work on at once.
+_CHUNK_SIZE = 65536
+
+
+class IDSet(object):
+    """A sorted set of 64 bit integer ids stored in an array('q').
+
+    The ids are available as the ids attribute, and with ToNumpy() as a
+    numpy int64 array sharing the same memory if numpy is installed.
+
+    The set operations walk both sorted arrays once and build no
+    intermediate list or set. With numpy installed they run at C speed over
+    views of the arrays: intersections and differences binary search the
+    ids, needing a byte per id besides their result, and unions sort a copy
+    of both sets, 9 bytes per id.
+    """
+
+    def __init__(self, ids=()):
+        """
+        Args:
+          ids:
+            An iterable of integer ids, in any order and possibly repeated.
+        """
+        if isinstance(ids, IDSet):
+            self.ids = array('q', ids.ids)
+        else:
+            self.ids = array('q', sorted(set(ids)))
+
+    @classmethod
+    def FromPages(cls, pages):
+        """Return an IDSet of the ids of an iterable of pages, such as the
+        lists of ids returned by GetFollowerIDsPaged, consuming them one at
+        a time."""
+        builder = _IDSetBuilder()
+        for page in pages:
+            builder.AddPage(page)
+        return builder.Build()
+
+    @classmethod
+    def _FromSorted(cls, ids):
+        id_set = cls.__new__(cls)
+        id_set.ids = ids
+        return id_set
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __contains__(self, id):
+        i = bisect_left(self.ids, id)
+        return i < len(self.ids) and self.ids[i] == id
+
+    def __eq__(self, other):
+        return isinstance(other, IDSet) and self.ids == other.ids
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'IDSet(%d ids)' % len(self.ids)
+
+    def Intersection(self, other):
+        """Return the ids in both this set and other."""
+        a, b = self.ids, _AsIDSet(other).ids
+        if len(a) > len(b):
+            a, b = b, a
+        if numpy is not None:
+            return _Compress(_View(a), _Contains(_View(a), _View(b)))
+        if len(a) * max(len(b).bit_length(), 1) < len(b):
+            # Much smaller than the other: look each id up instead of
+            # walking through both.
+            result = array('q')
+            for id in a:
+                i = bisect_left(b, id)
+                if i < len(b) and b[i] == id:
+                    result.append(id)
+            return IDSet._FromSorted(result)
+        return IDSet._FromSorted(_Merge(a, b, False, True, False))
+
+    def Difference(self, other):
+        """Return the ids in this set but not in other."""
+        a, b = self.ids, _AsIDSet(other).ids
+        if numpy is not None:
+            found = _Contains(_View(a), _View(b))
+            return _Compress(_View(a), numpy.logical_not(found, out=found))
+        return IDSet._FromSorted(_Merge(a, b, True, False, False))
+
+    def Union(self, other):
+        """Return the ids in this set, other or both."""
+        a, b = self.ids, _AsIDSet(other).ids
+        if numpy is not None:
+            return _Unique(numpy.concatenate([_View(a), _View(b)]))
+        return IDSet._FromSorted(_Merge(a, b, True, True, True))
+
+    __and__ = Intersection
+    __sub__ = Difference
+    __or__ = Union
+
+    def ToNumpy(self):
+        """Return the ids as a numpy int64 array sharing their memory."""
+        if numpy is None:
+            raise ImportError('IDSet.ToNumpy requires numpy')
+        return _View(self.ids)
+
+
+class _IDSetBuilder(object):
+    """Collect pages of ids into an IDSet without holding them in lists.
+
+    Each page is sorted into an array of its own, then the arrays are merged
+    in a single pass once every page has been added: with a stable sort in
+    numpy if it is installed, else by streaming them through heapq.merge into
+    the result array.
+    """
+
+    def __init__(self):
+        self._runs = []
+
+    def AddPage(self, page):
+        if page:
+            self._runs.append(array('q', sorted(page)))
+
+    def Build(self):
+        runs, self._runs = self._runs, []
+        if numpy is not None:
+            if not runs:
+                return IDSet()
+            values = numpy.concatenate([_View(run) for run in runs])
+            del runs
+            return _Unique(values)
+        return IDSet._FromSorted(array('q', map(itemgetter(0), groupby(heapq.merge(*runs)))))
+
+
+def _AsIDSet(ids):
+    return ids if isinstance(ids, IDSet) else IDSet(ids)
+
+
+def _View(ids):
+    """Return an int64 numpy array sharing the memory of the array('q')."""
+    return numpy.frombuffer(ids, dtype=numpy.int64) if ids else numpy.empty(0, numpy.int64)
+
+
+def _Unique(values):
+    """Sort the numpy array values in place and return an IDSet of its
+    distinct values.
+
+    numpy.unique does the same, but recent versions hash the values first,
+    which is much slower than a stable sort of runs already in order.
+    """
+    values.sort(kind='stable')
+    keep = numpy.ones(len(values), dtype=bool)
+    if len(values) > 1:
+        numpy.not_equal(values[1:], values[:-1], out=keep[1:])
+    return _Compress(values, keep)
+
+
+def _Contains(a, b):
+    """Return a numpy bool array telling which ids of the sorted numpy array
+    a are in the sorted numpy array b.
+
+    The ids of a are looked up with binary searches a chunk at a time, so
+    that apart from the result only a chunk of indices is allocated, where
+    numpy.isin and numpy.intersect1d sort a copy of both arrays.
+    """
+    found = numpy.zeros(len(a), dtype=bool)
+    if not len(b):
+        return found
+    for start in range(0, len(a), _CHUNK_SIZE):
+        chunk = a[start:start + _CHUNK_SIZE]
+        i = numpy.searchsorted(b, chunk)
+        numpy.minimum(i, len(b) - 1, out=i)
+        numpy.equal(b[i], chunk, out=found[start:start + _CHUNK_SIZE])
+    return found
+
+
+def _Compress(values, keep):
+    """Return an IDSet of the numpy array values where keep is True, copied
+    a chunk at a time straight into the array('q') of the IDSet."""
+    ids = array('q', [0]) * int(numpy.count_nonzero(keep))
+    out = _View(ids)
+    n = 0
+    for start in range(0, len(values), _CHUNK_SIZE):
+        chunk = values[start:start + _CHUNK_SIZE][keep[start:start + _CHUNK_SIZE]]
+        out[n:n + len(chunk)] = chunk
+        n += len(chunk)
+    return IDSet._FromSorted(ids)
+
+
+def _Merge(a, b, keep_a, keep_both, keep_b):
+    """Merge the sorted arrays a and b, keeping the ids only in a, in both
+    and only in b as asked."""
+    result = array('q')
+    i = j = 0
+    len_a, len_b = len(a), len(b)
+    while i < len_a and j < len_b:
+        x, y = a[i], b[j]
+        if x < y:
+            if keep_a:
+                result.append(x)
+            i += 1
+        elif y < x:
+            if keep_b:
+                result.append(y)
+            j += 1
+        else:
+            if keep_both:
+                result.append(x)
+            i += 1
+            j += 1
+    if keep_a:
+        result.extend(a[i:])
+    if keep_b:
+        result.extend(b[j:])
+    return result
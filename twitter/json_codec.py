@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""JSON codecs used by twitter.Api to parse responses and by the models to
+serialize themselves.
+
+A codec is any object with the loads() and dumps() methods of JSONCodec, so
+a faster parser can be plugged in with::
+
+    >>> api = twitter.Api(..., json_codec=twitter.json_codec.FastCodec())
+    >>> twitter.models.TwitterModel.json_codec = api.json_codec
+"""
+from __future__ import unicode_literals
+
+import json
+import re
+
+
+class JSONCodec(object):
+    """A codec built on the standard library json module."""
+
+    def loads(self, data):
+        """Parse a JSON document given as bytes, encoded as UTF-8, or text."""
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        return json.loads(data)
+
+    def dumps(self, obj, ensure_ascii=True, sort_keys=False):
+        """Return obj as a JSON string."""
+        return json.dumps(obj, ensure_ascii=ensure_ascii, sort_keys=sort_keys)
+
+
+class OrjsonCodec(object):
+    """A codec built on orjson, which parses bytes without decoding them to
+    text first.
+
+    dumps() returns the same data as JSONCodec but without whitespace between
+    items.
+    """
+
+    _NON_ASCII = re.compile('[^\x00-\x7f]')
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+    def dumps(self, obj, ensure_ascii=True, sort_keys=False):
+        option = self._orjson.OPT_SORT_KEYS if sort_keys else 0
+        data = self._orjson.dumps(obj, option=option).decode('utf-8')
+        if ensure_ascii:
+            # orjson always writes UTF-8, outside of strings the output is
+            # plain ASCII so every other character can be escaped.
+            data = self._NON_ASCII.sub(self._Escape, data)
+        return data
+
+    @staticmethod
+    def _Escape(match):
+        code = ord(match.group())
+        if code > 0xffff:
+            code -= 0x10000
+            return '\\u%04x\\u%04x' % (0xd800 | (code >> 10), 0xdc00 | (code & 0x3ff))
+        return '\\u%04x' % code
+
+
+def FastCodec():
+    """Return an OrjsonCodec if orjson is installed, else a JSONCodec."""
+    try:
+        return OrjsonCodec()
+    except ImportError:
+        return JSONCodec()
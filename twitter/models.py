@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
-import json
 from calendar import timegm
 
 try:
@@ -9,11 +8,16 @@ try:
 except ImportError:
     from email.utils import parsedate
 
+from twitter.json_codec import JSONCodec
+
 
 class TwitterModel(object):
 
     """ Base class from which all twitter models will inherit. """
 
+    # The codec used by AsJsonString(), see twitter.json_codec.
+    json_codec = JSONCodec()
+
     def __init__(self, **kwargs):
         self.param_defaults = {}
 
@@ -38,7 +42,7 @@ class TwitterModel(object):
     def AsJsonString(self, ensure_ascii=True):
         """ Returns the TwitterModel as a JSON string based on key/value
         pairs returned from the AsDict() method. """
-        return json.dumps(self.AsDict(), ensure_ascii=ensure_ascii, sort_keys=True)
+        return self.json_codec.dumps(self.AsDict(), ensure_ascii=ensure_ascii, sort_keys=True)
 
     def AsDict(self):
         """ Create a dictionary representation of the object. Please see inline
@@ -1,5 +1,12 @@
 from collections import namedtuple
+from contextlib import contextmanager
+import json
+import os
 import re
+import sqlite3
+import tempfile
+import threading
+import time
 try:
     from urllib.parse import urlparse
 except ImportError:
@@ -33,6 +40,17 @@ NON_STANDARD_ENDPOINTS = [
     USERS_SUGGESTIONS_SLUG_MEMBERS,
 ]
 
+# All of NON_STANDARD_ENDPOINTS as a single pattern, the name of the group
+# that matched gives the index of the endpoint. Alternatives are tried in
+# order, so the first endpoint that matches wins as with separate patterns.
+_NON_STANDARD_ENDPOINTS_REGEX = re.compile('|'.join(
+    '(?P<e{0}>{1})'.format(i, endpoint.regex.pattern)
+    for i, endpoint in enumerate(NON_STANDARD_ENDPOINTS)))
+
+# Resolved (resource, resource family) pairs by url without its query string.
+_RESOURCES = {}
+_MAX_RESOURCES = 4096
+
 
 class RateLimit(object):
 
@@ -96,8 +114,12 @@ class RateLimit(object):
 
         and a dictionary of limit, remaining, and reset will be returned.
 
+        Updates and lookups are guarded by a lock, so one RateLimit can be
+        shared by threads using the same twitter.Api instance.
+
         """
         self.__dict__['resources'] = {}
+        self.__dict__['_lock'] = threading.RLock()
         self.__dict__.update(kwargs)
 
     @staticmethod
@@ -114,11 +136,26 @@ class RateLimit(object):
         Returns:
             string: Resource family corresponding to the URL.
         """
-        resource = urlparse(url).path.replace('/1.1', '').replace('.json', '')
-        for non_std_endpoint in NON_STANDARD_ENDPOINTS:
-            if re.match(non_std_endpoint.regex, resource):
-                return non_std_endpoint.resource
-        return resource
+        return RateLimit._resolve(url)[0]
+
+    @staticmethod
+    def _resolve(url):
+        """ Return the resource of url and its family, i.e. the first part
+        of the resource, memoized by the url up to its query string. """
+        key = url.split('?', 1)[0]
+        resolved = _RESOURCES.get(key)
+        if resolved is None:
+            resource = urlparse(key).path.replace('/1.1', '').replace('.json', '')
+            match = _NON_STANDARD_ENDPOINTS_REGEX.match(resource)
+            if match:
+                resource = NON_STANDARD_ENDPOINTS[int(match.lastgroup[1:])].resource
+            parts = resource.split('/')
+            resolved = (resource, parts[1] if len(parts) > 1 else None)
+            if len(_RESOURCES) >= _MAX_RESOURCES:
+                # Paths with ids in them would grow the cache forever.
+                _RESOURCES.clear()
+            _RESOURCES[key] = resolved
+        return resolved
 
     def set_unknown_limit(self, url, limit, remaining, reset):
         return self.set_limit(url, limit, remaining, reset)
@@ -147,20 +184,20 @@ class RateLimit(object):
             reset (int):
                 Epoch time at which the rate limit window will reset.
         """
-        endpoint = self.url_to_resource(url)
-        resource_family = endpoint.split('/')[1]
+        endpoint, resource_family = self._resolve(url)
         new_endpoint = {endpoint: {
             "limit": enf_type('limit', int, limit),
             "remaining": enf_type('remaining', int, remaining),
             "reset": enf_type('reset', int, reset)
         }}
 
-        if not self.resources.get(resource_family, None):
-            self.resources[resource_family] = {}
+        with self._lock:
+            if not self.resources.get(resource_family, None):
+                self.resources[resource_family] = {}
 
-        self.__dict__['resources'][resource_family].update(new_endpoint)
+            self.__dict__['resources'][resource_family].update(new_endpoint)
 
-        return self.get_limit(url)
+            return self.get_limit(url)
 
     def get_limit(self, url):
         """ Gets a EndpointRateLimit object for the given url.
@@ -174,18 +211,353 @@ class RateLimit(object):
             namedtuple: EndpointRateLimit object containing rate limit
             information.
         """
-        endpoint = self.url_to_resource(url)
-        resource_family = endpoint.split('/')[1]
+        endpoint, resource_family = self._resolve(url)
 
+        with self._lock:
+            try:
+                family_rates = self.resources.get(resource_family).get(endpoint)
+            except AttributeError:
+                return EndpointRateLimit(limit=15, remaining=15, reset=0)
+
+            if not family_rates:
+                self.set_unknown_limit(url, limit=15, remaining=15, reset=0)
+                return EndpointRateLimit(limit=15, remaining=15, reset=0)
+
+            return EndpointRateLimit(family_rates['limit'],
+                                     family_rates['remaining'],
+                                     family_rates['reset'])
+
+    def load(self, data):
+        """ Replace the rate limits with the ones in a response from
+        ``/application/rate_limit_status.json``.
+
+        Args:
+            data (dict):
+                The parsed response, with a ``resources`` key.
+        """
+        with self._lock:
+            self.__dict__['resources'] = {}
+            self.__dict__.update(data)
+
+    def is_loaded(self):
+        """ Return True if the rate limits have been loaded from Twitter
+        or from the headers of a response. """
+        return bool(self.__dict__.get('resources', None))
+
+    def save(self, path):
+        """ Write the rate limits to a JSON file, to be read back by
+        restore(), for example by the next run of a short-lived script.
+
+        The file is replaced atomically, so a process reading it never sees
+        it half written.
+
+        Args:
+            path (str):
+                The file to write.
+        """
+        data = json.dumps({'resources': self._GetResources()})
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.rate_limit')
         try:
-            family_rates = self.resources.get(resource_family).get(endpoint)
-        except AttributeError:
-            return EndpointRateLimit(limit=15, remaining=15, reset=0)
+            with os.fdopen(fd, 'w') as f:
+                f.write(data)
+            if hasattr(os, 'replace'):
+                os.replace(tmp_path, path)
+            else:
+                os.rename(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _GetResources(self):
+        """ Return the rate limits as in the ``resources`` of a response from
+        ``/application/rate_limit_status.json``. """
+        with self._lock:
+            return dict((family, dict(endpoints)) for family, endpoints
+                        in self.__dict__.get('resources', {}).items())
+
+    def restore(self, path):
+        """ Load the rate limits written by save(), so that
+        Api.CheckRateLimit() does not need to request them from Twitter.
+
+        The counts of windows that are over are discarded: those endpoints
+        get their full limit back until a response reports the new window.
+
+        Args:
+            path (str):
+                The file to read.
+
+        Returns:
+            True if the rate limits were loaded, False if the file does not
+            exist, cannot be read or holds malformed rate limits, in which
+            case the current ones are kept.
+        """
+        now = time.time()
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            resources = data['resources']
+            for endpoints in resources.values():
+                for rates in endpoints.values():
+                    if rates['reset'] <= now:
+                        rates['remaining'] = rates['limit']
+        except (IOError, OSError, ValueError, KeyError, TypeError, AttributeError):
+            return False
+        self.load({'resources': resources})
+        return True
+
+    def reserve(self, url):
+        """ Reserve one of the remaining requests to url's endpoint for a
+        request about to be sent, and return False if there are none left.
+
+        A RateLimit is only shared by the threads of one process, where
+        the remaining count from the response headers is enough, so this
+        always returns True. See SQLiteRateLimit.
+        """
+        return True
+
+    def release(self, url):
+        """ Release a reservation made by reserve() once its response has
+        been recorded with set_limit(), or the request failed. """
+        pass
+
+
+class SQLiteRateLimit(RateLimit):
+
+    """ A RateLimit stored in a SQLite database, so that the processes using
+    the same credentials share their rate limits instead of each overdrawing
+    them.
+
+    Besides the limit, remaining and reset of each endpoint, the database
+    counts the requests that have been reserved but whose response has not
+    been recorded yet. reserve() only succeeds while the remaining requests
+    outnumber these reservations, and runs in an exclusive transaction, so
+    the processes together never send more requests than Twitter allows.
+    get_limit() returns the remaining requests less the reservations.
+
+    Responses are recorded with set_limit(), which keeps the lowest
+    remaining count reported for a window and ignores reports from a window
+    that is over, since responses may arrive out of order. Once a window is
+    over, up to ``limit`` requests may be reserved until a response reports
+    the new one. Reservations are forgotten when a new window is reported,
+    so that those of a process that died do not hold the quota forever.
+    The database already outlives the process, but save() still writes its
+    rate limits to a file that restore() can read.
+
+    Requests are only reserved by a twitter.Api with sleep_on_rate_limit or
+    raise_on_rate_limit; without them the Api warns, and records the rate
+    limits here without keeping within them.
+    """
+
+    def __init__(self, path, timeout=30, **kwargs):
+        super(SQLiteRateLimit, self).__init__(**kwargs)
+        self.__dict__['_path'] = os.path.abspath(path)
+        self.__dict__['_timeout'] = timeout
+        self.__dict__['_connection'] = None
+        self.__dict__['_pid'] = None
+
+    def set_limit(self, url, limit, remaining, reset):
+        endpoint, resource_family = self._resolve(url)
+        limit = enf_type('limit', int, limit)
+        remaining = enf_type('remaining', int, remaining)
+        reset = enf_type('reset', int, reset)
+        with self._Transaction() as connection:
+            self._Merge(connection, endpoint, resource_family, limit, remaining, reset)
+        return self.get_limit(url)
 
-        if not family_rates:
-            self.set_unknown_limit(url, limit=15, remaining=15, reset=0)
+    def get_limit(self, url):
+        endpoint, resource_family = self._resolve(url)
+        with self._lock:
+            row = self._GetConnection().execute(
+                'SELECT lim, remaining, reset, in_flight FROM rate_limits WHERE endpoint = ?',
+                (endpoint,)).fetchone()
+        if row is None:
             return EndpointRateLimit(limit=15, remaining=15, reset=0)
+        limit, remaining, reset, in_flight = row
+        if reset <= time.time():
+            remaining = limit
+        return EndpointRateLimit(limit, max(remaining - in_flight, 0), reset)
+
+    def load(self, data):
+        with self._Transaction() as connection:
+            for resource_family, endpoints in (data.get('resources') or {}).items():
+                for endpoint, rates in endpoints.items():
+                    self._Merge(connection, endpoint, resource_family,
+                                int(rates['limit']), int(rates['remaining']), int(rates['reset']))
+
+    def is_loaded(self):
+        with self._lock:
+            return self._GetConnection().execute(
+                'SELECT 1 FROM rate_limits LIMIT 1').fetchone() is not None
+
+    def _GetResources(self):
+        resources = {}
+        with self._lock:
+            rows = self._GetConnection().execute(
+                'SELECT family, endpoint, lim, remaining, reset FROM rate_limits').fetchall()
+        for resource_family, endpoint, limit, remaining, reset in rows:
+            resources.setdefault(resource_family, {})[endpoint] = {
+                'limit': limit, 'remaining': remaining, 'reset': reset}
+        return resources
+
+    def reserve(self, url):
+        endpoint, resource_family = self._resolve(url)
+        with self._Transaction() as connection:
+            row = connection.execute(
+                'SELECT lim, remaining, reset, in_flight FROM rate_limits WHERE endpoint = ?',
+                (endpoint,)).fetchone()
+            if row is None:
+                row = (15, 15, 0, 0)
+                connection.execute(
+                    'INSERT INTO rate_limits (endpoint, family, lim, remaining, reset, in_flight) '
+                    'VALUES (?, ?, ?, ?, ?, 0)', (endpoint, resource_family) + row[:3])
+            limit, remaining, reset, in_flight = row
+            if reset <= time.time():
+                remaining = limit
+            if remaining - in_flight <= 0:
+                return False
+            connection.execute('UPDATE rate_limits SET in_flight = in_flight + 1 WHERE endpoint = ?',
+                               (endpoint,))
+        return True
+
+    def release(self, url):
+        endpoint, _ = self._resolve(url)
+        with self._Transaction() as connection:
+            connection.execute('UPDATE rate_limits SET in_flight = MAX(in_flight - 1, 0) '
+                               'WHERE endpoint = ?', (endpoint,))
+
+    @staticmethod
+    def _Merge(connection, endpoint, resource_family, limit, remaining, reset):
+        now = time.time()
+        if reset <= now:
+            # No headers, or a response from a window that is over.
+            return
+        row = connection.execute('SELECT remaining, reset FROM rate_limits WHERE endpoint = ?',
+                                 (endpoint,)).fetchone()
+        if row is None:
+            connection.execute(
+                'INSERT INTO rate_limits (endpoint, family, lim, remaining, reset, in_flight) '
+                'VALUES (?, ?, ?, ?, ?, 0)', (endpoint, resource_family, limit, remaining, reset))
+        elif row[1] <= now or reset > row[1]:
+            connection.execute(
+                'UPDATE rate_limits SET lim = ?, remaining = ?, reset = ?, in_flight = 0 '
+                'WHERE endpoint = ?', (limit, remaining, reset, endpoint))
+        elif reset == row[1]:
+            connection.execute('UPDATE rate_limits SET lim = ?, remaining = ? WHERE endpoint = ?',
+                               (limit, min(remaining, row[0]), endpoint))
+
+    @contextmanager
+    def _Transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so that no other
+        # process can reserve between our read and our update.
+        with self._lock:
+            connection = self._GetConnection()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield connection
+            except BaseException:
+                connection.rollback()
+                raise
+            connection.commit()
+
+    def _GetConnection(self):
+        # A connection must not be shared with a forked child process.
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self._path,
+                                         timeout=self._timeout,
+                                         isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS rate_limits '
+                               '(endpoint TEXT PRIMARY KEY, family TEXT, lim INTEGER NOT NULL, '
+                               'remaining INTEGER NOT NULL, reset INTEGER NOT NULL, '
+                               'in_flight INTEGER NOT NULL)')
+            self.__dict__['_connection'] = connection
+            self.__dict__['_pid'] = os.getpid()
+        return self._connection
+
+
+class RateLimitScheduler(object):
+
+    """ Spreads the requests to each endpoint evenly over its rate limit
+    window instead of letting them all through until the limit is reached.
+
+    With ``remaining`` requests left until ``reset``, requests to an endpoint
+    are spaced ``(reset - now) / remaining`` seconds apart. Up to ``burst``
+    requests may be sent back to back if earlier ones were spaced further
+    apart. Once ``remaining`` is 0, requests wait until ``margin`` seconds
+    after the reset. Endpoints whose window is unknown or over are not paced.
+
+    A scheduler may be shared by threads and by several twitter.Api
+    instances using the same credentials. It works on the EndpointRateLimit
+    tuples returned by RateLimit.get_limit().
+    """
 
-        return EndpointRateLimit(family_rates['limit'],
-                                 family_rates['remaining'],
-                                 family_rates['reset'])
+    def __init__(self, burst=1, margin=10):
+        self.burst = burst
+        self.margin = margin
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def EstimateWait(self, url, limit):
+        """ Return the number of seconds a request to url would have to
+        wait, without reserving its place.
+
+        Args:
+            url (str):
+                URL of the endpoint.
+            limit (EndpointRateLimit):
+                The current rate limit of the endpoint.
+        """
+        endpoint = RateLimit.url_to_resource(url)
+        with self._lock:
+            return self._Schedule(endpoint, limit, time.time())[0]
+
+    def Reserve(self, url, limit):
+        """ Reserve the next place for a request to url and return the number
+        of seconds the caller must wait before sending it. """
+        endpoint = RateLimit.url_to_resource(url)
+        with self._lock:
+            wait, next_time = self._Schedule(endpoint, limit, time.time())
+            self._next[endpoint] = next_time
+        return wait
+
+    def Acquire(self, url, limit, blocking=True, timeout=None):
+        """ Wait for the place of a request to url.
+
+        Args:
+            url (str):
+                URL of the endpoint.
+            limit (EndpointRateLimit):
+                The current rate limit of the endpoint.
+            blocking (bool):
+                If False, do not wait: return False if the request cannot be
+                sent right away.
+            timeout (float):
+                Return False instead of waiting longer than timeout seconds.
+
+        Returns:
+            True if the request may be sent, False if nothing was reserved.
+        """
+        endpoint = RateLimit.url_to_resource(url)
+        with self._lock:
+            wait, next_time = self._Schedule(endpoint, limit, time.time())
+            if wait > 0 and (not blocking or (timeout is not None and wait > timeout)):
+                return False
+            self._next[endpoint] = next_time
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def _Schedule(self, endpoint, limit, now):
+        """ Return the wait before the next request to endpoint and the time
+        from which the one after it may be sent. """
+        if limit.reset <= now:
+            return 0, now
+        next_time = max(self._next.get(endpoint, now), now)
+        if limit.remaining <= 0:
+            next_time = max(next_time, limit.reset + self.margin)
+            return next_time - now, next_time
+        interval = (limit.reset - now) / float(limit.remaining)
+        wait = max(next_time - (self.burst - 1) * interval - now, 0)
+        return wait, next_time + interval
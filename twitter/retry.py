@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+import logging
+import random
+import threading
+import time
+
+from email.utils import mktime_tz, parsedate_tz
+
+logger = logging.getLogger(__name__)
+
+
+class RetryPolicy(object):
+    """When and how long to wait before retrying a failed request.
+
+    A request is retried after a connection error, a timeout or a response
+    with one of the retry statuses, if its HTTP method is one of methods.
+    Only GET is retried by default since Twitter's POST endpoints are not
+    idempotent.
+
+    The wait before attempt n + 1 is drawn uniformly between 0 and
+    min(backoff_cap, backoff_base * 2 ** (n - 1)) seconds ("full jitter"),
+    unless the response says how long to wait with a Retry-After header or,
+    for a 429, with x-rate-limit-reset. A request is given up when
+    max_attempts have been made or when the server asks for a wait longer
+    than max_delay.
+
+    A policy may be shared by several Api instances, the retry budget is
+    then shared too. The budget holds up to retry_budget retries; each retry
+    spends one and each first attempt adds budget_ratio, so that once the
+    reserve is used the retries are limited to that fraction of the
+    requests and a failing server is not flooded with them.
+
+    Every attempt is counted in Stats() and passed to the on_attempt
+    callback, if any, as a dict with the url, verb, attempt number, status
+    (None after an error), error, elapsed time and the delay before the next
+    attempt (None if there is none).
+    """
+
+    def __init__(self,
+                 max_attempts=4,
+                 backoff_base=1.0,
+                 backoff_cap=60.0,
+                 max_delay=900,
+                 retry_budget=100,
+                 budget_ratio=0.1,
+                 methods=('GET',),
+                 statuses=(429, 500, 502, 503, 504),
+                 on_attempt=None):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_delay = max_delay
+        self.retry_budget = retry_budget
+        self.budget_ratio = budget_ratio
+        self.methods = frozenset(method.upper() for method in methods)
+        self.statuses = frozenset(statuses)
+        self.on_attempt = on_attempt
+        self._budget = float(retry_budget)
+        self._lock = threading.Lock()
+        self._stats = {
+            'attempts': 0,
+            'retries': 0,
+            'failures': 0,
+            'budget_exhausted': 0,
+        }
+
+    def GetDelay(self, verb, attempt, status=None, headers=None, error=None):
+        """Return the number of seconds to wait before retrying a request, or
+        None if it must not be retried.
+
+        Args:
+          verb:
+            The HTTP method of the request.
+          attempt:
+            The number of the attempt that just finished, starting at 1.
+          status:
+            The status code of the response, None if there is none.
+          headers:
+            The headers of the response.
+          error:
+            The connection error or timeout raised by the attempt, if any.
+        """
+        if error is None and status not in self.statuses:
+            return None
+        if verb.upper() not in self.methods or attempt >= self.max_attempts:
+            return None
+
+        delay = self._GetServerDelay(status, headers or {})
+        if delay is None:
+            delay = random.uniform(0, min(self.backoff_cap,
+                                          self.backoff_base * 2 ** (attempt - 1)))
+        elif delay > self.max_delay:
+            return None
+
+        with self._lock:
+            if self._budget < 1:
+                self._stats['budget_exhausted'] += 1
+                return None
+            self._budget -= 1
+        return delay
+
+    def Record(self, url, verb, attempt, status=None, error=None, elapsed=0, delay=None):
+        """Count an attempt and pass it to on_attempt."""
+        with self._lock:
+            self._stats['attempts'] += 1
+            if attempt == 1:
+                self._budget = min(self.retry_budget, self._budget + self.budget_ratio)
+            if delay is not None:
+                self._stats['retries'] += 1
+            elif error is not None or status in self.statuses:
+                self._stats['failures'] += 1
+        if delay is not None:
+            logger.debug('Attempt %s of [%s %s] failed (%s), retrying in %.2fs',
+                         attempt, verb, url, error or status, delay)
+        if self.on_attempt is not None:
+            self.on_attempt({
+                'url': url,
+                'verb': verb,
+                'attempt': attempt,
+                'status': status,
+                'error': error,
+                'elapsed': elapsed,
+                'delay': delay,
+            })
+
+    def Stats(self):
+        """Return a dict with the number of attempts, retries and requests
+        that failed for good, how many retries the budget refused and the
+        retries left in it."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['budget'] = self._budget
+        return stats
+
+    @staticmethod
+    def _GetServerDelay(status, headers):
+        retry_after = headers.get('retry-after')
+        if retry_after:
+            try:
+                return max(float(retry_after), 0)
+            except ValueError:
+                date = parsedate_tz(retry_after)
+                if date is not None:
+                    return max(mktime_tz(date) - time.time(), 0)
+        if status == 429:
+            try:
+                return max(int(headers.get('x-rate-limit-reset')) - time.time(), 0)
+            except (TypeError, ValueError):
+                pass
+        return None
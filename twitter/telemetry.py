@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+import threading
+import time
+from collections import deque
+
+from twitter.ratelimit import RateLimit
+
+# Upper bounds, in seconds, of the request latency histogram buckets.
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _EndpointStats(object):
+
+    def __init__(self, buckets, history):
+        self.requests = 0
+        self.errors = 0
+        self.statuses = {}
+        self.bytes = 0
+        self.latency = [0] * (len(buckets) + 1)
+        self.latency_sum = 0.0
+        self.rate_limit = deque(maxlen=history)
+
+
+class Telemetry(object):
+    """Counters of the requests sent by an Api, by endpoint.
+
+    For each endpoint, as returned by RateLimit.url_to_resource, it counts
+    the requests and their status codes, the bytes of the responses and
+    their latency in a histogram, and keeps the last history values of the
+    x-rate-limit-remaining header, so that the endpoints using up the rate
+    limits or the time can be found. Every attempt is counted, including
+    the ones retried by a RetryPolicy; responses served from the cache or
+    shared with an identical request in flight are not.
+
+    Pass an instance to Api(telemetry=...), possibly the same to several
+    ones, and read it with Snapshot() or, for Prometheus, Prometheus()::
+
+        >>> telemetry = twitter.Telemetry()
+        >>> api = twitter.Api(..., telemetry=telemetry)
+        >>> api.GetUserTimeline(screen_name='twitter')
+        >>> telemetry.Snapshot()['/statuses/user_timeline']['requests']
+        1
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, history=100):
+        """
+        Args:
+          buckets (tuple, optional):
+            The increasing upper bounds, in seconds, of the latency
+            histogram buckets. A last bucket holds the slower requests.
+          history (int, optional):
+            The number of rate limit values kept for each endpoint.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.history = history
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def Record(self, url, verb, status=None, elapsed=0, size=0, headers=None, error=None):
+        """Count a request.
+
+        Args:
+          url:
+            The url requested.
+          verb:
+            The HTTP method of the request.
+          status:
+            The status code of the response, None if there is none.
+          elapsed:
+            The seconds between sending the request and reading its response.
+          size:
+            The length of the body of the response.
+          headers:
+            The headers of the response.
+          error:
+            The connection error or timeout raised instead of a response, if
+            any.
+        """
+        endpoint = RateLimit.url_to_resource(url)
+        remaining = limit = None
+        if headers:
+            remaining = headers.get('x-rate-limit-remaining')
+            limit = headers.get('x-rate-limit-limit')
+
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = _EndpointStats(self.buckets, self.history)
+            stats.requests += 1
+            if error is not None or status is None:
+                stats.errors += 1
+            else:
+                stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.bytes += size
+            stats.latency_sum += elapsed
+            for i, bound in enumerate(self.buckets):
+                if elapsed <= bound:
+                    stats.latency[i] += 1
+                    break
+            else:
+                stats.latency[-1] += 1
+            if remaining is not None:
+                try:
+                    stats.rate_limit.append((time.time(), int(remaining), int(limit or 0)))
+                except ValueError:
+                    pass
+
+    def Snapshot(self):
+        """Return a dict with, for each endpoint, a dict of:
+
+          requests: the number of requests sent.
+          errors: the number of requests that got no response.
+          statuses: the number of responses by status code.
+          bytes: the total length of the responses.
+          latency: a dict of the count and sum of the latencies and of the
+            buckets, a list of (upper bound, count of the requests at most
+            that long) pairs ending with float('inf').
+          rate_limit: a list of the last (time, remaining, limit) values of
+            the rate limit headers.
+        """
+        snapshot = {}
+        with self._lock:
+            for endpoint, stats in self._endpoints.items():
+                buckets = []
+                count = 0
+                for bound, n in zip(self.buckets + (float('inf'),), stats.latency):
+                    count += n
+                    buckets.append((bound, count))
+                snapshot[endpoint] = {
+                    'family': endpoint.split('/')[1],
+                    'requests': stats.requests,
+                    'errors': stats.errors,
+                    'statuses': dict(stats.statuses),
+                    'bytes': stats.bytes,
+                    'latency': {
+                        'count': count,
+                        'sum': stats.latency_sum,
+                        'buckets': buckets,
+                    },
+                    'rate_limit': list(stats.rate_limit),
+                }
+        return snapshot
+
+    def Prometheus(self, prefix='twitter'):
+        """Return the counters in the Prometheus text exposition format,
+        labelled with the endpoint and its resource family."""
+        snapshot = self.Snapshot()
+        lines = []
+
+        def metric(name, kind, description):
+            lines.append('# HELP %s_%s %s' % (prefix, name, description))
+            lines.append('# TYPE %s_%s %s' % (prefix, name, kind))
+
+        def sample(name, endpoint, value, **labels):
+            labels = dict(labels, endpoint=endpoint, family=snapshot[endpoint]['family'])
+            lines.append('%s_%s{%s} %s' % (
+                prefix, name,
+                ','.join('%s="%s"' % (k, _EscapeLabel(v)) for k, v in sorted(labels.items())),
+                _FormatValue(value)))
+
+        endpoints = sorted(snapshot)
+        metric('requests_total', 'counter', 'Requests sent, by response status.')
+        for endpoint in endpoints:
+            stats = snapshot[endpoint]
+            for status in sorted(stats['statuses']):
+                sample('requests_total', endpoint, stats['statuses'][status], status=status)
+            if stats['errors']:
+                sample('requests_total', endpoint, stats['errors'], status='error')
+
+        metric('response_bytes_total', 'counter', 'Length of the response bodies.')
+        for endpoint in endpoints:
+            sample('response_bytes_total', endpoint, snapshot[endpoint]['bytes'])
+
+        metric('request_duration_seconds', 'histogram', 'Time to get the response.')
+        for endpoint in endpoints:
+            latency = snapshot[endpoint]['latency']
+            for bound, count in latency['buckets']:
+                sample('request_duration_seconds_bucket', endpoint, count, le=bound)
+            sample('request_duration_seconds_sum', endpoint, latency['sum'])
+            sample('request_duration_seconds_count', endpoint, latency['count'])
+
+        metric('rate_limit_remaining', 'gauge', 'Requests left in the rate limit window.')
+        for endpoint in endpoints:
+            if snapshot[endpoint]['rate_limit']:
+                sample('rate_limit_remaining', endpoint, snapshot[endpoint]['rate_limit'][-1][1])
+
+        metric('rate_limit_limit', 'gauge', 'Requests allowed in the rate limit window.')
+        for endpoint in endpoints:
+            if snapshot[endpoint]['rate_limit']:
+                sample('rate_limit_limit', endpoint, snapshot[endpoint]['rate_limit'][-1][2])
+
+        return '\n'.join(lines) + '\n'
+
+    def Reset(self):
+        """Forget everything counted so far."""
+        with self._lock:
+            self._endpoints = {}
+
+
+def _FormatValue(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def _EscapeLabel(value):
+    return (_FormatValue(value) if isinstance(value, float) else str(value)) \
+        .replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -323,7 +323,7 @@ def parse_arg_list(args, attr):
     Convenience/DRY function.
 
     Args:
-        args (str, twitter.User, list, tuple): set of arguments to
+        args (str, twitter.User, list, tuple, set): set of arguments to
             pass to API.
         attr (str): The attribute to be extracted from each arg.
 
@@ -335,7 +335,7 @@ def parse_arg_list(args, attr):
         out.append(args)
     elif isinstance(args, twitter.User):
         out.append(getattr(args, attr))
-    elif isinstance(args, (list, tuple)):
+    elif isinstance(args, (list, tuple, set, frozenset)):
         for item in args:
             if isinstance(item, (str, unicode)):
                 out.append(item)